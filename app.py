@@ -1,14 +1,25 @@
+import time
+
+# 再実行の開始時刻（モジュールの読み込み時間の計測用）
+RERUN_STARTED = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import io
-import requests
-import json
+from dataclasses import replace
+from datetime import datetime
 import os
 
+from simulator import (AI_MODELS, COMPARISON_METRICS, DEFAULT_ELASTICITIES, DEFAULT_PROMPT_BUDGET, GOAL_METRICS, GOAL_VARIABLES,
+                       GRANULARITIES, MONTHLY_GOAL_METRICS, AIClient, COST_CATEGORIES, PRESETS, SPEND_CATEGORIES,
+                       SUGGESTION_RULES, CostSchedule, IncrementalSimulation, LRUCache, MetricsRegistry, Profiler,
+                       ScenarioStore, SimulationInputs, band_frame, build_prompt, calculate_optimization_suggestions,
+                       compare_scenarios, comparison_frame, comparison_totals, configure_logging, downsample,
+                       estimate_tokens, fingerprint, frame_columns, goal_seek, log_metrics, lttb_indices,
+                       month_labels, monte_carlo, optimize_schedule, preset_costs, rule_based_optimization,
+                       run_sensitivity, run_sweep, simulate_arrays, suggestion_flags, to_csv, to_excel, to_grid,
+                       tornado_frame)
+
 # Streamlit設定
 st.set_page_config(
     page_title="コンサル向けシミュレーションツール",
@@ -16,13 +27,55 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def get_metrics():
+    """再実行時間・AI応答時間の集計（プロセス内で共有）。SIMULATOR_METRICS_LOG を設定すると構造化ログも出力"""
+    if os.getenv("SIMULATOR_METRICS_LOG"):
+        configure_logging()
+    return MetricsRegistry()
+
+@st.cache_resource
+def shared_cache():
+    """入力のフィンガープリントだけで決まるグラフ・ファイル等のキャッシュ（全セッションで共有）
+
+    スイープやモンテカルロの結果は1件で数十MBになるため、件数に加えて合計サイズでも制限する
+    （SIMULATOR_CACHE_MB で変更できる。既定は256MB）。
+    """
+    return LRUCache(maxsize=256, max_bytes=int(float(os.getenv("SIMULATOR_CACHE_MB", "256")) * 1024 ** 2))
+
+# 再実行ごとの処理時間の計測
+profiler = Profiler(started=RERUN_STARTED)
+profiler.record("import", time.perf_counter() - RERUN_STARTED)
+
 # セッション状態の初期化
-if 'monthly_costs' not in st.session_state:
-    st.session_state.monthly_costs = {}
+if 'cost_schedule' not in st.session_state:
+    st.session_state.cost_schedule = CostSchedule()
 if 'auto_mode' not in st.session_state:
     st.session_state.auto_mode = False
 if 'selected_preset' not in st.session_state:
     st.session_state.selected_preset = "デフォルト"
+if 'preset_drift' not in st.session_state:
+    st.session_state.preset_drift = 0.0
+if 'custom_presets' not in st.session_state:
+    st.session_state.custom_presets = {}
+if 'incremental' not in st.session_state:
+    st.session_state.incremental = None
+if 'result_cache' not in st.session_state:
+    st.session_state.result_cache = LRUCache(maxsize=64)
+if 'input_version' not in st.session_state:
+    st.session_state.input_version = 0
+if 'input_defaults' not in st.session_state:
+    st.session_state.input_defaults = {}
+if 'cost_editor_version' not in st.session_state:
+    st.session_state.cost_editor_version = 0
+if 'pinned_scenarios' not in st.session_state:
+    st.session_state.pinned_scenarios = {}
+if 'export_requests' not in st.session_state:
+    st.session_state.export_requests = {}
+if 'ai_request' not in st.session_state:
+    st.session_state.ai_request = None
+if 'ai_error' not in st.session_state:
+    st.session_state.ai_error = None
 # API key from environment variables
 if 'api_key_available' not in st.session_state:
     st.session_state.api_key_available = bool(os.getenv('OPENAI_API_KEY'))
@@ -30,340 +83,286 @@ if 'api_key_available' not in st.session_state:
 st.title("📊 コンサル向けシミュレーション作成ツール")
 st.markdown("---")
 
+def input_default(name, default):
+    """入力欄の初期値（保存済みシナリオを開いた直後はその値）"""
+    return st.session_state.input_defaults.get(name, default)
+
+def input_key(name):
+    """入力欄のキー（保存済みシナリオを開くたびに変えて、初期値から作り直す）"""
+    return f"{name}_{st.session_state.input_version}"
+
 # サイドバーで基本設定
 st.sidebar.header("基本設定")
-simulation_period = st.sidebar.selectbox("シミュレーション期間", ["12ヶ月", "24ヶ月", "36ヶ月"])
-start_date = st.sidebar.date_input("開始日", datetime.now())
+period_options = ["12ヶ月", "24ヶ月", "36ヶ月"]
+loaded_period = f"{input_default('months', 12)}ヶ月"
+if loaded_period not in period_options:
+    period_options.append(loaded_period)
+simulation_period = st.sidebar.selectbox("シミュレーション期間", period_options,
+                                         index=period_options.index(loaded_period), key=input_key("months"))
+start_date = st.sidebar.date_input("開始日", input_default("start_date", datetime.now()), key=input_key("start_date"))
+granularity = st.sidebar.radio("結果の粒度", list(GRANULARITIES), format_func=GRANULARITIES.get, horizontal=True,
+                               index=list(GRANULARITIES).index(input_default("granularity", "monthly")),
+                               key=input_key("granularity"), help="週次・日次では月額の設定を日割りで按分します")
 
 # 期間の設定
 months = int(simulation_period.split("ヶ月")[0])
-dates = [start_date + timedelta(days=30*i) for i in range(months)]
-month_names = [date.strftime("%Y年%m月") for date in dates]
-
-# 業界・イベント別プリセット定義
-PRESETS = {
-    "デフォルト": {
-        "description": "標準的な設定",
-        "consultant_multipliers": [1.0] * 12,
-        "production_multipliers": [1.0] * 12,
-        "ad_multipliers": [1.0] * 12
-    },
-    "EC・小売業": {
-        "description": "EC・小売業向け（年末商戦、夏物・冬物シーズン対応）",
-        "consultant_multipliers": [1.2, 1.0, 1.0, 1.1, 1.0, 1.0, 1.1, 1.0, 1.0, 1.1, 1.3, 1.5],
-        "production_multipliers": [1.3, 0.8, 0.9, 1.2, 0.9, 1.0, 1.2, 0.9, 1.0, 1.2, 1.4, 1.6],
-        "ad_multipliers": [1.4, 0.7, 0.8, 1.3, 0.8, 0.9, 1.3, 0.8, 0.9, 1.3, 1.5, 1.8]
-    },
-    "旅行・レジャー": {
-        "description": "旅行・レジャー業界（GW、夏休み、年末年始ピーク）",
-        "consultant_multipliers": [1.3, 1.0, 1.2, 1.4, 1.5, 1.0, 1.6, 1.6, 1.0, 1.0, 1.0, 1.4],
-        "production_multipliers": [1.4, 0.9, 1.3, 1.5, 1.6, 0.9, 1.7, 1.7, 0.9, 0.9, 0.9, 1.5],
-        "ad_multipliers": [1.5, 0.8, 1.4, 1.6, 1.7, 0.8, 1.8, 1.8, 0.8, 0.8, 0.8, 1.6]
-    },
-    "BtoB": {
-        "description": "BtoB企業（年度末、四半期末強化）",
-        "consultant_multipliers": [1.0, 1.0, 1.4, 1.0, 1.0, 1.2, 1.0, 1.0, 1.2, 1.0, 1.0, 1.3],
-        "production_multipliers": [1.0, 1.0, 1.5, 1.0, 1.0, 1.3, 1.0, 1.0, 1.3, 1.0, 1.0, 1.4],
-        "ad_multipliers": [1.0, 1.0, 1.6, 1.0, 1.0, 1.4, 1.0, 1.0, 1.4, 1.0, 1.0, 1.5]
-    },
-    "スタートアップ": {
-        "description": "スタートアップ企業（資金調達時期考慮）",
-        "consultant_multipliers": [1.5, 1.0, 1.0, 1.2, 1.0, 1.0, 1.0, 1.0, 1.3, 1.0, 1.0, 1.0],
-        "production_multipliers": [1.6, 1.0, 1.0, 1.3, 1.0, 1.0, 1.0, 1.0, 1.4, 1.0, 1.0, 1.0],
-        "ad_multipliers": [1.7, 1.0, 1.0, 1.4, 1.0, 1.0, 1.0, 1.0, 1.5, 1.0, 1.0, 1.0]
-    }
-}
+month_names = month_labels(start_date, months)
 
-def apply_preset_costs(preset_name, consultant_base, production_base, ad_base):
-    if preset_name not in PRESETS:
-        return
-    
-    preset = PRESETS[preset_name]
-    for i in range(min(months, 12)):
-        month_index = (start_date.month + i - 1) % 12
-        
-        consultant_cost = int(consultant_base * preset["consultant_multipliers"][month_index])
-        production_cost_calc = int(production_base * preset["production_multipliers"][month_index])
-        ad_cost_calc = int(ad_base * preset["ad_multipliers"][month_index])
-        
-        st.session_state.monthly_costs[f"consultant_{i}"] = consultant_cost
-        st.session_state.monthly_costs[f"production_{i}"] = production_cost_calc
-        st.session_state.monthly_costs[f"ad_cost_{i}"] = ad_cost_calc
-
-def calculate_optimization_suggestions(df):
-    suggestions = []
-    
-    # ROASが低い月の特定
-    low_roas_months = df[df["ROAS"] < df["ROAS"].mean() - df["ROAS"].std()]
-    if not low_roas_months.empty:
-        suggestions.append({
-            "type": "警告",
-            "title": "ROAS改善が必要な月があります",
-            "detail": f"{', '.join(low_roas_months['月'].tolist())}のROASが平均を大きく下回っています。広告費の見直しを検討してください。",
-            "impact": "高"
-        })
-    
-    # 利益率の変動が大きい場合
-    profit_margin_std = df["利益率"].std()
-    if profit_margin_std > 10:
-        suggestions.append({
-            "type": "注意",
-            "title": "利益率の変動が大きいです",
-            "detail": f"利益率の標準偏差が{profit_margin_std:.1f}%です。費用配分の最適化により安定化が可能です。",
-            "impact": "中"
-        })
-    
-    # 総費用が売上を上回る月
-    loss_months = df[df["利益"] < 0]
-    if not loss_months.empty:
-        suggestions.append({
-            "type": "警告",
-            "title": "赤字月があります",
-            "detail": f"{', '.join(loss_months['月'].tolist())}で赤字になっています。緊急の費用見直しが必要です。",
-            "impact": "高"
-        })
-    
-    # 広告費効率の最適化提案
-    high_ad_months = df[df["広告費"] > df["売上"] * 0.4]
-    if not high_ad_months.empty:
-        suggestions.append({
-            "type": "提案",
-            "title": "広告費最適化の機会",
-            "detail": f"{', '.join(high_ad_months['月'].tolist())}の広告費率が40%を超えています。効率化により利益改善が見込めます。",
-            "impact": "中"
-        })
-    
-    return suggestions
+# 月別費用表の列と費目の対応
+COST_EDITOR_COLUMNS = {"コンサル費": "consultant", "制作費": "production", "広告費": "ad_cost"}
 
-def ai_optimize_simulation(df, business_goals):
-    """AI最適化機能"""
-    
-    # 環境変数からAPIキーを取得
-    api_key = os.getenv('OPENAI_API_KEY')
-    
-    # APIキーが設定されていない場合は、ルールベースの最適化を実行
-    if not api_key or api_key.strip() == "":
-        return rule_based_optimization(df, business_goals)
-    
-    # 実際のAI API呼び出し
-    try:
-        optimization_result = call_openai_api(df, business_goals, api_key)
-        return optimization_result
-    except Exception as e:
-        st.error(f"AI API呼び出しエラー: {str(e)}")
-        return rule_based_optimization(df, business_goals)
+def apply_cost_edits(editor_key):
+    """月別費用表で変更されたセルだけを費用スケジュールに反映する"""
+    for row, changes in st.session_state[editor_key]["edited_rows"].items():
+        for column, value in changes.items():
+            if value is None:
+                st.session_state.cost_schedule.clear(COST_EDITOR_COLUMNS[column], int(row))
+            else:
+                st.session_state.cost_schedule.set(COST_EDITOR_COLUMNS[column], int(row), int(value))
 
-def call_openai_api(df, business_goals, api_key):
-    """OpenAI APIを使用した実際の最適化"""
-    
-    # データサマリーを作成
-    data_summary = {
-        "総売上": df["売上"].sum(),
-        "総利益": df["利益"].sum(),
-        "平均ROAS": df["ROAS"].mean(),
-        "利益率標準偏差": df["利益率"].std(),
-        "月別データ": df.to_dict('records')
-    }
-    
-    # プロンプトを作成
-    prompt = f"""
-    以下のビジネスシミュレーションデータを分析し、{business_goals}のための具体的な最適化提案を3つ提示してください。
-
-    データサマリー:
-    - 総売上: {data_summary['総売上']}万円
-    - 総利益: {data_summary['総利益']}万円
-    - 平均ROAS: {data_summary['平均ROAS']:.1f}%
-    - 利益率標準偏差: {data_summary['利益率標準偏差']:.1f}%
-
-    目標: {business_goals}
-
-    以下のJSON形式で回答してください:
-    [
-        {{
-            "月": "対象月または全期間",
-            "施策": "具体的な施策名",
-            "現在値": "現在の状況",
-            "推奨値": "推奨する変更内容",
-            "期待効果": "期待される効果",
-            "理由": "提案理由"
-        }}
-    ]
-    """
-    
-    # OpenAI API呼び出し
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": "gpt-3.5-turbo",
-        "messages": [
-            {"role": "system", "content": "あなたはビジネス分析の専門家です。データを分析し、実用的な最適化提案を行ってください。"},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 1500,
-        "temperature": 0.7
+def refresh_cost_editor():
+    """ボタン等で月別費用を書き換えたとき、表の編集状態を破棄して再表示する"""
+    st.session_state.cost_editor_version += 1
+
+def preset_definition(preset_name, yoy_drift=0.0):
+    """プリセット名から倍率定義を返す（カスタムプリセットや前年比の変化率を含む）"""
+    preset = st.session_state.custom_presets.get(preset_name) or PRESETS[preset_name]
+    if yoy_drift:
+        preset = {**preset, "yoy_drift": yoy_drift}
+    return preset
+
+def apply_preset_costs(preset_name, consultant_base, production_base, ad_base, yoy_drift=0.0):
+    st.session_state.cost_schedule = st.session_state.cost_schedule.merged(
+        preset_costs(preset_definition(preset_name, yoy_drift), months, start_date.month,
+                     consultant_base, production_base, ad_base)
+    )
+
+@st.cache_resource
+def get_ai_client():
+    """AIクライアント（接続プールと応答キャッシュをプロセス内で共有）"""
+    return AIClient(metrics=get_metrics())
+
+@st.cache_resource
+def get_store():
+    """シナリオライブラリ（SIMULATOR_STORE_PATH で保存先を変更できる）"""
+    return ScenarioStore(os.getenv("SIMULATOR_STORE_PATH", "scenarios.db"))
+
+def open_scenario(scenario_id):
+    """保存済みシナリオの入力を画面に戻し、保存済みの結果を再計算せずに表示する"""
+    saved = get_store().load(scenario_id)
+    inputs = saved.inputs
+    st.session_state.input_defaults = {
+        name: getattr(inputs, name)
+        for name in ["months", "start_date", "granularity", "base_revenue", "revenue_growth", "peak_months", "peak_multiplier",
+                     "base_ad_cost", "ad_cost_ratio", "consultant_fee", "production_cost", "other_fixed_cost"]
     }
-    
-    response = requests.post(
-        "https://api.openai.com/v1/chat/completions",
-        headers=headers,
-        json=data,
-        timeout=30
+    st.session_state.input_version += 1
+    st.session_state.auto_mode = inputs.auto_mode
+    st.session_state.cost_schedule = inputs.monthly_costs
+    refresh_cost_editor()
+    
+    # プリセット（組み込み以外の倍率定義はカスタムプリセットとして登録）
+    preset = inputs.preset if isinstance(inputs.preset, dict) else PRESETS.get(inputs.preset, PRESETS["デフォルト"])
+    if saved.preset not in PRESETS:
+        st.session_state.custom_presets[saved.preset] = {k: v for k, v in preset.items() if k != "yoy_drift"}
+    st.session_state.selected_preset = saved.preset
+    st.session_state.preset_drift = float(preset.get("yoy_drift", 0.0))
+    
+    key = fingerprint(inputs.months, inputs.month_names(), inputs.granularity, inputs.engine_params())
+    st.session_state.result_cache.get_or_compute(
+        ("simulation", key), lambda: (saved.frame, saved.totals, calculate_optimization_suggestions(saved.frame))
     )
-    
-    if response.status_code == 200:
-        result = response.json()
-        ai_response = result['choices'][0]['message']['content']
-        
-        try:
-            # JSON形式の回答をパース
-            optimizations = json.loads(ai_response)
-            return optimizations
-        except json.JSONDecodeError:
-            # JSON形式でない場合は、シミュレーション結果を返す
-            return ai_api_call_simulation(df, business_goals, api_key)
-    else:
-        raise Exception(f"API呼び出し失敗: {response.status_code} - {response.text}")
-
-def rule_based_optimization(df, business_goals):
-    """ルールベースの最適化"""
-    optimizations = []
-    
-    # 利益最大化の場合
-    if business_goals == "利益最大化":
-        # ROASが低い月を特定
-        low_roas_months = df[df["ROAS"] < 200]
-        if not low_roas_months.empty:
-            for _, row in low_roas_months.iterrows():
-                optimizations.append({
-                    "月": row["月"],
-                    "施策": "広告費削減",
-                    "現在値": f"{row['広告費']}万円",
-                    "推奨値": f"{int(row['広告費'] * 0.8)}万円",
-                    "期待効果": f"利益+{int(row['広告費'] * 0.2)}万円",
-                    "理由": f"ROAS {row['ROAS']}%が低すぎます"
-                })
-    
-    # 売上成長重視の場合
-    elif business_goals == "売上成長重視":
-        # 利益率が高い月の広告費を増加
-        high_profit_months = df[df["利益率"] > df["利益率"].mean() + 5]
-        if not high_profit_months.empty:
-            for _, row in high_profit_months.iterrows():
-                optimizations.append({
-                    "月": row["月"],
-                    "施策": "広告費増額",
-                    "現在値": f"{row['広告費']}万円",
-                    "推奨値": f"{int(row['広告費'] * 1.3)}万円",
-                    "期待効果": f"売上+{int(row['売上'] * 0.15)}万円",
-                    "理由": f"利益率{row['利益率']}%で余裕があります"
-                })
-    
-    # リスク最小化の場合
+
+# シミュレーション計算
+def current_inputs():
+    return SimulationInputs(
+        months=months,
+        start_date=start_date,
+        base_revenue=base_revenue,
+        revenue_growth=revenue_growth,
+        base_ad_cost=base_ad_cost,
+        ad_cost_ratio=ad_cost_ratio,
+        consultant_fee=consultant_fee,
+        production_cost=production_cost,
+        other_fixed_cost=other_fixed_cost,
+        peak_months=tuple(int(m.rstrip("月")) for m in peak_months) if revenue_seasonal else (),
+        peak_multiplier=peak_multiplier if revenue_seasonal else 1.0,
+        auto_mode=st.session_state.auto_mode,
+        preset=preset_definition(st.session_state.selected_preset, st.session_state.preset_drift),
+        monthly_costs=st.session_state.cost_schedule.copy(),
+        granularity=granularity,
+    )
+
+def simulation_params():
+    return current_inputs().engine_params()
+
+def calculate_simulation():
+    """結果・KPI・改善提案を計算する（月別費用だけの変更は変わった月だけ再計算）"""
+    inputs = current_inputs()
+    if st.session_state.incremental is None:
+        st.session_state.incremental = IncrementalSimulation(inputs)
+        changed = None
     else:
-        # 変動が大きい費用項目を安定化
-        if df["利益率"].std() > 10:
-            optimizations.append({
-                "月": "全期間",
-                "施策": "費用平準化",
-                "現在値": f"利益率標準偏差 {df['利益率'].std():.1f}%",
-                "推奨値": "各月の費用を平均値に近づける",
-                "期待効果": "リスク軽減",
-                "理由": "利益率の変動が大きすぎます"
-            })
-    
-    return optimizations
+        changed = st.session_state.incremental.update(inputs)
+    profiler.count("simulation_full" if changed is None else "simulation_incremental")
+    incremental = st.session_state.incremental
+    return incremental.frame(), incremental.totals(), incremental.suggestions()
 
-def ai_api_call_simulation(df, business_goals, api_key):
-    """AI API呼び出しシミュレーション（実際のAPIに置き換え可能）"""
-    
-    # データサマリーを作成
-    data_summary = {
-        "総売上": df["売上"].sum(),
-        "総利益": df["利益"].sum(),
-        "平均ROAS": df["ROAS"].mean(),
-        "利益率標準偏差": df["利益率"].std(),
-        "業績目標": business_goals
-    }
-    
-    # シミュレーション結果（実際はAI APIからの応答）
-    ai_optimizations = []
-    
-    if business_goals == "利益最大化":
-        ai_optimizations.append({
-            "月": "2025年08月",
-            "施策": "AI推奨: 広告チャネル最適化",
-            "現在値": "統合広告運用",
-            "推奨値": "SNS広告重視（70%）+ リスティング（30%）",
-            "期待効果": "ROAS +25%向上",
-            "理由": "AI分析: SNS広告のCVRが高い傾向"
-        })
-        
-        ai_optimizations.append({
-            "月": "2025年10月",
-            "施策": "AI推奨: コンテンツ制作強化",
-            "現在値": "通常制作",
-            "推奨値": "動画コンテンツ強化",
-            "期待効果": "エンゲージメント +40%",
-            "理由": "AI分析: 動画コンテンツのパフォーマンスが高い"
-        })
-    
-    elif business_goals == "売上成長重視":
-        ai_optimizations.append({
-            "月": "全期間",
-            "施策": "AI推奨: 予算再配分",
-            "現在値": "均等配分",
-            "推奨値": "Q4重点配分（+50%）",
-            "期待効果": "売上成長率 +15%",
-            "理由": "AI予測: Q4の市場成長が見込める"
-        })
-    
-    else:  # リスク最小化
-        ai_optimizations.append({
-            "月": "全期間",
-            "施策": "AI推奨: リスク分散",
-            "現在値": "単一チャネル重視",
-            "推奨値": "マルチチャネル戦略",
-            "期待効果": "リスク軽減 -30%",
-            "理由": "AI分析: チャネル分散によりリスク軽減"
-        })
-    
-    return ai_optimizations
+# グラフの点数の上限（これを超える系列はLTTBで間引いてから送信する）
+CHART_MAX_POINTS = 400
+
+def chart_layout(fig, title, height=400, **layout):
+    """グラフの共通レイアウト（高さ・余白を固定）"""
+    fig.update_layout(**{"title": title, "height": height, "margin": dict(l=40, r=20, t=60, b=40),
+                         "xaxis_tickangle": -45, **layout})
+    return fig
+
+def line_trace(x, y, name, **kwargs):
+    """LTTBで間引いた折れ線"""
+    import plotly.graph_objects as go
+    x, y = downsample(x, y, CHART_MAX_POINTS)
+    return go.Scatter(x=x, y=y, name=name, mode="lines", **kwargs)
+
+def bar_trace(x, y, name, **kwargs):
+    """LTTBで間引いた棒グラフ"""
+    import plotly.graph_objects as go
+    x, y = downsample(x, y, CHART_MAX_POINTS)
+    return go.Bar(x=x, y=y, name=name, **kwargs)
+
+def build_result_figures(df, ad_cost_ratio):
+    """結果表示タブのグラフ4種を作成する"""
+    import plotly.graph_objects as go
+    fig_revenue = go.Figure([
+        line_trace(df["月"], df["売上"], "売上", line=dict(color="blue")),
+        line_trace(df["月"], df["総費用"], "総費用", line=dict(color="red")),
+        line_trace(df["月"], df["利益"], "利益", line=dict(color="green")),
+    ])
+    chart_layout(fig_revenue, "売上・費用・利益推移", yaxis_title="金額（万円）")
+    
+    fig_roas = go.Figure([bar_trace(df["月"], df["ROAS"], "ROAS")])
+    chart_layout(fig_roas, "ROAS推移（売上÷広告費×100）", yaxis_title="ROAS")
+    fig_roas.add_hline(y=100, line_dash="dash", line_color="red", 
+                      annotation_text="損益分岐点(100%)")
+    
+    fig_ad_ratio = go.Figure([bar_trace(df["月"], df["広告費率"], "広告費率")])
+    chart_layout(fig_ad_ratio, "広告費率推移（広告費÷売上×100）", yaxis_title="広告費率")
+    fig_ad_ratio.add_hline(y=ad_cost_ratio, line_dash="dash", line_color="green", 
+                          annotation_text=f"目標広告費率({ad_cost_ratio}%)")
+    
+    # 散布図で広告費率とROASの相関を表示（点が多い場合は月ラベルを省略し、ホバーにだけ表示）
+    revenue = df["売上"].clip(lower=0)
+    fig_scatter = go.Figure([go.Scatter(
+        x=df["広告費率"], y=df["ROAS"], mode="markers+text" if len(df) <= 60 else "markers",
+        text=df["月"] if len(df) <= 60 else None, textposition="top center", name="", customdata=df["月"],
+        marker=dict(size=revenue, sizemode="area", sizeref=2 * max(revenue.max(), 1) / 20 ** 2, sizemin=2),
+        hovertemplate="%{customdata}<br>広告費率=%{x}<br>ROAS=%{y}",
+    )])
+    chart_layout(fig_scatter, "広告費率とROASの相関", xaxis_title="広告費率", yaxis_title="ROAS", xaxis_tickangle=0)
+    
+    return fig_revenue, fig_roas, fig_ad_ratio, fig_scatter
+
+def build_preset_figure(preset_name, preset_data):
+    """プリセットの季節変動パターンのグラフ"""
+    import plotly.graph_objects as go
+    calendar = [f"{m}月" for m in range(1, 13)]
+    fig_pattern = go.Figure([
+        go.Scatter(x=calendar, y=preset_data["consultant_multipliers"], name="コンサル費倍率", mode="lines"),
+        go.Scatter(x=calendar, y=preset_data["production_multipliers"], name="制作費倍率", mode="lines"),
+        go.Scatter(x=calendar, y=preset_data["ad_multipliers"], name="広告費倍率", mode="lines"),
+    ])
+    return chart_layout(fig_pattern, f"{preset_name} - 季節変動パターン", height=300,
+                        yaxis_title="倍率", legend_title_text="費目")
+
+def build_band_figures(band, mc_metric, mc_paths):
+    """モンテカルロの予測レンジと赤字確率のグラフ（中央値の形状でまとめて間引く）"""
+    import plotly.graph_objects as go
+    band = band.iloc[lttb_indices(band["P50"], CHART_MAX_POINTS)]
+    fig_fan = go.Figure([
+        go.Scatter(x=band["月"], y=band["P95"], name="P95", line=dict(width=0), showlegend=False),
+        go.Scatter(x=band["月"], y=band["P5"], name="P5〜P95", line=dict(width=0),
+                   fill="tonexty", fillcolor="rgba(31, 119, 180, 0.25)"),
+        go.Scatter(x=band["月"], y=band["P50"], name="P50（中央値）", line=dict(color="rgb(31, 119, 180)")),
+    ])
+    chart_layout(fig_fan, f"{mc_metric}の予測レンジ（{mc_paths:,}パス）")
+    fig_loss = go.Figure([go.Bar(x=band["月"], y=band["赤字確率"], name="赤字確率")])
+    chart_layout(fig_loss, "月別赤字確率（%）", yaxis_title="赤字確率")
+    return fig_fan, fig_loss
+
+def build_comparison_figure(comparison, metric):
+    """比較シナリオの指標の推移を重ねた折れ線"""
+    import plotly.graph_objects as go
+    column = COMPARISON_METRICS[metric][0]
+    fig_compare = go.Figure([line_trace(comparison["month_names"], values, name)
+                             for name, values in zip(comparison["names"], comparison["columns"][column])])
+    return chart_layout(fig_compare, f"{metric}のシナリオ比較", yaxis_title=metric)
+
+def build_sweep_figure(sweep_result, sweep_metric, x_values, y_values, x_label, y_label):
+    """シナリオスイープのヒートマップ"""
+    import plotly.graph_objects as go
+    fig_sweep = go.Figure(go.Heatmap(
+        z=to_grid(sweep_result, sweep_metric), x=np.round(x_values, 2), y=np.round(y_values, 2),
+        colorscale="RdYlGn", colorbar=dict(title=sweep_metric),
+    ))
+    return chart_layout(fig_sweep, f"{sweep_metric}のシナリオ比較（{len(x_values) * len(y_values):,}通り）",
+                        xaxis_title=x_label, yaxis_title=y_label, xaxis_tickangle=0)
+
+def build_tornado_figure(sensitivity_result):
+    """感度分析のトルネードチャート（影響の大きい入力を上に、基準値からの増減を横棒で表示）"""
+    import plotly.graph_objects as go
+    frame = tornado_frame(sensitivity_result).iloc[::-1]
+    baseline, step = sensitivity_result["baseline"], sensitivity_result["step"] * 100
+    fig_tornado = go.Figure([
+        go.Bar(y=frame["入力"], x=frame[column] - baseline, base=baseline, orientation="h", name=name,
+               marker_color=color)
+        for column, name, color in [("減少時", f"入力 -{step:g}%", "indianred"),
+                                    ("増加時", f"入力 +{step:g}%", "seagreen")]
+    ])
+    return chart_layout(fig_tornado, f"{sensitivity_result['metric']}の感度（各入力を ±{step:g}%）",
+                        height=max(400, 40 * len(frame) + 120), barmode="overlay", xaxis_tickangle=0,
+                        xaxis_title=sensitivity_result["metric"])
 
 # メインコンテンツ
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 基本設定", "📅 月別費用設定", "📊 結果表示", "📁 エクスポート", "🤖 AI最適化"])
 
-with tab1:
+with tab1, profiler.span("tab1"):
     st.header("シミュレーション設定")
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("売上設定")
-        base_revenue = st.number_input("初月売上（万円）", value=500, step=50)
-        revenue_growth = st.slider("月次成長率（%）", -10.0, 50.0, 5.0, 0.1)
-        revenue_seasonal = st.checkbox("季節変動を考慮")
+        base_revenue = st.number_input("初月売上（万円）", value=input_default("base_revenue", 500), step=50,
+                                       key=input_key("base_revenue"))
+        revenue_growth = st.slider("月次成長率（%）", -10.0, 50.0, input_default("revenue_growth", 5.0), 0.1,
+                                   key=input_key("revenue_growth"))
+        revenue_seasonal = st.checkbox("季節変動を考慮", value=bool(input_default("peak_months", ())),
+                                       key=input_key("revenue_seasonal"))
         
         if revenue_seasonal:
             peak_months = st.multiselect("ピーク月", 
                                        ["1月", "2月", "3月", "4月", "5月", "6月", 
                                         "7月", "8月", "9月", "10月", "11月", "12月"],
-                                       default=["12月"])
-            peak_multiplier = st.slider("ピーク月倍率", 1.0, 3.0, 1.5, 0.1)
+                                       default=[f"{m}月" for m in input_default("peak_months", ())] or ["12月"],
+                                       key=input_key("peak_months"))
+            peak_multiplier = st.slider("ピーク月倍率", 1.0, 3.0, input_default("peak_multiplier", 1.5), 0.1,
+                                        key=input_key("peak_multiplier"))
     
     with col2:
         st.subheader("費用設定")
         
         # 広告費
-        base_ad_cost = st.number_input("初月広告費（万円）", value=150, step=10)
-        ad_cost_ratio = st.slider("売上に対する広告費率（%）", 0.0, 50.0, 30.0, 1.0)
+        base_ad_cost = st.number_input("初月広告費（万円）", value=input_default("base_ad_cost", 150), step=10,
+                                       key=input_key("base_ad_cost"))
+        ad_cost_ratio = st.slider("売上に対する広告費率（%）", 0.0, 50.0, input_default("ad_cost_ratio", 30.0), 1.0,
+                                  key=input_key("ad_cost_ratio"))
         
         # 固定費
-        consultant_fee = st.number_input("月次コンサル費（万円）", value=60, step=10)
-        production_cost = st.number_input("月次制作費（万円）", value=30, step=5)
-        other_fixed_cost = st.number_input("その他固定費（万円）", value=20, step=5)
+        consultant_fee = st.number_input("月次コンサル費（万円）", value=input_default("consultant_fee", 60), step=10,
+                                         key=input_key("consultant_fee"))
+        production_cost = st.number_input("月次制作費（万円）", value=input_default("production_cost", 30), step=5,
+                                          key=input_key("production_cost"))
+        other_fixed_cost = st.number_input("その他固定費（万円）", value=input_default("other_fixed_cost", 20), step=5,
+                                           key=input_key("other_fixed_cost"))
     
     # 自動スケジューリング機能
     st.subheader("🤖 自動スケジューリング")
@@ -379,107 +378,119 @@ with tab1:
                 ["利益最大化", "売上成長重視", "リスク最小化"],
                 help="どの指標を最優先するかを選択"
             )
+            with st.expander("売上反応の仮定"):
+                st.caption("支出を増やしたときに売上がどれだけ伸びるかの仮定値です。配分の比較にだけ使い、"
+                           "シミュレーションの売上には反映されません。")
+                elasticities = {
+                    category: st.number_input(f"{label}の弾力性", min_value=0.0, max_value=1.0,
+                                              value=DEFAULT_ELASTICITIES[category], step=0.01, format="%.2f",
+                                              key=f"elasticity_{category}")
+                    for category, label in zip(SPEND_CATEGORIES, ["コンサル費", "制作費", "広告費"])
+                }
         
         with col2:
             if st.button("🎯 最適スケジュール生成", type="primary"):
-                # 簡単な最適化ロジック
-                for i in range(months):
-                    if priority_mode == "利益最大化":
-                        # 利益を最大化する配分
-                        consultant_opt = min(target_budget * 0.4, consultant_fee * 1.2)
-                        production_opt = min(target_budget * 0.2, production_cost * 1.1)
-                    elif priority_mode == "売上成長重視":
-                        # 売上成長を重視する配分
-                        consultant_opt = min(target_budget * 0.5, consultant_fee * 1.5)
-                        production_opt = min(target_budget * 0.3, production_cost * 1.3)
-                    else:  # リスク最小化
-                        # リスクを最小化する安定配分
-                        consultant_opt = target_budget * 0.3
-                        production_opt = target_budget * 0.15
-                    
-                    st.session_state.monthly_costs[f"consultant_{i}"] = int(consultant_opt)
-                    st.session_state.monthly_costs[f"production_{i}"] = int(production_opt)
+                # 現行設定の売上を基準に、期間全体の予算を費目×月へ最適配分
+                # （売上連動の広告費は計算エンジンが必ず計上するため、広告費の下限にする）
+                baseline_revenue = simulate_arrays(months, **simulation_params())["revenue"]
+                reference_costs = {"consultant": consultant_fee, "production": production_cost, "ad_cost": base_ad_cost}
+                # 予算を変えた配分と現在の月別費用を計算エンジンで比べる（現在より悪い配分にはしない）
+                allocation = optimize_schedule(baseline_revenue, reference_costs, budget=target_budget * months,
+                                               priority_mode=priority_mode, elasticities=elasticities,
+                                               ad_cost_ratio=ad_cost_ratio, params=simulation_params())
                 
+                for category in SPEND_CATEGORIES:
+                    st.session_state.cost_schedule.set_column(category, np.trunc(allocation[category]))
+                
+                # 表示する支出は、生成したスケジュールでシミュレーションしたときに実際に計上される額
+                scheduled = simulate_arrays(months, **simulation_params())
+                refresh_cost_editor()
+                st.session_state.schedule_summary = {
+                    "priority_mode": priority_mode,
+                    "budget": int(target_budget * months),
+                    "spend": int(sum(scheduled[c].sum() for c in SPEND_CATEGORIES)),
+                    "uplift": int(allocation["expected_uplift"].sum()),
+                    "profit_change": int(allocation["totals"]["総利益"] - allocation["current_totals"]["総利益"]),
+                }
                 st.success("✅ 最適なスケジュールを生成しました！")
                 st.rerun()
-
-# シミュレーション計算
-def calculate_simulation():
-    results = []
-    
-    for i, month_name in enumerate(month_names):
-        # 売上計算
-        growth_factor = (1 + revenue_growth / 100) ** i
-        monthly_revenue = base_revenue * growth_factor
-        
-        # 季節変動
-        if revenue_seasonal:
-            month_num = (start_date.month + i - 1) % 12 + 1
-            month_str = f"{month_num}月"
-            if month_str in peak_months:
-                monthly_revenue *= peak_multiplier
-        
-        # 月別費用の取得（自動調整モード対応）
-        if st.session_state.auto_mode:
-            # 売上に応じた自動調整
-            revenue_ratio = monthly_revenue / base_revenue if base_revenue > 0 else 1
-            dynamic_multiplier = 0.8 + (revenue_ratio * 0.4)  # 0.8-1.2の範囲で調整
             
-            monthly_consultant = st.session_state.monthly_costs.get(f"consultant_{i}", consultant_fee) * dynamic_multiplier
-            monthly_production = st.session_state.monthly_costs.get(f"production_{i}", production_cost) * dynamic_multiplier
-        else:
-            monthly_consultant = st.session_state.monthly_costs.get(f"consultant_{i}", consultant_fee)
-            monthly_production = st.session_state.monthly_costs.get(f"production_{i}", production_cost)
-        
-        # 費用計算（月別広告費設定を考慮）
-        monthly_ad_cost = st.session_state.monthly_costs.get(f"ad_cost_{i}", base_ad_cost)
-        ad_cost = max(monthly_ad_cost, monthly_revenue * ad_cost_ratio / 100)
-        monthly_total_cost = ad_cost + monthly_consultant + monthly_production + other_fixed_cost
-        
-        # 利益計算
-        profit = monthly_revenue - monthly_total_cost
-        profit_margin = (profit / monthly_revenue * 100) if monthly_revenue > 0 else 0
-        roas = (monthly_revenue / ad_cost * 100) if ad_cost > 0 else 0
-        
-        results.append({
-            "月": month_name,
-            "売上": int(monthly_revenue),
-            "広告費": int(ad_cost),
-            "広告費率": round(ad_cost / monthly_revenue * 100, 1) if monthly_revenue > 0 else 0,
-            "コンサル費": int(monthly_consultant),
-            "制作費": int(monthly_production),
-            "その他": other_fixed_cost,
-            "総費用": int(monthly_total_cost),
-            "利益": int(profit),
-            "利益率": round(profit_margin, 1),
-            "ROAS": round(roas, 0)
-        })
-    
-    return pd.DataFrame(results)
+            if 'schedule_summary' in st.session_state:
+                summary = st.session_state.schedule_summary
+                st.caption(
+                    f"前回の生成（{summary['priority_mode']}）: シミュレーション上の支出 {summary['spend']:,}万円"
+                    f"（予算 {summary['budget']:,}万円） / 推定売上増加 {summary['uplift']:+,}万円"
+                    f" / 生成前と比べた推定利益 {summary['profit_change']:+,}万円"
+                )
+                st.caption("※ 推定値は「売上反応の仮定」の弾力性で、支出に対して売上が逓減的に伸びると仮定した目安です。"
+                           "シミュレーションの売上には反映されません。")
+                if summary["spend"] > summary["budget"]:
+                    st.warning("売上連動の広告費（売上 × 広告費率）や自動調整モードにより、支出が予算を超えています。")
 
-# 結果計算
-df = calculate_simulation()
+# 結果計算（入力が同じなら前回の結果を再利用）
+# シミュレーション結果はセッションごと、そこから決まるグラフ・ファイル等は全セッションで共有してキャッシュ
+result_cache = st.session_state.result_cache
+artifact_cache = shared_cache()
+cache_stats_before = [cache.stats() for cache in (result_cache, artifact_cache)]
+with profiler.span("simulation"):
+    result_key = fingerprint(months, month_names, granularity, simulation_params())
+    df, kpis, suggestions = result_cache.get_or_compute(("simulation", result_key), calculate_simulation)
 
-with tab2:
+# シナリオライブラリ（保存した入力と結果をセッションをまたいで再利用）
+with st.sidebar.expander("💾 シナリオライブラリ"), profiler.span("library"):
+    store = get_store()
+    scenario_client = st.text_input("クライアント名", placeholder="例: 株式会社サンプル")
+    scenario_name = st.text_input("シナリオ名", placeholder="例: 広告強化案")
+    if st.button("現在の設定と結果を保存"):
+        if not scenario_name:
+            st.error("シナリオ名を入力してください")
+        else:
+            store.save(scenario_name, current_inputs(), df, kpis, client=scenario_client,
+                       preset=st.session_state.selected_preset)
+            st.success(f"✅ {scenario_name}を保存しました（同じクライアント・シナリオ名は上書き）")
+    
+    client_filter = st.selectbox("クライアントで絞り込み", ["すべて", *store.clients()])
+    saved_scenarios = store.list(client=None if client_filter == "すべて" else client_filter, limit=200)
+    if saved_scenarios.empty:
+        st.caption("保存済みのシナリオはありません")
+    else:
+        scenario_labels = {
+            scenario_id: f"{client or '（未設定）'} / {name}（{start}〜{period}ヶ月）"
+            for scenario_id, client, name, start, period in zip(
+                saved_scenarios["ID"], saved_scenarios["クライアント"], saved_scenarios["シナリオ名"],
+                saved_scenarios["開始日"], saved_scenarios["期間"])
+        }
+        selected_scenario = st.selectbox("保存済みシナリオ", list(scenario_labels), format_func=scenario_labels.get)
+        st.button("📂 開く", on_click=open_scenario, args=(int(selected_scenario),))
+
+with tab2, profiler.span("tab2"):
     st.header("月別費用設定")
     
     # 自動設定プリセット
     st.subheader("🚀 スマート設定（業界別プリセット）")
     col1, col2, col3 = st.columns([2, 1, 1])
     
+    preset_names = list(PRESETS) + [name for name in st.session_state.custom_presets if name not in PRESETS]
     with col1:
         selected_preset = st.selectbox(
             "業界・ビジネスタイプを選択",
-            options=list(PRESETS.keys()),
-            index=list(PRESETS.keys()).index(st.session_state.selected_preset),
+            options=preset_names,
+            index=preset_names.index(st.session_state.selected_preset),
             help="業界に最適化された季節変動パターンが自動適用されます"
         )
-        st.caption(PRESETS[selected_preset]["description"])
+        st.caption(preset_definition(selected_preset)["description"])
+        preset_drift = st.number_input(
+            "前年比の費用変化率（%）", min_value=-50.0, max_value=100.0,
+            value=float(st.session_state.preset_drift), step=1.0,
+            help="2年目以降は1年ごとにプリセットの倍率をこの割合で増減します"
+        )
     
     with col2:
         if st.button("🎯 プリセット適用", type="primary"):
-            apply_preset_costs(selected_preset, consultant_fee, production_cost, base_ad_cost)
+            apply_preset_costs(selected_preset, consultant_fee, production_cost, base_ad_cost, preset_drift)
+            refresh_cost_editor()
             st.session_state.selected_preset = selected_preset
+            st.session_state.preset_drift = preset_drift
             st.success(f"✅ {selected_preset}のプリセットを適用しました")
             st.rerun()
     
@@ -489,113 +500,137 @@ with tab2:
         if auto_mode:
             st.caption("📈 売上に連動して費用が自動調整されます")
     
-    st.markdown("---")
-    st.info("💡 各月ごとに個別に費用を設定できます。設定しない月はデフォルト値が使用されます")
+    with st.expander("✏️ カスタムプリセットを作成"):
+        base_preset = preset_definition(selected_preset)
+        custom_table = st.data_editor(
+            pd.DataFrame({
+                "月": [f"{m}月" for m in range(1, 13)],
+                "コンサル費倍率": base_preset["consultant_multipliers"],
+                "制作費倍率": base_preset["production_multipliers"],
+                "広告費倍率": base_preset["ad_multipliers"],
+            }),
+            key=f"custom_preset_editor_{selected_preset}",
+            hide_index=True,
+            num_rows="fixed",
+            disabled=["月"],
+            use_container_width=True,
+        )
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            custom_name = st.text_input("プリセット名", placeholder="例: 自社の繁忙期パターン")
+        with col2:
+            st.write("")
+            if st.button("💾 カスタムプリセットを保存"):
+                if not custom_name or custom_name in PRESETS:
+                    st.error("組み込みプリセットと異なる名前を入力してください")
+                else:
+                    st.session_state.custom_presets[custom_name] = {
+                        "description": "カスタムプリセット",
+                        "consultant_multipliers": custom_table["コンサル費倍率"].astype(float).tolist(),
+                        "production_multipliers": custom_table["制作費倍率"].astype(float).tolist(),
+                        "ad_multipliers": custom_table["広告費倍率"].astype(float).tolist(),
+                    }
+                    st.success(f"✅ {custom_name}を保存しました（プリセットの選択肢に追加されます）")
     
-    # 月別費用設定
-    col1, col2, col3 = st.columns(3)
+    st.markdown("---")
+    st.info("💡 表のセルを直接編集できます（スプレッドシートからの複数セル貼り付けにも対応）。設定しない月はデフォルト値が使用されます")
+    
+    # 月別費用設定（月 × 費目の表。変更されたセルだけを月別費用に反映）
+    # 表には計算に使う費用（選択中のプリセットの上に個別設定を重ねたもの）を表示する
+    with profiler.span("cost_editor"):
+        cost_schedule = st.session_state.cost_schedule
+        resolved_costs = current_inputs().resolved_costs()
+        cost_table = pd.DataFrame({
+            "月": month_names,
+            **{label: resolved_costs[:, COST_CATEGORIES.index(category)].astype(int)
+               for label, category in COST_EDITOR_COLUMNS.items()}
+        })
+        editor_key = f"cost_editor_{st.session_state.cost_editor_version}"
+        st.data_editor(
+            cost_table,
+            key=editor_key,
+            on_change=apply_cost_edits,
+            args=(editor_key,),
+            hide_index=True,
+            num_rows="fixed",
+            disabled=["月"],
+            use_container_width=True,
+            column_config={
+                "コンサル費": st.column_config.NumberColumn("コンサル費（万円）", step=10, format="%d"),
+                "制作費": st.column_config.NumberColumn("制作費（万円）", step=5, format="%d"),
+                "広告費": st.column_config.NumberColumn("広告費（万円）", step=10, format="%d"),
+            }
+        )
     
+    # フィルダウン
+    col1, col2, col3 = st.columns([1, 1, 1])
     with col1:
-        st.subheader("コンサル費用")
-        for i, month_name in enumerate(month_names):
-            key = f"consultant_{i}"
-            default_value = st.session_state.monthly_costs.get(key, consultant_fee)
-            value = st.number_input(
-                f"{month_name} コンサル費（万円）", 
-                value=int(default_value), 
-                step=10, 
-                key=key
-            )
-            st.session_state.monthly_costs[key] = value
-    
+        fill_column = st.selectbox("フィルダウンする費目", list(COST_EDITOR_COLUMNS))
     with col2:
-        st.subheader("制作費用")
-        for i, month_name in enumerate(month_names):
-            key = f"production_{i}"
-            default_value = st.session_state.monthly_costs.get(key, production_cost)
-            value = st.number_input(
-                f"{month_name} 制作費（万円）", 
-                value=int(default_value), 
-                step=5, 
-                key=key
-            )
-            st.session_state.monthly_costs[key] = value
-    
+        fill_from = st.selectbox("起点の月", range(months), format_func=lambda i: month_names[i])
     with col3:
-        st.subheader("広告費用")
-        for i, month_name in enumerate(month_names):
-            key = f"ad_cost_{i}"
-            default_value = st.session_state.monthly_costs.get(key, base_ad_cost)
-            value = st.number_input(
-                f"{month_name} 広告費（万円）", 
-                value=int(default_value), 
-                step=10, 
-                key=key
-            )
-            st.session_state.monthly_costs[key] = value
+        st.write("")
+        if st.button("⬇️ 起点の値を以降の月にコピー"):
+            category = COST_EDITOR_COLUMNS[fill_column]
+            cost_schedule.fill_down(category, fill_from, months,
+                                    resolved_costs[fill_from, COST_CATEGORIES.index(category)])
+            refresh_cost_editor()
+            st.rerun()
     
     # プリセット可視化
     if selected_preset != "デフォルト":
         st.subheader("📊 選択中のプリセット変動パターン")
-        preset_data = PRESETS[selected_preset]
-        
-        pattern_df = pd.DataFrame({
-            "月": ["1月", "2月", "3月", "4月", "5月", "6月", "7月", "8月", "9月", "10月", "11月", "12月"],
-            "コンサル費倍率": preset_data["consultant_multipliers"],
-            "制作費倍率": preset_data["production_multipliers"],
-            "広告費倍率": preset_data["ad_multipliers"]
-        })
-        
-        fig_pattern = px.line(pattern_df, x="月", y=["コンサル費倍率", "制作費倍率", "広告費倍率"],
-                             title=f"{selected_preset} - 季節変動パターン",
-                             labels={"value": "倍率", "variable": "費目"})
-        fig_pattern.update_layout(xaxis_tickangle=-45, height=300)
-        st.plotly_chart(fig_pattern, use_container_width=True)
+        with profiler.span("preset_figure"):
+            preset_data = preset_definition(selected_preset)
+            fig_pattern = artifact_cache.get_or_compute(
+                ("preset_figure", fingerprint(selected_preset, preset_data)),
+                lambda: build_preset_figure(selected_preset, preset_data)
+            )
+            st.plotly_chart(fig_pattern, use_container_width=True)
     
     # 一括設定ボタン
     st.subheader("一括設定")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        if st.button("全てをデフォルト値にリセット"):
-            for i in range(months):
-                st.session_state.monthly_costs[f"consultant_{i}"] = consultant_fee
-                st.session_state.monthly_costs[f"production_{i}"] = production_cost
-                st.session_state.monthly_costs[f"ad_cost_{i}"] = base_ad_cost
+        if st.button("全てをデフォルト値にリセット", help="月別の個別設定と適用中のプリセットを解除します"):
+            cost_schedule.clear()
+            st.session_state.selected_preset = "デフォルト"
+            st.session_state.preset_drift = 0.0
+            refresh_cost_editor()
             st.rerun()
     
     with col2:
         bulk_consultant = st.number_input("一括コンサル費設定", value=60, step=10)
         if st.button("全月にコンサル費適用"):
-            for i in range(months):
-                st.session_state.monthly_costs[f"consultant_{i}"] = bulk_consultant
+            cost_schedule.set_all("consultant", bulk_consultant, months)
+            refresh_cost_editor()
             st.rerun()
     
     with col3:
         bulk_production = st.number_input("一括制作費設定", value=30, step=5)
         if st.button("全月に制作費適用"):
-            for i in range(months):
-                st.session_state.monthly_costs[f"production_{i}"] = bulk_production
+            cost_schedule.set_all("production", bulk_production, months)
+            refresh_cost_editor()
             st.rerun()
     
     with col4:
         bulk_ad_cost = st.number_input("一括広告費設定", value=150, step=10)
         if st.button("全月に広告費適用"):
-            for i in range(months):
-                st.session_state.monthly_costs[f"ad_cost_{i}"] = bulk_ad_cost
+            cost_schedule.set_all("ad_cost", bulk_ad_cost, months)
+            refresh_cost_editor()
             st.rerun()
 
-with tab3:
+with tab3, profiler.span("tab3"):
     st.header("シミュレーション結果")
     
     # KPI表示
     col1, col2, col3, col4 = st.columns(4)
     
-    total_revenue = df["売上"].sum()
-    total_cost = df["総費用"].sum()
-    total_profit = df["利益"].sum()
-    total_ad_cost = df["広告費"].sum()
-    overall_roas = (total_revenue / total_ad_cost * 100) if total_ad_cost > 0 else 0
+    total_revenue = kpis["総売上"]
+    total_cost = kpis["総費用"]
+    total_profit = kpis["総利益"]
+    overall_roas = kpis["全体ROAS"]
     
     with col1:
         st.metric("総売上", f"{total_revenue:,}万円")
@@ -607,44 +642,29 @@ with tab3:
         st.metric("全体ROAS", f"{overall_roas:.0f}%", help="全期間の総売上÷総広告費×100")
     
     # グラフ表示
-    col1, col2 = st.columns(2)
+    with profiler.span("figures"):
+        fig_revenue, fig_roas, fig_ad_ratio, fig_scatter = artifact_cache.get_or_compute(
+            ("figures", result_key), lambda: build_result_figures(df, ad_cost_ratio)
+        )
+        col1, col2 = st.columns(2)
     
-    with col1:
-        fig_revenue = px.line(df, x="月", y=["売上", "総費用", "利益"], 
-                             title="売上・費用・利益推移",
-                             color_discrete_map={"売上": "blue", "総費用": "red", "利益": "green"})
-        fig_revenue.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig_revenue, use_container_width=True)
+        with col1:
+            st.plotly_chart(fig_revenue, use_container_width=True)
     
-    with col2:
-        fig_roas = px.bar(df, x="月", y="ROAS", title="ROAS推移（売上÷広告費×100）")
-        fig_roas.update_layout(xaxis_tickangle=-45)
-        fig_roas.add_hline(y=100, line_dash="dash", line_color="red", 
-                          annotation_text="損益分岐点(100%)")
-        st.plotly_chart(fig_roas, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig_roas, use_container_width=True)
     
-    # 追加のグラフ：広告費率とROASの関係
-    col3, col4 = st.columns(2)
+        # 追加のグラフ：広告費率とROASの関係
+        col3, col4 = st.columns(2)
     
-    with col3:
-        fig_ad_ratio = px.bar(df, x="月", y="広告費率", title="広告費率推移（広告費÷売上×100）")
-        fig_ad_ratio.update_layout(xaxis_tickangle=-45)
-        fig_ad_ratio.add_hline(y=ad_cost_ratio, line_dash="dash", line_color="green", 
-                              annotation_text=f"目標広告費率({ad_cost_ratio}%)")
-        st.plotly_chart(fig_ad_ratio, use_container_width=True)
+        with col3:
+            st.plotly_chart(fig_ad_ratio, use_container_width=True)
     
-    with col4:
-        # 散布図で広告費率とROASの相関を表示
-        fig_scatter = px.scatter(df, x="広告費率", y="ROAS", 
-                               title="広告費率とROASの相関",
-                               text="月", size="売上")
-        fig_scatter.update_traces(textposition='top center')
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        with col4:
+            st.plotly_chart(fig_scatter, use_container_width=True)
     
     # AI最適化提案
     st.subheader("🤖 AI最適化提案")
-    suggestions = calculate_optimization_suggestions(df)
-    
     if suggestions:
         for suggestion in suggestions:
             if suggestion["type"] == "警告":
@@ -659,48 +679,260 @@ with tab3:
     # データテーブル
     st.subheader("詳細データ")
     st.dataframe(df, use_container_width=True)
+    
+    # シナリオ比較（ピン留めしたシナリオと現在の設定を一括計算して差分を表示）
+    st.subheader("🆚 シナリオ比較")
+    with profiler.span("comparison"):
+        pinned = st.session_state.pinned_scenarios
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            pin_name = st.text_input("ピン留めする名前", value=f"シナリオ{len(pinned) + 1}")
+            if st.button("📌 現在の設定をピン留め"):
+                pinned[pin_name] = current_inputs()
+        with col2:
+            compare_presets = st.multiselect("プリセット違いを追加", preset_names)
+            compare_ratios = st.text_input("広告費率違いを追加（%、カンマ区切り）", placeholder="例: 20, 40")
+            if st.button("➕ 比較に追加"):
+                for preset_name in compare_presets:
+                    pinned[preset_name] = replace(
+                        current_inputs(), preset=preset_definition(preset_name, st.session_state.preset_drift))
+                try:
+                    for ratio in filter(None, (r.strip() for r in compare_ratios.split(","))):
+                        pinned[f"広告費率{float(ratio):g}%"] = replace(current_inputs(), ad_cost_ratio=float(ratio))
+                except ValueError:
+                    st.error("広告費率は数値をカンマ区切りで入力してください")
+        with col3:
+            st.write("")
+            if st.button("🗑️ ピン留めをクリア"):
+                pinned.clear()
+        
+        # 期間・開始日が現在の設定と同じシナリオだけを比較する
+        comparable = {name: inputs for name, inputs in pinned.items()
+                      if (inputs.months, inputs.start_date) == (months, start_date)}
+        if len(comparable) < len(pinned):
+            st.warning(f"期間・開始日が現在の設定と異なるため比較できないシナリオがあります: "
+                       f"{', '.join(name for name in pinned if name not in comparable)}")
+        if comparable:
+            scenarios = {"現在の設定": current_inputs(), **comparable}
+            comparison_key = fingerprint(scenarios)
+            comparison = artifact_cache.get_or_compute(("comparison", comparison_key),
+                                                       lambda: compare_scenarios(scenarios, baseline="現在の設定"))
+            st.dataframe(comparison_totals(comparison), hide_index=True, use_container_width=True, column_config={
+                "全体ROAS": st.column_config.NumberColumn(format="%.0f%%"),
+                "全体ROAS差分": st.column_config.NumberColumn(format="%+.1f%%"),
+                "総売上差分": st.column_config.NumberColumn(format="%+d"),
+                "総利益差分": st.column_config.NumberColumn(format="%+d"),
+            })
+            compare_metric = st.radio("比較する指標", list(COMPARISON_METRICS), horizontal=True)
+            fig_compare = artifact_cache.get_or_compute(("comparison_figure", comparison_key, compare_metric),
+                                                        lambda: build_comparison_figure(comparison, compare_metric))
+            st.plotly_chart(fig_compare, use_container_width=True)
+            st.caption("月別の差分（各シナリオ − 現在の設定）")
+            st.dataframe(comparison_frame(comparison, compare_metric, deltas=True), hide_index=True,
+                         use_container_width=True)
+        else:
+            st.caption("現在の設定をピン留めするか、プリセット・広告費率の違うシナリオを追加すると、現在の設定と並べて比較できます")
+    
+    # 目標からの逆算（目標の指標を満たす入力値を一括計算で探索）
+    st.subheader("🎯 目標からの逆算")
+    with profiler.span("goal_seek"):
+        if st.toggle("目標の指標から必要な入力値を求める",
+                     help="スライダーを動かして試す代わりに、目標を満たす入力値を計算します"):
+            # 目標値の初期値（指標ごと）
+            goal_defaults = {"総利益": 5000.0, "総売上": 10000.0, "全体ROAS": 400.0, "全体利益率": 50.0,
+                             "利益": 300.0, "売上": 800.0, "ROAS": 400.0, "利益率": 50.0}
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                goal_per_month = st.radio("対象", ["全期間", "月ごと"], horizontal=True) == "月ごと"
+                goal_at_most = st.radio("条件", ["以上", "以下"], horizontal=True) == "以下"
+            with col2:
+                goal_metric = st.selectbox("目標の指標", list(MONTHLY_GOAL_METRICS if goal_per_month else GOAL_METRICS))
+            with col3:
+                goal_target = st.number_input("目標値（金額は万円、率は%）", value=goal_defaults[goal_metric],
+                                              key=f"goal_target_{goal_metric}")
+            with col4:
+                goal_variable = st.selectbox("求める入力", list(GOAL_VARIABLES),
+                                             format_func=lambda name: GOAL_VARIABLES[name]["label"])
+            
+            goal_key = fingerprint(result_key, goal_metric, goal_target, goal_variable, goal_per_month, goal_at_most)
+            goal = artifact_cache.get_or_compute(("goal_seek", goal_key), lambda: goal_seek(
+                months, goal_metric, goal_target, goal_variable, simulation_params(),
+                per_month=goal_per_month, at_most=goal_at_most))
+            goal_label = GOAL_VARIABLES[goal_variable]["label"]
+            low, high = GOAL_VARIABLES[goal_variable]["bounds"]
+            if goal_per_month:
+                st.dataframe(pd.DataFrame({"月": month_names, goal_label: np.round(goal["value"], 2),
+                                           goal_metric: np.round(goal["achieved"], 1)}),
+                             hide_index=True, use_container_width=True)
+                st.caption(f"空欄の月は{goal_label}を{low:,g}〜{high:,g}の範囲で変えても目標に届きません。"
+                           "費目はその月の金額を求めます")
+            elif goal["reachable"]:
+                st.success(f"{goal_label}を **{goal['value']:,.2f}** にすると、{goal_metric}は "
+                           f"{goal['achieved']:,.1f} になります（{goal['iterations']}回の反復で計算）")
+            else:
+                st.warning(f"{goal_label}を{low:,g}〜{high:,g}の範囲で変えても、{goal_metric}は目標に届きません")
+    
+    # 感度分析（全入力を ±step 動かしたシナリオを一括計算）
+    st.subheader("🌪️ 感度分析")
+    with profiler.span("sensitivity"):
+        if st.toggle("どの入力が指標に最も影響するかを調べる",
+                     help="各入力を基準値から増減させたシナリオをまとめて計算し、指標の変化をトルネードチャートで比較します"):
+            col1, col2 = st.columns(2)
+            with col1:
+                sensitivity_metric = st.selectbox("評価する指標", list(GOAL_METRICS), key="sensitivity_metric")
+            with col2:
+                sensitivity_step = st.slider("入力の増減幅（%）", 1, 50, 10, key="sensitivity_step")
+            
+            sensitivity_key = fingerprint(result_key, sensitivity_metric, sensitivity_step)
+            sensitivity_result = artifact_cache.get_or_compute(("sensitivity", sensitivity_key), lambda: run_sensitivity(
+                months, simulation_params(), metric=sensitivity_metric, step=sensitivity_step / 100))
+            fig_tornado = artifact_cache.get_or_compute(("sensitivity_figure", sensitivity_key),
+                                                        lambda: build_tornado_figure(sensitivity_result))
+            st.plotly_chart(fig_tornado, use_container_width=True)
+            st.dataframe(tornado_frame(sensitivity_result), hide_index=True, use_container_width=True,
+                         column_config={
+                             "減少時": st.column_config.NumberColumn(format="%.1f"),
+                             "増加時": st.column_config.NumberColumn(format="%.1f"),
+                             "変化幅": st.column_config.NumberColumn(format="%.1f"),
+                             "弾力性": st.column_config.NumberColumn(format="%+.2f"),
+                         })
+            st.caption("弾力性は入力を1%増やしたときの指標の変化率（%）です。費用の項目はプリセット倍率・個別設定を含む"
+                       "月別費用を同じ比率で増減し、プリセット倍率は季節変動の強さ（倍率と1の差）を増減します")
+    
+    # シナリオスイープ
+    st.subheader("🔥 シナリオスイープ")
+    with profiler.span("sweep"):
+        if st.toggle("パラメータの組み合わせを一括評価", help="2つのパラメータの範囲を全組み合わせで計算し、ヒートマップで比較します"):
+            sweep_labels = {
+                "revenue_growth": "月次成長率（%）",
+                "ad_cost_ratio": "売上に対する広告費率（%）",
+                "base_revenue": "初月売上（万円）",
+                "other_fixed_cost": "その他固定費（万円）",
+            }
+            sweep_defaults = {
+                "revenue_growth": (2.0, 10.0),
+                "ad_cost_ratio": (15.0, 45.0),
+                "base_revenue": (300.0, 800.0),
+                "other_fixed_cost": (0.0, 50.0),
+            }
+        
+            col1, col2, col3 = st.columns(3)
+            axis_settings = []
+            for col, axis_name, default_index in [(col1, "横軸", 0), (col2, "縦軸", 1)]:
+                with col:
+                    param = st.selectbox(f"{axis_name}パラメータ", list(sweep_labels),
+                                         index=default_index, format_func=sweep_labels.get,
+                                         key=f"sweep_param_{axis_name}")
+                    low, high = sweep_defaults[param]
+                    low = st.number_input(f"{axis_name} 最小値", value=low, key=f"sweep_low_{axis_name}")
+                    high = st.number_input(f"{axis_name} 最大値", value=high, key=f"sweep_high_{axis_name}")
+                    steps = st.slider(f"{axis_name} 分割数", 2, 100, 21, key=f"sweep_steps_{axis_name}")
+                    axis_settings.append((param, np.linspace(low, high, steps)))
+            with col3:
+                sweep_metric = st.selectbox("評価指標", ["総利益", "全体ROAS", "総売上", "総費用"])
+        
+            (x_param, x_values), (y_param, y_values) = axis_settings
+            if x_param == y_param:
+                st.warning("横軸と縦軸には異なるパラメータを選択してください")
+            else:
+                sweep_key = fingerprint(result_key, x_param, x_values, y_param, y_values)
+            
+                def compute_sweep():
+                    result = run_sweep(months, {y_param: y_values, x_param: x_values},
+                                       **{k: v for k, v in simulation_params().items() if k not in (x_param, y_param)})
+                    # 全シナリオに改善提案のルールを一括適用
+                    return result, suggestion_flags(frame_columns(result["result"]))
+            
+                sweep_result, sweep_flags = artifact_cache.get_or_compute(("sweep", sweep_key), compute_sweep)
+                fig_sweep = artifact_cache.get_or_compute(
+                    ("sweep_figure", sweep_key, sweep_metric),
+                    lambda: build_sweep_figure(sweep_result, sweep_metric, x_values, y_values,
+                                               sweep_labels[x_param], sweep_labels[y_param])
+                )
+                st.plotly_chart(fig_sweep, use_container_width=True)
+            
+                scenario_count = len(x_values) * len(y_values)
+                st.dataframe(pd.DataFrame({
+                    "改善提案": [SUGGESTION_RULES[name]["title"] for name in sweep_flags],
+                    "該当シナリオ数": [int(flags.sum()) for flags in sweep_flags.values()],
+                    "該当割合": [f"{flags.mean() * 100:.1f}%" for flags in sweep_flags.values()],
+                }), hide_index=True, use_container_width=True)
+                st.caption(f"{scenario_count:,}通りのシナリオそれぞれに、結果表示と同じ改善提案のルールを適用した件数です")
+    
+    # モンテカルロによるリスク分析
+    st.subheader("🎲 リスク分析（モンテカルロ）")
+    with profiler.span("montecarlo"):
+        if st.toggle("確率的シミュレーションを実行", help="成長率・ピーク倍率・広告効率のばらつきを考慮して多数のパスを計算します"):
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                mc_paths = st.selectbox("試行回数", [10000, 50000, 100000], format_func=lambda n: f"{n:,}回")
+            with col2:
+                growth_sd = st.slider("成長率のばらつき（%pt）", 0.0, 10.0, 2.0, 0.5)
+            with col3:
+                peak_sd = st.slider("ピーク倍率のばらつき", 0.0, 1.0, 0.2, 0.05)
+            with col4:
+                ad_efficiency_sd = st.slider("広告効率のばらつき", 0.0, 0.5, 0.1, 0.01)
+            with col5:
+                mc_seed = st.number_input("乱数シード", value=42, step=1, help="同じシードで同じ結果を再現できます")
+        
+            mc_key = fingerprint(result_key, mc_paths, growth_sd, peak_sd, ad_efficiency_sd, int(mc_seed))
+            mc_result = artifact_cache.get_or_compute(("montecarlo", mc_key), lambda: monte_carlo(
+                months, paths=mc_paths, growth_sd=growth_sd, peak_sd=peak_sd,
+                ad_efficiency_sd=ad_efficiency_sd, seed=int(mc_seed), **simulation_params()
+            ))
+        
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("総利益 P50", f"{np.percentile(mc_result['total_profit'], 50):,.0f}万円")
+            with col2:
+                st.metric("総利益 P5", f"{np.percentile(mc_result['total_profit'], 5):,.0f}万円")
+            with col3:
+                st.metric("期間通算の赤字確率", f"{mc_result['total_loss_probability'] * 100:.1f}%")
+        
+            mc_metric = st.radio("表示指標", ["売上", "利益", "ROAS"], horizontal=True)
+            fig_fan, fig_loss = artifact_cache.get_or_compute(
+                ("montecarlo_figures", mc_key, mc_metric),
+                lambda: build_band_figures(band_frame(mc_result, month_names, mc_metric), mc_metric, mc_paths)
+            )
+        
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_fan, use_container_width=True)
+            with col2:
+                st.plotly_chart(fig_loss, use_container_width=True)
 
-with tab4:
+with tab4, profiler.span("tab4"):
     st.header("エクスポート")
+    st.caption("ファイルは作成ボタンを押したときだけ生成され、同じ結果に対しては再利用されます")
+    
+    def export_download(label, build, extension, mime):
+        """押下時にだけファイルを生成し、結果のフィンガープリントごとにキャッシュする"""
+        requested = st.session_state.export_requests.get(extension) == result_key
+        if not requested and st.button(f"📄 {label}ファイルを作成", key=f"prepare_{extension}"):
+            st.session_state.export_requests[extension] = result_key
+            requested = True
+        if requested:
+            with profiler.span(f"export_{extension}"):
+                data = artifact_cache.get_or_compute((extension, result_key), lambda: build(df))
+            st.download_button(
+                label=f"📥 {label}ファイルをダウンロード",
+                data=data,
+                file_name=f"simulation_{datetime.now().strftime('%Y%m%d')}.{extension}",
+                mime=mime
+            )
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Excel出力")
-        
-        def to_excel(simulation_df):
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                simulation_df.to_excel(writer, sheet_name='シミュレーション結果', index=False)
-                
-                workbook = writer.book
-                worksheet = writer.sheets['シミュレーション結果']
-                
-                # 列幅調整
-                worksheet.set_column('A:A', 12)
-                worksheet.set_column('B:J', 10)
-                
-            return output.getvalue()
-        
-        excel_data = to_excel(df)
-        st.download_button(
-            label="📥 Excelファイルをダウンロード",
-            data=excel_data,
-            file_name=f"simulation_{datetime.now().strftime('%Y%m%d')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+        export_download("Excel", to_excel, "xlsx",
+                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
     
     with col2:
         st.subheader("CSV出力")
-        csv = df.to_csv(index=False, encoding='utf-8-sig')
-        st.download_button(
-            label="📥 CSVファイルをダウンロード",
-            data=csv,
-            file_name=f"simulation_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+        export_download("CSV", to_csv, "csv", "text/csv")
 
-with tab5:
+with tab5, profiler.span("tab5"):
     st.header("🤖 AI最適化")
     
     st.info("💡 AIを活用して、シミュレーション結果を分析し、最適な施策を提案します。")
@@ -730,18 +962,55 @@ with tab5:
         if st.session_state.api_key_available:
             ai_model = st.selectbox(
                 "AIモデル",
-                ["GPT-4", "GPT-3.5-Turbo"],
+                list(AI_MODELS),
                 index=1,
                 help="使用するAIモデルを選択"
             )
+            with st.expander("送信量の設定"):
+                prompt_budget = st.number_input("プロンプトの上限（トークン）", min_value=300, max_value=8000,
+                                                value=DEFAULT_PROMPT_BUDGET, step=100,
+                                                help="上限に収まるよう、月別の推移を区間ごとに集約して送信します")
+                max_tokens = st.number_input("回答の上限（トークン）", min_value=200, max_value=4000,
+                                             value=1500, step=100)
+                with profiler.span("prompt_estimate"):
+                    prompt = build_prompt(df, business_goal, prompt_budget, granularity)
+                    st.caption(f"送信するプロンプト: 約{estimate_tokens(prompt):,}トークン")
         else:
             st.info("ルールベース分析のみ利用可能")
         
-        if st.button(f"🧠 {ai_status}実行", type="primary"):
-            with st.spinner(f"{ai_status}中..."):
-                # AI最適化実行
-                optimizations = ai_optimize_simulation(df, business_goal)
-                st.session_state.ai_optimizations = optimizations
+        if st.button(f"🧠 {ai_status}実行", type="primary", disabled=st.session_state.ai_request is not None):
+            if st.session_state.api_key_available:
+                # AI最適化はバックグラウンドで実行し、完了を待たずに画面を返す
+                st.session_state.ai_request = {
+                    "future": get_ai_client().submit(df, business_goal, model=ai_model, max_tokens=max_tokens,
+                                                     prompt_budget=prompt_budget, data_key=result_key,
+                                                     granularity=granularity),
+                    "df": df,
+                    "goal": business_goal,
+                }
+                st.session_state.ai_error = None
+            else:
+                st.session_state.ai_optimizations = rule_based_optimization(df, business_goal)
+    
+    @st.fragment(run_every="1s")
+    def poll_ai_request():
+        """AI分析の完了を待ち、完了したら結果を反映して再描画する"""
+        request = st.session_state.ai_request
+        if not request["future"].done():
+            st.info("⏳ AI分析中です。完了すると結果が表示されます（待っている間も他の操作ができます）")
+            return
+        st.session_state.ai_request = None
+        try:
+            st.session_state.ai_optimizations = request["future"].result()
+        except Exception as e:
+            st.session_state.ai_error = f"AI API呼び出しエラー: {str(e)}"
+            st.session_state.ai_optimizations = rule_based_optimization(request["df"], request["goal"])
+        st.rerun()
+    
+    if st.session_state.ai_request is not None:
+        poll_ai_request()
+    if st.session_state.ai_error:
+        st.error(st.session_state.ai_error)
     
     # 分析結果表示
     if 'ai_optimizations' in st.session_state and st.session_state.ai_optimizations:
@@ -824,9 +1093,50 @@ echo "OPENAI_API_KEY=your_api_key_here" > .env
 OPENAI_API_KEY = "your_api_key_here"
         """, language="bash")
 
+# デバッグ情報
+with st.sidebar.expander("🔧 キャッシュ状況"):
+    for cache_label, cache in [("計算結果（このセッション）", result_cache), ("グラフ・ファイル（全セッション共有）", artifact_cache)]:
+        cache_stats = cache.stats()
+        st.write(f"**{cache_label}**")
+        st.write(f"ヒット: {cache_stats['hits']:,}回 / ミス: {cache_stats['misses']:,}回（ヒット率 {cache_stats['hit_rate'] * 100:.0f}%）")
+        st.write(f"保持件数: {cache_stats['size']} / {cache_stats['maxsize']}")
+        if cache_stats["max_bytes"] is not None:
+            st.write(f"使用量: {cache_stats['bytes'] / 1024 ** 2:,.1f}MB / {cache_stats['max_bytes'] / 1024 ** 2:,.0f}MB")
+    if st.button("キャッシュをクリア"):
+        result_cache.clear()
+        artifact_cache.clear()
+        st.rerun()
+
 # フッター
 st.markdown("---")
 st.markdown("💡 **使い方**: 左側で設定を変更し、リアルタイムで結果を確認できます")
 
+# 再実行ごとのキャッシュ利用状況と処理時間の記録
+for cache, before in zip((result_cache, artifact_cache), cache_stats_before):
+    cache_stats = cache.stats()
+    profiler.count("cache_hits", cache_stats["hits"] - before["hits"])
+    profiler.count("cache_misses", cache_stats["misses"] - before["misses"])
+
+if st.sidebar.toggle("⏱️ 処理時間を表示（開発者向け）", value=bool(os.getenv("SIMULATOR_DEV"))):
+    with st.sidebar.expander("⏱️ 今回の再実行の内訳", expanded=True):
+        spans = profiler.summary()
+        st.dataframe(pd.DataFrame({
+            "処理": ["\u3000" * row["depth"] + row["name"] for row in spans],
+            "時間（ms）": [row["ms"] for row in spans],
+            "割合": [row["share"] * 100 for row in spans],
+        }), hide_index=True, use_container_width=True, column_config={
+            "時間（ms）": st.column_config.NumberColumn(format="%.1f"),
+            "割合": st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=100),
+        })
+        st.caption(f"合計 {profiler.elapsed() * 1000:,.0f}ms / キャッシュ ヒット {profiler.counters['cache_hits']}回・"
+                   f"ミス {profiler.counters['cache_misses']}回")
+        metrics = get_metrics().snapshot()
+        for name, label in [("rerun_ms", "再実行"), ("ai_latency_ms", "AI応答")]:
+            if metrics.get(name, {}).get("count"):
+                stats = metrics[name]
+                st.caption(f"{label}（直近{stats['count']}回）: p50 {stats['p50']:,.0f}ms / p95 {stats['p95']:,.0f}ms")
+
+log_metrics(profiler, get_metrics())
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""エクスポートとAIプロンプト作成のベンチマーク"""
+
+import pytest
+
+from simulator import build_prompt, estimate_tokens, to_csv, to_excel
+
+
+@pytest.mark.benchmark(group="Excel出力")
+def test_to_excel(benchmark, result_df):
+    benchmark(to_excel, result_df)
+
+
+@pytest.mark.benchmark(group="CSV出力")
+def test_to_csv(benchmark, result_df):
+    benchmark(to_csv, result_df)
+
+
+@pytest.mark.benchmark(group="AIプロンプト作成")
+def test_build_prompt(benchmark, result_df):
+    prompt = benchmark(build_prompt, result_df, "利益最大化")
+    assert estimate_tokens(prompt) <= 1200
@@ -0,0 +1,60 @@
+"""シミュレーション計算のベンチマーク"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from simulator import (IncrementalSimulation, optimize_schedule, preset_costs, run_simulation, run_sweep,
+                       simulate_arrays)
+
+
+@pytest.mark.benchmark(group="シミュレーション")
+def test_run_simulation(benchmark, inputs):
+    df = benchmark(run_simulation, inputs)
+    assert len(df) == inputs.months
+
+
+@pytest.mark.benchmark(group="差分再計算（1セル編集）")
+def test_incremental_cell_edit(benchmark, inputs):
+    incremental = IncrementalSimulation(inputs)
+    edited = inputs.monthly_costs.copy()
+    values = iter(range(10**9))
+
+    def edit_one_cell():
+        edited.set("ad_cost", inputs.months // 2, 200 + next(values) % 100)
+        incremental.update(replace(inputs, monthly_costs=edited))
+        return incremental.totals()
+
+    benchmark(edit_one_cell)
+
+
+@pytest.mark.benchmark(group="プリセット適用")
+def test_preset_costs(benchmark, months):
+    schedule = benchmark(preset_costs, "EC・小売業", months, 4, 60, 30, 150)
+    assert schedule.months == months
+
+
+@pytest.mark.benchmark(group="シナリオ一括計算（12か月）")
+def test_batch_scenarios(benchmark, batch_grid):
+    result = benchmark(run_sweep, 12, batch_grid, base_revenue=300, base_ad_cost=150, consultant_fee=60,
+                       production_cost=30, other_fixed_cost=20, start_month=4)
+    assert result["result"]["profit"].shape[1] == 12
+
+
+@pytest.mark.benchmark(group="シナリオ一括計算（100×100、36か月）")
+def test_sweep_grid_36_months(benchmark):
+    grid = {"revenue_growth": np.linspace(2, 10, 100), "ad_cost_ratio": np.linspace(15, 45, 100)}
+    result = benchmark(run_sweep, 36, grid, base_revenue=500, base_ad_cost=150, consultant_fee=60,
+                       production_cost=30, other_fixed_cost=20, start_month=4)
+    assert result["result"]["profit"].shape == (10000, 36)
+
+
+@pytest.mark.benchmark(group="予算配分最適化")
+@pytest.mark.parametrize("priority_mode", ["利益最大化", "売上成長重視", "リスク最小化"])
+def test_optimize_schedule(benchmark, inputs, priority_mode):
+    revenue = simulate_arrays(inputs.months, **inputs.engine_params())["revenue"]
+    reference_costs = {"consultant": 60, "production": 30, "ad_cost": 150}
+    schedule = benchmark(optimize_schedule, revenue, reference_costs, 500 * inputs.months, priority_mode,
+                         ad_cost_ratio=inputs.ad_cost_ratio)
+    assert schedule["ad_cost"].shape == (inputs.months,)
@@ -0,0 +1,33 @@
+"""シナリオライブラリ（SQLite）のベンチマーク"""
+
+from datetime import date
+
+import pytest
+
+from simulator import ScenarioStore, SimulationInputs, run_simulation
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    """36か月のシナリオを300件（30クライアント）保存したライブラリ"""
+    store = ScenarioStore(tmp_path_factory.mktemp("store") / "scenarios.db")
+    inputs = SimulationInputs(start_date=date(2025, 4, 1), months=36, preset="EC・小売業", peak_months=(7, 12))
+    df = run_simulation(inputs)
+    for i in range(300):
+        store.save(f"案{i}", inputs, df, client=f"クライアント{i % 30}")
+    yield store
+    store.close()
+
+
+@pytest.mark.benchmark(group="シナリオ一覧（300件）")
+@pytest.mark.parametrize("client", [None, "クライアント3"], ids=["全件", "クライアント指定"])
+def test_list(benchmark, store, client):
+    listing = benchmark(store.list, client=client)
+    assert len(listing) == (300 if client is None else 10)
+
+
+@pytest.mark.benchmark(group="シナリオ読み込み")
+def test_load(benchmark, store):
+    scenario_id = int(store.list(limit=1)["ID"][0])
+    saved = benchmark(store.load, scenario_id)
+    assert len(saved.frame) == 36
@@ -0,0 +1,26 @@
+"""改善提案ルールのベンチマーク"""
+
+import pytest
+
+from simulator import (calculate_optimization_suggestions, frame_columns, rule_based_optimization,
+                       run_sweep, suggestion_flags)
+
+
+@pytest.mark.benchmark(group="改善提案")
+def test_calculate_optimization_suggestions(benchmark, result_df):
+    benchmark(calculate_optimization_suggestions, result_df)
+
+
+@pytest.mark.benchmark(group="ルールベース最適化")
+@pytest.mark.parametrize("business_goals", ["利益最大化", "売上成長重視", "リスク最小化"])
+def test_rule_based_optimization(benchmark, result_df, business_goals):
+    benchmark(rule_based_optimization, result_df, business_goals)
+
+
+@pytest.mark.benchmark(group="改善提案の一括判定（12か月）")
+def test_suggestion_flags_batch(benchmark, batch_grid):
+    result = run_sweep(12, batch_grid, base_revenue=300, base_ad_cost=150, consultant_fee=60,
+                       production_cost=30, other_fixed_cost=20, start_month=4)
+    columns = frame_columns(result["result"])
+    flags = benchmark(suggestion_flags, columns)
+    assert flags["loss"].shape == result["result"]["profit"].shape[:1]
@@ -0,0 +1,84 @@
+"""ベンチマーク共通のデータ
+
+期間は 12 / 36 / 120 / 1200 か月、シナリオ数は 1 / 1,000 / 100,000 件を対象にする。
+"""
+
+import os
+import socket
+import warnings
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+from simulator import SimulationInputs, run_simulation
+
+HORIZONS = [12, 36, 120, 1200]
+BATCH_SIZES = [1, 1_000, 100_000]
+
+# 赤字月・ROASの低い月などが混ざるよう、季節変動とプリセットを入れた設定
+BASE_SCENARIO = {
+    "start_date": date(2025, 4, 1),
+    "base_revenue": 300,
+    "revenue_growth": 1.0,
+    "peak_months": (7, 12),
+    "peak_multiplier": 1.8,
+    "preset": "EC・小売業",
+}
+
+
+# 1 にすると、同じマシンで保存した最新の結果と比べて遅くなったベンチマークを失敗にする（CI 用）
+COMPARE_ENV = "SIMULATOR_BENCHMARK_COMPARE"
+# 比較の基準。最小値はほかの処理の割り込みなどのノイズを受けにくい
+COMPARE_FAIL = "min:30%"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """結果の保存先をマシン（ホスト名）ごとに分け、比較は COMPARE_ENV を指定したときだけ行う
+
+    計測時間はマシンに依存するため、基準はリポジトリに含めず、比較する環境で先に保存する。
+    """
+    storage = Path(__file__).parent / ".benchmarks" / socket.gethostname()
+    if config.option.benchmark_storage == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{storage}"
+    if os.getenv(COMPARE_ENV) != "1":
+        return
+    if not any(storage.glob("*/*.json")):
+        warnings.warn(f"{storage} に保存済みの結果がないため比較しません（--benchmark-save で基準を保存してください）")
+        return
+    config.option.benchmark_compare = config.option.benchmark_compare or True
+    config.option.benchmark_compare_fail = config.option.benchmark_compare_fail or [parse_compare_fail(COMPARE_FAIL)]
+
+
+def make_inputs(months, **overrides):
+    return SimulationInputs(months=months, **{**BASE_SCENARIO, **overrides})
+
+
+@pytest.fixture(params=HORIZONS, ids=lambda months: f"{months}か月")
+def months(request):
+    return request.param
+
+
+@pytest.fixture
+def inputs(months):
+    return make_inputs(months)
+
+
+@pytest.fixture
+def result_df(inputs):
+    return run_simulation(inputs)
+
+
+@pytest.fixture(params=BATCH_SIZES, ids=lambda size: f"{size}件")
+def batch_grid(request):
+    """シナリオ数が指定件数になる成長率 × 広告費率のグリッド"""
+    size = request.param
+    growth_steps = int(np.sqrt(size))
+    ratio_steps = size // growth_steps
+    return {
+        "revenue_growth": np.linspace(-5.0, 10.0, growth_steps),
+        "ad_cost_ratio": np.linspace(10.0, 60.0, ratio_steps),
+    }
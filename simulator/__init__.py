@@ -0,0 +1,102 @@
+"""コンサル向けシミュレーションの計算ライブラリ
+
+Streamlitに依存しない計算処理をまとめたパッケージ。app.py はこの上のUI層として動作する。
+"""
+
+from .ai import AI_MODELS, AIClient, sample_optimizations
+from .batch import load_scenarios, run_batch
+from .cache import LRUCache, fingerprint
+from .columnar import ResultWriter, read_results, stored_month_names
+from .compare import COMPARISON_METRICS, compare_scenarios, comparison_frame, comparison_totals
+from .downsample import downsample, lttb_indices
+from .engine import (RESULT_COLUMNS, calendar_months, frame_columns, kpi_totals, month_labels, simulate,
+                     simulate_arrays, to_frame)
+from .export import to_csv, to_excel
+from .goalseek import GOAL_METRICS, GOAL_VARIABLES, MONTHLY_GOAL_METRICS, goal_seek
+from .incremental import IncrementalSimulation
+from .inputs import SimulationInputs, run_simulation, simulation_totals
+from .instrumentation import MetricsRegistry, Profiler, configure_logging, log_metrics
+from .montecarlo import band_frame, monte_carlo
+from .optimizer import DEFAULT_ELASTICITIES, SPEND_CATEGORIES, evaluate_schedules, expected_uplift, optimize_schedule
+from .presets import PRESETS, compile_preset, preset_costs, preset_multipliers, register_preset
+from .prompt import DEFAULT_PROMPT_BUDGET, build_prompt, estimate_tokens
+from .schedule import COST_CATEGORIES, CostSchedule
+from .sensitivity import SENSITIVITY_INPUTS, run_sensitivity, tornado_frame
+from .store import ScenarioStore
+from .suggestions import (OPTIMIZATION_RULES, SUGGESTION_RULES, calculate_optimization_suggestions,
+                          rule_based_optimization, suggestion_flags)
+from .sweep import run_sweep, sweep_frame, to_grid
+from .timeline import GRANULARITIES, Timeline, build_timeline
+
+__all__ = [
+    "AI_MODELS",
+    "AIClient",
+    "COMPARISON_METRICS",
+    "COST_CATEGORIES",
+    "CostSchedule",
+    "DEFAULT_ELASTICITIES",
+    "DEFAULT_PROMPT_BUDGET",
+    "GOAL_METRICS",
+    "GOAL_VARIABLES",
+    "GRANULARITIES",
+    "IncrementalSimulation",
+    "LRUCache",
+    "MONTHLY_GOAL_METRICS",
+    "MetricsRegistry",
+    "OPTIMIZATION_RULES",
+    "PRESETS",
+    "Profiler",
+    "RESULT_COLUMNS",
+    "ResultWriter",
+    "SENSITIVITY_INPUTS",
+    "SPEND_CATEGORIES",
+    "SUGGESTION_RULES",
+    "ScenarioStore",
+    "SimulationInputs",
+    "Timeline",
+    "band_frame",
+    "build_prompt",
+    "build_timeline",
+    "calculate_optimization_suggestions",
+    "calendar_months",
+    "compare_scenarios",
+    "comparison_frame",
+    "comparison_totals",
+    "compile_preset",
+    "configure_logging",
+    "downsample",
+    "estimate_tokens",
+    "evaluate_schedules",
+    "expected_uplift",
+    "fingerprint",
+    "frame_columns",
+    "goal_seek",
+    "kpi_totals",
+    "load_scenarios",
+    "log_metrics",
+    "lttb_indices",
+    "month_labels",
+    "monte_carlo",
+    "optimize_schedule",
+    "preset_costs",
+    "preset_multipliers",
+    "read_results",
+    "register_preset",
+    "rule_based_optimization",
+    "run_batch",
+    "run_sensitivity",
+    "run_simulation",
+    "run_sweep",
+    "sample_optimizations",
+    "simulate",
+    "simulate_arrays",
+    "simulation_totals",
+    "stored_month_names",
+    "suggestion_flags",
+    "sweep_frame",
+    "to_csv",
+    "to_excel",
+    "to_frame",
+    "to_grid",
+    "tornado_frame",
+]
@@ -0,0 +1,183 @@
+"""AI最適化提案の取得（OpenAI互換のチャットAPI）
+
+接続プール付きのHTTPセッションを使い回し、スレッドプールで同時実行数を制限して
+バックグラウンドでリクエストする。応答は (データのハッシュ, ビジネス目標, モデル) ごとに
+キャッシュし、同じ条件のリクエストが実行中なら結果を共有する。
+OPENAI_BASE_URL を指定すると、ローカルのスタブなど OpenAI 互換のエンドポイントに送信する。
+プロンプトは prompt.build_prompt でトークン数の上限に合わせて要約する。
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from .cache import LRUCache, fingerprint
+from .prompt import DEFAULT_PROMPT_BUDGET, build_prompt
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+# 画面の表示名: APIのモデル名
+AI_MODELS = {"GPT-4": "gpt-4", "GPT-3.5-Turbo": "gpt-3.5-turbo"}
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_MAX_TOKENS = 1500
+SYSTEM_PROMPT = "あなたはビジネス分析の専門家です。データを分析し、実用的な最適化提案を行ってください。"
+# キャッシュにないことを表す値（None もキャッシュできる値として扱う）
+_MISSING = object()
+
+
+def data_fingerprint(data):
+    """結果DataFrame（または {シナリオ名: DataFrame}）の内容のハッシュ"""
+    if isinstance(data, dict):
+        return fingerprint({name: data_fingerprint(df) for name, df in data.items()})
+    return fingerprint(list(data.columns), pd.util.hash_pandas_object(data, index=False).to_numpy())
+
+
+def sample_optimizations(business_goals):
+    """AI応答の例（応答がJSONとして読めない場合やスタブの応答に使用）"""
+    ai_optimizations = []
+
+    if business_goals == "利益最大化":
+        ai_optimizations.append({
+            "月": "2025年08月",
+            "施策": "AI推奨: 広告チャネル最適化",
+            "現在値": "統合広告運用",
+            "推奨値": "SNS広告重視（70%）+ リスティング（30%）",
+            "期待効果": "ROAS +25%向上",
+            "理由": "AI分析: SNS広告のCVRが高い傾向"
+        })
+
+        ai_optimizations.append({
+            "月": "2025年10月",
+            "施策": "AI推奨: コンテンツ制作強化",
+            "現在値": "通常制作",
+            "推奨値": "動画コンテンツ強化",
+            "期待効果": "エンゲージメント +40%",
+            "理由": "AI分析: 動画コンテンツのパフォーマンスが高い"
+        })
+
+    elif business_goals == "売上成長重視":
+        ai_optimizations.append({
+            "月": "全期間",
+            "施策": "AI推奨: 予算再配分",
+            "現在値": "均等配分",
+            "推奨値": "Q4重点配分（+50%）",
+            "期待効果": "売上成長率 +15%",
+            "理由": "AI予測: Q4の市場成長が見込める"
+        })
+
+    else:  # リスク最小化
+        ai_optimizations.append({
+            "月": "全期間",
+            "施策": "AI推奨: リスク分散",
+            "現在値": "単一チャネル重視",
+            "推奨値": "マルチチャネル戦略",
+            "期待効果": "リスク軽減 -30%",
+            "理由": "AI分析: チャネル分散によりリスク軽減"
+        })
+
+    return ai_optimizations
+
+
+class AIClient:
+    """OpenAI互換APIのクライアント（接続プール・同時実行数の制限・応答キャッシュ付き）
+
+    metrics（MetricsRegistry）を渡すと、API呼び出しの所要時間（ai_latency_ms）と
+    呼び出し・失敗・キャッシュヒットの回数を記録する。
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=4, timeout=30, cache_size=64, metrics=None):
+        self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY")
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.cache = LRUCache(maxsize=cache_size)
+        self.metrics = metrics
+
+        # requests の読み込みは最初のクライアント作成時まで遅らせる（AI機能を使わない起動を速くする）
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if self.api_key:
+            self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="ai-client")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def request(self, data, business_goals, model=DEFAULT_MODEL, max_tokens=DEFAULT_MAX_TOKENS,
+                prompt_budget=DEFAULT_PROMPT_BUDGET, granularity="monthly"):
+        """APIを呼び出して最適化提案のリストを返す（呼び出し元のスレッドで待つ）
+
+        data は結果DataFrame、または {シナリオ名: DataFrame}。model には画面の表示名（AI_MODELS）も使える。
+        granularity は data の粒度（"monthly" / "weekly" / "daily"）。
+        """
+        payload = {
+            "model": AI_MODELS.get(model, model),
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_prompt(data, business_goals, prompt_budget, granularity)}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.7
+        }
+        started = time.perf_counter()
+        try:
+            response = self.session.post(f"{self.base_url}/chat/completions", json=payload, timeout=self.timeout)
+        finally:
+            self._record("ai_requests", latency=time.perf_counter() - started)
+        if response.status_code != 200:
+            self._record("ai_errors")
+            raise RuntimeError(f"API呼び出し失敗: {response.status_code} - {response.text}")
+
+        ai_response = response.json()["choices"][0]["message"]["content"]
+        try:
+            return json.loads(ai_response)
+        except json.JSONDecodeError:
+            # JSON形式でない場合は、例の提案を返す
+            return sample_optimizations(business_goals)
+
+    def submit(self, data, business_goals, model=DEFAULT_MODEL, max_tokens=DEFAULT_MAX_TOKENS,
+               prompt_budget=DEFAULT_PROMPT_BUDGET, data_key=None, granularity="monthly"):
+        """バックグラウンドで最適化提案を取得し、Future を返す
+
+        キャッシュ済みなら完了済みの Future を、同じ条件のリクエストが実行中ならその Future を返す。
+        data_key を省略すると data の内容からハッシュを計算する。
+        """
+        model = AI_MODELS.get(model, model)
+        key = (data_key or data_fingerprint(data), business_goals, model, max_tokens, prompt_budget, granularity)
+        with self._lock:
+            cached = self.cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                self._record("ai_cache_hits")
+                future = Future()
+                future.set_result(cached)
+                return future
+            if key in self._pending:
+                return self._pending[key]
+            future = self._executor.submit(self.cache.get_or_compute, key,
+                                           lambda: self.request(data, business_goals, model, max_tokens, prompt_budget,
+                                                                granularity))
+            self._pending[key] = future
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _record(self, counter, latency=None):
+        if self.metrics is None:
+            return
+        self.metrics.count(counter)
+        if latency is not None:
+            self.metrics.observe("ai_latency_ms", latency * 1000)
+
+    def _forget(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
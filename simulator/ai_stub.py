@@ -0,0 +1,65 @@
+"""オフライン検証用の OpenAI 互換スタブサーバー
+
+    python -m simulator ai-stub --port 8000 --latency 0.5
+    OPENAI_API_KEY=dummy OPENAI_BASE_URL=http://127.0.0.1:8000/v1 streamlit run app.py
+
+/v1/chat/completions への POST に、プロンプトの目標に応じた例の提案を返す。
+latency で応答の遅延（秒）を指定でき、負荷試験やUIの待機表示の確認に使う。
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .ai import sample_optimizations
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        goal = re.search(r"目標: (\S+)", prompt)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.last_request = body
+
+        content = json.dumps(sample_optimizations(goal.group(1) if goal else ""), ensure_ascii=False)
+        payload = json.dumps({
+            "id": f"stub-{self.server.requests}",
+            "object": "chat.completion",
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt), "completion_tokens": len(content),
+                      "total_tokens": len(prompt) + len(content)},
+        }, ensure_ascii=False).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=8000, latency=0.0):
+    """スタブサーバーを作成する
+
+    port=0 で空きポートを使用する。受信数は server.requests、最後に受信した本文は server.last_request。
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.requests = 0
+    server.last_request = None
+    server.lock = threading.Lock()
+    return server
@@ -0,0 +1,98 @@
+"""クライアント別シナリオの並列一括実行
+
+シナリオはディレクトリ内のJSONファイル群、またはJSONL（1行1シナリオ）から読み込む。
+各シナリオはプロセスプールで並列に計算し、完了したものから結果ファイルを書き出す。
+計算は run_simulation を使うため、数値はアプリの結果表示と一致する。
+"""
+
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from .export import summarize, write_result
+from .inputs import SimulationInputs, run_simulation, simulation_totals
+
+
+def load_scenarios(path):
+    """(クライアント名, シナリオ辞書) のリストを返す
+
+    クライアント名は各シナリオの "client" キーで指定し、省略時はファイル名（JSONLは行番号）を使う。
+    """
+    path = Path(path)
+    if path.is_dir():
+        entries = [(file.stem, json.loads(file.read_text(encoding="utf-8"))) for file in sorted(path.glob("*.json"))]
+    else:
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    entries.append((f"{path.stem}_{line_number}", json.loads(line)))
+
+    scenarios = []
+    for default_name, data in entries:
+        data = dict(data)
+        scenarios.append((str(data.pop("client", default_name)), data))
+    return scenarios
+
+
+def _safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name)
+
+
+def _output_paths(clients, output_dir, output_format):
+    """クライアントごとの結果ファイルのパス
+
+    ファイル名が重複する場合（同じクライアントの複数シナリオ、記号の置き換えで同じ名前になる場合、
+    サマリの summary.csv と同じ名前の場合）は、入力での順番（1始まり）を付けて上書きを防ぐ。
+    """
+    paths, used = [], {"summary"} if output_format == "csv" else set()
+    for number, client in enumerate(clients, 1):
+        stem = _safe_filename(client)
+        while stem.casefold() in used:
+            stem = f"{stem}_{number}"
+        used.add(stem.casefold())
+        paths.append(output_dir / f"{stem}.{output_format}")
+    return paths
+
+
+def _run_one(client, data, output_path):
+    """1クライアント分を計算して結果を書き出し、サマリを返す（ワーカープロセスで実行）"""
+    inputs = SimulationInputs.from_dict(data)
+    df = run_simulation(inputs)
+    write_result(df, output_path)
+    return {"クライアント": client, **summarize(df, simulation_totals(inputs)), "出力": str(output_path)}
+
+
+def run_batch(scenarios, output_dir, workers=None, output_format="csv", on_result=None):
+    """シナリオ群をプロセスプールで並列計算し、クライアント別のサマリをDataFrameで返す
+
+    結果ファイルは output_dir/<クライアント名>.<output_format>（名前が重複する場合は
+    <クライアント名>_<順番>.<output_format>）に書き出し、サマリは output_dir/summary.csv に保存する。計算に失敗したシナリオは "エラー" 列に理由を記録する。
+    on_result を指定すると、完了したシナリオのサマリ行ごとに呼び出される。
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = _output_paths([client for client, _ in scenarios], output_dir, output_format)
+    rows = [None] * len(scenarios)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_run_one, client, data, path): (i, client)
+            for i, ((client, data), path) in enumerate(zip(scenarios, paths))
+        }
+        for future in as_completed(futures):
+            i, client = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {"クライアント": client, "エラー": str(e)}
+            rows[i] = row
+            if on_result:
+                on_result(row)
+
+    summary = pd.DataFrame(rows)
+    summary.to_csv(output_dir / "summary.csv", index=False, encoding="utf-8-sig")
+    return summary
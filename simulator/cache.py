@@ -0,0 +1,147 @@
+"""シミュレーション結果のメモ化
+
+入力を正規化して安定したハッシュ（フィンガープリント）を作り、件数とバイト数の上限付きの
+LRUキャッシュで計算結果を再利用する。
+"""
+
+import dataclasses
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+
+from .schedule import CostSchedule
+
+
+def _canonical(value):
+    """JSONに変換できる正規形にする（辞書はキー順、配列は内容のハッシュ）"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=repr)
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()
+        return {"ndarray": digest, "dtype": str(value.dtype), "shape": list(value.shape)}
+    if isinstance(value, CostSchedule):
+        return {"overridden": _canonical(value.overridden),
+                "values": _canonical(np.where(value.overridden, value.values, 0.0))}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _canonical(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def fingerprint(*parts):
+    """入力一式の安定したハッシュ値を返す（辞書のキー順や配列の実体に依存しない）"""
+    payload = json.dumps(_canonical(list(parts)), ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def nbytes(value):
+    """値のおおよそのメモリ使用量（配列・DataFrame・バイト列を数え、入れ子の辞書・リストは合計）
+
+    np.broadcast_to などでストライドが0の軸は実体を持たないため数えない。
+    """
+    if isinstance(value, np.ndarray):
+        return value.itemsize * int(np.prod([n for n, stride in zip(value.shape, value.strides) if stride]))
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """件数・バイト数の上限付きのLRUキャッシュ（ヒット数・ミス数を記録）
+
+    max_bytes を指定すると、保持している値の nbytes() の合計がこれを超えないよう古いものから捨てる。
+    1件で max_bytes を超える値は保持しない（計算結果はそのまま返す）。
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """キャッシュ済みならその値を、なければ default を返す（存在確認と取得を1回のロックで行う）
+
+        ヒットしたときは get_or_compute と同じく順序とヒット数を更新する。ミスは数えない
+        （続けて get_or_compute で計算するときにそちらで数える）。
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_compute(self, key, compute):
+        """キャッシュ済みならその値を、なければ compute() の結果を保存して返す"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        size = nbytes(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+        with self._lock:
+            self.bytes += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                evicted, _ = self._entries.popitem(last=False)
+                self.bytes -= self._sizes.pop(evicted)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """デバッグ表示用の統計情報"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
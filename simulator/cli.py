@@ -0,0 +1,117 @@
+"""コマンドラインからのシミュレーション実行
+
+    python -m simulator run scenario.json -o result.csv
+    python -m simulator batch clients.jsonl -o results/ --workers 8
+    python -m simulator montecarlo scenario.json --paths 100000 -o paths.parquet
+    python -m simulator ai-stub --port 8000
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from .batch import load_scenarios, run_batch
+from .columnar import ResultWriter
+from .export import summarize, write_result
+from .inputs import SimulationInputs, run_simulation, simulation_totals
+from .montecarlo import monte_carlo
+
+
+def load_scenario(path):
+    """JSONのシナリオファイルを読み込む"""
+    with open(path, encoding="utf-8") as f:
+        return SimulationInputs.from_dict(json.load(f))
+
+
+def _run(args):
+    inputs = load_scenario(args.scenario)
+    df = run_simulation(inputs)
+    if args.output:
+        write_result(df, args.output)
+    print(json.dumps(summarize(df, simulation_totals(inputs)), ensure_ascii=False))
+    return 0
+
+
+def _batch(args):
+    scenarios = load_scenarios(args.scenarios)
+
+    def report(row):
+        status = f"エラー: {row['エラー']}" if "エラー" in row else f"総利益 {row['総利益']:,}万円"
+        print(f"{row['クライアント']}: {status}", file=sys.stderr)
+
+    summary = run_batch(scenarios, args.output, workers=args.workers, output_format=args.format, on_result=report)
+    print(summary.to_string(index=False))
+    return 1 if "エラー" in summary else 0
+
+
+def _montecarlo(args):
+    inputs = load_scenario(args.scenario)
+    with ResultWriter(args.output, month_names=inputs.month_names()) as writer:
+        result = monte_carlo(inputs.months, paths=args.paths, seed=args.seed, chunk_size=args.chunk_size,
+                             on_chunk=writer.write, **inputs.engine_params())
+    print(json.dumps({
+        "パス数": result["paths"],
+        "出力行数": writer.rows,
+        "総利益P50": round(float(np.percentile(result["total_profit"], 50))),
+        "期間通算の赤字確率": round(result["total_loss_probability"], 4),
+    }, ensure_ascii=False))
+    return 0
+
+
+def _ai_stub(args):
+    from .ai_stub import make_server
+
+    server = make_server(args.host, args.port, latency=args.latency)
+    host, port = server.server_address[:2]
+    print(f"OPENAI_BASE_URL=http://{host}:{port}/v1 で待ち受けています（Ctrl+Cで終了）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m simulator", description="コンサル向けシミュレーションの実行")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="シナリオファイルを1件計算する")
+    run.add_argument("scenario", help="シナリオファイル（JSON）")
+    run.add_argument("-o", "--output", help="結果の出力先（.csv / .xlsx / .json / .parquet / .arrow）")
+    run.set_defaults(handler=_run)
+
+    batch = commands.add_parser("batch", help="クライアント別シナリオを並列で一括計算する")
+    batch.add_argument("scenarios", help="シナリオのディレクトリ（*.json）またはJSONLファイル")
+    batch.add_argument("-o", "--output", required=True, help="結果とサマリ（summary.csv）の出力先ディレクトリ")
+    batch.add_argument("--workers", type=int, help="並列プロセス数（省略時はCPUコア数）")
+    batch.add_argument("--format", choices=["csv", "xlsx", "json", "parquet", "arrow"], default="csv",
+                       help="クライアント別結果の形式")
+    batch.set_defaults(handler=_batch)
+
+    mc = commands.add_parser("montecarlo", help="モンテカルロの全パスを列指向形式で書き出す")
+    mc.add_argument("scenario", help="シナリオファイル（JSON）")
+    mc.add_argument("-o", "--output", required=True, help="出力先（.parquet / .arrow）")
+    mc.add_argument("--paths", type=int, default=10000, help="試行回数")
+    mc.add_argument("--seed", type=int, default=0, help="乱数シード")
+    mc.add_argument("--chunk-size", type=int, default=10000, help="1回に計算・書き出すパス数")
+    mc.set_defaults(handler=_montecarlo)
+
+    stub = commands.add_parser("ai-stub", help="オフライン検証用の OpenAI 互換スタブサーバーを起動する")
+    stub.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    stub.add_argument("--port", type=int, default=8000, help="待ち受けるポート")
+    stub.add_argument("--latency", type=float, default=0.0, help="応答の遅延（秒）")
+    stub.set_defaults(handler=_ai_stub)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,151 @@
+"""列指向形式（Parquet / Arrow IPC）での結果の書き出しと読み込み
+
+スイープやモンテカルロのように行数の多い結果を、計算したチャンクごとにロウグループ /
+レコードバッチとして追記する。1行は (シナリオ, 月) の組で、万円の値は int32、比率は float32 で保持する。
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INT_COLUMNS = {
+    "売上": "revenue",
+    "広告費": "ad_cost",
+    "コンサル費": "consultant",
+    "制作費": "production",
+    "その他": "other",
+    "総費用": "total_cost",
+    "利益": "profit",
+}
+# 列名: (計算結果のキー, 丸め桁数)
+FLOAT_COLUMNS = {
+    "広告費率": ("ad_ratio", 1),
+    "利益率": ("profit_margin", 1),
+    "ROAS": ("roas", 0),
+}
+IPC_SUFFIXES = (".arrow", ".ipc", ".feather")
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("列指向形式の入出力には pyarrow が必要です（pip install pyarrow）") from e
+    return pyarrow
+
+
+def _file_format(path):
+    return "ipc" if Path(path).suffix.lower() in IPC_SUFFIXES else "parquet"
+
+
+def result_schema(month_names=None):
+    """結果ファイルのスキーマ（月ラベルはメタデータに保持）"""
+    pa = _pyarrow()
+    columns = [pa.field("シナリオ", pa.int32()), pa.field("月番号", pa.int16())]
+    columns += [pa.field(name, pa.int32()) for name in INT_COLUMNS]
+    columns += [pa.field(name, pa.float32()) for name in FLOAT_COLUMNS]
+    metadata = {"month_names": json.dumps(list(month_names), ensure_ascii=False)} if month_names is not None else None
+    return pa.schema(columns, metadata=metadata)
+
+
+def _to_int32(values, name):
+    values = np.trunc(values)
+    if values.size and (values.min() < _INT32.min or values.max() > _INT32.max):
+        raise ValueError(f"{name}がint32の範囲を超えています")
+    return values.astype(np.int32)
+
+
+def to_record_batch(result, schema, scenario_offset=0):
+    """計算結果（形状 (シナリオ, 月) または (月,)）を1行 = (シナリオ, 月) のレコードバッチにする"""
+    pa = _pyarrow()
+    profit = np.atleast_2d(result["profit"])
+    scenarios, months = profit.shape
+
+    arrays = [
+        np.repeat(np.arange(scenario_offset, scenario_offset + scenarios, dtype=np.int32), months),
+        np.tile(np.arange(months, dtype=np.int16), scenarios),
+    ]
+    for name, key in INT_COLUMNS.items():
+        arrays.append(_to_int32(np.broadcast_to(result[key], profit.shape).ravel(), name))
+    for key, digits in FLOAT_COLUMNS.values():
+        arrays.append(np.round(np.broadcast_to(result[key], profit.shape).ravel(), digits).astype(np.float32))
+    return pa.RecordBatch.from_arrays([pa.array(a) for a in arrays], schema=schema)
+
+
+class ResultWriter:
+    """計算結果をチャンクごとに追記する書き出し（拡張子 .parquet / .arrow で形式を判定）"""
+
+    def __init__(self, path, month_names=None):
+        pa = _pyarrow()
+        self.path = Path(path)
+        self.schema = result_schema(month_names)
+        self.rows = 0
+        self._next_scenario = 0
+        if _file_format(path) == "ipc":
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+        else:
+            import pyarrow.parquet as pq
+
+            self._sink = None
+            self._writer = pq.ParquetWriter(str(self.path), self.schema, compression="zstd")
+
+    def write(self, result, scenario_offset=None):
+        """1チャンク分を追記する（scenario_offset 省略時は前回の続きの番号を振る）"""
+        if scenario_offset is None:
+            scenario_offset = self._next_scenario
+        batch = to_record_batch(result, self.schema, scenario_offset)
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+        self._next_scenario = scenario_offset + np.atleast_2d(result["profit"]).shape[0]
+        return batch.num_rows
+
+    def close(self):
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_results(path, columns=None):
+    """書き出した結果をArrowのテーブルとして読み込む
+
+    Arrow IPC はメモリマップしたファイルをそのまま参照するため、データをコピーしない。
+    Parquet もメモリマップで読み込むが、展開のためのコピーは発生する。
+    """
+    pa = _pyarrow()
+    if _file_format(path) == "ipc":
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        return table.select(columns) if columns else table
+
+    import pyarrow.parquet as pq
+
+    return pq.read_table(str(path), columns=columns, memory_map=True)
+
+
+def stored_month_names(table):
+    """スキーマのメタデータから月ラベルを取り出す"""
+    metadata = table.schema.metadata or {}
+    raw = metadata.get(b"month_names")
+    return json.loads(raw) if raw else None
+
+
+def compact_dtypes(df):
+    """結果DataFrameの列を int32 / float32 に縮める
+
+    金額の列は整数（月次）のときだけ int32 にし、小数の金額（週次・日次）は端数を切り捨てないよう
+    float64 のまま残す。
+    """
+    return df.astype({
+        **{name: np.int32 for name in INT_COLUMNS if name in df and pd.api.types.is_integer_dtype(df[name])},
+        **{name: np.float32 for name in FLOAT_COLUMNS if name in df},
+    })
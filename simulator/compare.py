@@ -0,0 +1,94 @@
+"""複数シナリオの比較
+
+ピン留めした複数のシナリオ（プリセット違い・広告費率違いなど）の入力をシナリオ軸に積み重ね、
+計算エンジンで (シナリオ × 月) の配列として一括評価する。基準シナリオとの差分も配列演算で求める。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .engine import calendar_months, frame_columns, kpi_totals, simulate_arrays
+
+# 比較表示の指標: (月別の列, 全期間のKPI)
+COMPARISON_METRICS = {"売上": ("売上", "総売上"), "利益": ("利益", "総利益"), "ROAS": ("ROAS", "全体ROAS")}
+
+# シナリオごとに値が異なってよい引数（それ以外は全シナリオ共通）
+_STACKED_PARAMS = ("base_revenue", "revenue_growth", "base_ad_cost", "ad_cost_ratio", "consultant_fee",
+                   "production_cost", "other_fixed_cost")
+_MONTHLY_PARAMS = ("consultant_costs", "production_costs", "ad_costs")
+
+
+def stack_params(params_list, months, start_month):
+    """各シナリオの engine_params を形状 (S, 1) / (S, months) の引数にまとめる
+
+    ピーク月はシナリオごとに異なってよく、全シナリオのピーク月の和集合を peak_months に、
+    シナリオ別の倍率（ピーク月以外は1）を形状 (S, months) の peak_multiplier にする。
+    """
+    stacked = {name: np.array([[p[name]] for p in params_list], dtype=float) for name in _STACKED_PARAMS}
+    stacked.update({name: np.array([p[name] for p in params_list], dtype=float) for name in _MONTHLY_PARAMS})
+
+    calendar = calendar_months(start_month, months)
+    peak_months = sorted({m for p in params_list for m in p["peak_months"]})
+    multipliers = np.array([np.where(np.isin(calendar, p["peak_months"]), p["peak_multiplier"], 1.0)
+                            for p in params_list])
+    return {**stacked, "start_month": start_month, "peak_months": tuple(peak_months), "peak_multiplier": multipliers}
+
+
+def compare_scenarios(scenarios, baseline=None):
+    """複数シナリオを一括評価し、基準シナリオとの差分を返す
+
+    scenarios は {シナリオ名: SimulationInputs} の辞書（期間と開始日は全シナリオで共通）。
+    baseline は基準のシナリオ名（省略時は先頭）。戻り値は "names"、"month_names"、
+    形状 (S, months) の "columns"（結果表示の列）、シナリオ別の "totals"、基準との差分
+    "deltas"（月別）と "total_deltas" を持つ辞書。
+    """
+    names = list(scenarios)
+    if not names:
+        raise ValueError("比較するシナリオがありません")
+    inputs_list = list(scenarios.values())
+    first = inputs_list[0]
+    if any((inputs.months, inputs.start_date) != (first.months, first.start_date) for inputs in inputs_list):
+        raise ValueError("比較するシナリオは期間と開始日をそろえてください")
+    baseline = names[0] if baseline is None else baseline
+    base_index = names.index(baseline)
+
+    # 自動調整モードは配列にできないため、モードごとに1回ずつ評価する
+    params_list = [inputs.engine_params() for inputs in inputs_list]
+    result = {}
+    for auto_mode in sorted({p["auto_mode"] for p in params_list}):
+        rows = [i for i, p in enumerate(params_list) if p["auto_mode"] == auto_mode]
+        part = simulate_arrays(first.months, auto_mode=auto_mode,
+                               **stack_params([params_list[i] for i in rows], first.months, first.start_date.month))
+        for key, values in part.items():
+            values = np.broadcast_to(values, (len(rows), first.months))
+            if key not in result:
+                result[key] = np.empty((len(names), first.months))
+            result[key][rows] = values
+
+    columns = frame_columns(result)
+    totals = kpi_totals(result)
+    return {
+        "names": names,
+        "baseline": baseline,
+        "month_names": first.month_names(),
+        "columns": columns,
+        "totals": totals,
+        "deltas": {name: values - values[base_index] for name, values in columns.items()},
+        "total_deltas": {name: values - values[base_index] for name, values in totals.items()},
+    }
+
+
+def comparison_totals(comparison):
+    """シナリオ別の全期間KPIと基準との差分（1行1シナリオ）"""
+    table = {"シナリオ": comparison["names"]}
+    for _, total in COMPARISON_METRICS.values():
+        table[total] = comparison["totals"][total]
+        table[f"{total}差分"] = comparison["total_deltas"][total]
+    return pd.DataFrame(table)
+
+
+def comparison_frame(comparison, metric, deltas=False):
+    """指標の月別の値（deltas=True なら基準との差分）を、月 × シナリオの表にする"""
+    column = COMPARISON_METRICS[metric][0]
+    values = comparison["deltas" if deltas else "columns"][column]
+    return pd.DataFrame({"月": comparison["month_names"], **dict(zip(comparison["names"], values))})
@@ -0,0 +1,42 @@
+"""グラフ表示用の系列の間引き
+
+LTTB（Largest-Triangle-Three-Buckets）で、形状（山・谷）を保ったまま点数を減らす。
+"""
+
+import numpy as np
+
+
+def lttb_indices(y, threshold, x=None):
+    """y を threshold 点に間引くときに残すインデックスを返す（先頭と末尾は必ず残す）
+
+    x を省略すると等間隔とみなす。点数が threshold 以下なら全インデックスを返す。
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # 先頭と末尾を除く点を threshold - 2 個のバケットに分け、各バケットから1点ずつ選ぶ
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 次のバケットの平均（最後のバケットでは末尾の点）
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # 直前に選んだ点・次のバケットの平均と作る三角形の面積が最大の点
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(x, y, threshold):
+    """LTTBで間引いた (x, y) を返す"""
+    indices = lttb_indices(y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
@@ -0,0 +1,247 @@
+"""月次シミュレーションの計算エンジン
+
+月を最終軸とするNumPy配列でまとめて計算する。スカラー引数には形状 (..., 1) の配列も
+渡せるため、シナリオ軸を持つバッチ計算にもそのままブロードキャストされる。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 期間ごとに合計できる金額の項目（週次では日ごとの値を合計してから指標を求める）
+AMOUNT_KEYS = ("revenue", "ad_cost", "consultant", "production", "other", "total_cost", "profit")
+
+RESULT_COLUMNS = ["月", "売上", "広告費", "広告費率", "コンサル費", "制作費", "その他", "総費用", "利益", "利益率", "ROAS"]
+
+
+def month_labels(start_date, months):
+    """表示用の月ラベル（例: 2025年04月）を返す（開始月から暦で1か月ずつ進める）"""
+    index = start_date.year * 12 + start_date.month - 1 + np.arange(months)
+    return [f"{year}年{month:02d}月" for year, month in zip(index // 12, index % 12 + 1)]
+
+
+def calendar_months(start_month, months):
+    """各月の暦月（1〜12）を返す"""
+    return (start_month - 1 + np.arange(months)) % 12 + 1
+
+
+def _divide(numerator, denominator, fallback=0.0):
+    """分母が正の要素だけ割り算し、それ以外は fallback を返す"""
+    numerator, denominator = np.broadcast_arrays(
+        np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float)
+    )
+    out = np.full(numerator.shape, fallback, dtype=float)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+# 成長率の値がこの数（× 月数）以下なら、従来のループと同じ Python の ** で成長係数を求める
+EXACT_GROWTH_LIMIT = 100_000
+
+
+def growth_factors(revenue_growth, months):
+    """成長係数 (1 + 成長率/100) ** 月 を返す（形状 (..., months)）
+
+    NumPy の配列の累乗は Python の ** と最終桁が異なる場合があり、ROAS などの丸めが .5 の境界で
+    変わってしまう。そのため成長率の種類 × 月数が EXACT_GROWTH_LIMIT 以下なら、成長率ごとに
+    Python の ** で係数表を作って引く（モンテカルロなど成長率が多数の場合だけ配列の累乗を使う）。
+    """
+    rate = 1 + np.asarray(revenue_growth, dtype=float) / 100
+    steps = np.arange(months)
+    rates, index = np.unique(rate, return_inverse=True)
+    if rates.size * months > EXACT_GROWTH_LIMIT:
+        return rate ** steps
+    table = np.array([[r ** i for i in range(months)] for r in rates.tolist()]).reshape(rates.size, months)
+    return table[index.reshape(rate.shape), steps]
+
+
+def _monthly(values, default):
+    """月別設定値の配列を返す（未指定ならデフォルト値）"""
+    if values is None:
+        return np.asarray(default, dtype=float)
+    return np.asarray(values, dtype=float)
+
+
+def simulate_arrays(months, base_revenue, revenue_growth, base_ad_cost, ad_cost_ratio,
+                    consultant_fee, production_cost, other_fixed_cost,
+                    consultant_costs=None, production_costs=None, ad_costs=None,
+                    start_month=1, peak_months=(), peak_multiplier=1.0, auto_mode=False,
+                    revenue_factor=None, timeline=None):
+    """シミュレーションを配列演算で計算する
+
+    consultant_costs / production_costs / ad_costs は月別の設定値（長さ months）で、
+    None の場合は consultant_fee / production_cost / base_ad_cost を全月に使用する。
+    revenue_factor は季節変動後の売上に掛ける係数（モンテカルロの広告効率など）。
+    timeline（週次・日次の Timeline）を渡すと日単位で計算し、期間ごとの配列を返す（_simulate_days）。
+    戻り値は丸め前の値を持つ配列（形状 (..., months)）の辞書。
+    """
+    if timeline is not None and timeline.granularity != "monthly":
+        return _simulate_days(timeline, base_revenue, revenue_growth, base_ad_cost, ad_cost_ratio, consultant_fee,
+                              production_cost, other_fixed_cost, consultant_costs, production_costs, ad_costs,
+                              peak_months, peak_multiplier, auto_mode, revenue_factor)
+    base_revenue = np.asarray(base_revenue, dtype=float)
+
+    # 売上計算
+    revenue = base_revenue * growth_factors(revenue_growth, months)
+
+    # 季節変動
+    peak_months = tuple(peak_months)
+    if peak_months:
+        is_peak = np.isin(calendar_months(start_month, months), peak_months)
+        revenue = np.where(is_peak, revenue * peak_multiplier, revenue)
+
+    if revenue_factor is not None:
+        revenue = revenue * revenue_factor
+
+    return evaluate_costs(revenue, base_revenue, ad_cost_ratio, other_fixed_cost,
+                          _monthly(consultant_costs, consultant_fee),
+                          _monthly(production_costs, production_cost),
+                          _monthly(ad_costs, base_ad_cost), auto_mode)
+
+
+def _simulate_days(timeline, base_revenue, revenue_growth, base_ad_cost, ad_cost_ratio, consultant_fee,
+                   production_cost, other_fixed_cost, consultant_costs, production_costs, ad_costs,
+                   peak_months, peak_multiplier, auto_mode, revenue_factor):
+    """週次・日次の計算
+
+    月次と同じ月額（売上・費用。成長・季節変動・プリセットはすべて期間の月で決まる）を、
+    その日が属する月の日数で按分する。売上連動の広告費や自動調整は月内で同じ比率になるため、
+    丸める前の日ごとの金額を月ごとに合計すると月次の結果と一致する。週次は日ごとの金額を週ごとに
+    合計してから指標を求める。期間ごとに丸めた金額の合計は月次の合計と一致しないため、全期間の
+    KPIは月次の結果から求める（simulation_totals）。
+    """
+    t = timeline
+    base_revenue = np.asarray(base_revenue, dtype=float)
+    revenue = base_revenue * growth_factors(revenue_growth, t.months)
+
+    peak_months = tuple(peak_months)
+    if peak_months:
+        revenue = np.where(np.isin(t.calendar, peak_months), revenue * peak_multiplier, revenue)
+    if revenue_factor is not None:
+        revenue = revenue * revenue_factor
+
+    def daily(values, default):
+        """月別設定値（月額）をその日の金額にする"""
+        values = _monthly(values, default)
+        if values.ndim and values.shape[-1] == t.months:
+            values = values[..., t.month_index]
+        return values * t.fraction
+
+    result = evaluate_costs(revenue[..., t.month_index] * t.fraction, base_revenue * t.fraction, ad_cost_ratio,
+                            daily(None, other_fixed_cost), daily(consultant_costs, consultant_fee),
+                            daily(production_costs, production_cost), daily(ad_costs, base_ad_cost), auto_mode)
+    if t.bounds is None:
+        return result
+    shape = result["profit"].shape
+    return _with_ratios({key: np.add.reduceat(np.broadcast_to(result[key], shape), t.bounds, axis=-1)
+                         for key in AMOUNT_KEYS})
+
+
+def evaluate_costs(revenue, base_revenue, ad_cost_ratio, other_fixed_cost,
+                   consultant, production, ad_costs, auto_mode=False):
+    """売上に対する費用・利益・指標を計算する
+
+    各月の結果はその月の売上と費用設定だけで決まるため、一部の月だけを渡して
+    再計算することもできる（差分更新で使用）。
+    """
+    revenue = np.asarray(revenue, dtype=float)
+    base_revenue = np.asarray(base_revenue, dtype=float)
+
+    # 売上に応じた自動調整（0.8-1.2の範囲で調整）
+    if auto_mode:
+        revenue_ratio = _divide(revenue, base_revenue, fallback=1.0)
+        dynamic_multiplier = 0.8 + (revenue_ratio * 0.4)
+        consultant = consultant * dynamic_multiplier
+        production = production * dynamic_multiplier
+
+    # 費用計算（月別広告費と売上連動の広告費の大きい方）
+    ad_cost = np.maximum(ad_costs, revenue * np.asarray(ad_cost_ratio, dtype=float) / 100)
+    other = np.asarray(other_fixed_cost)
+    total_cost = ad_cost + consultant + production + other
+
+    # 利益計算
+    profit = revenue - total_cost
+    shape = profit.shape
+
+    return _with_ratios({
+        "revenue": np.broadcast_to(revenue, shape),
+        "ad_cost": np.broadcast_to(ad_cost, shape),
+        "consultant": np.broadcast_to(consultant, shape),
+        "production": np.broadcast_to(production, shape),
+        "other": np.broadcast_to(other, shape),
+        "total_cost": np.broadcast_to(total_cost, shape),
+        "profit": profit,
+    })
+
+
+def _with_ratios(amounts):
+    """金額の配列に利益率・ROAS・広告費率を加える"""
+    revenue, ad_cost, profit = amounts["revenue"], amounts["ad_cost"], amounts["profit"]
+    return {
+        **amounts,
+        "profit_margin": _divide(profit, revenue) * 100,
+        "roas": _divide(revenue, ad_cost) * 100,
+        "ad_ratio": _divide(ad_cost, revenue) * 100,
+    }
+
+
+def _to_int(values):
+    """int() と同じく0方向に切り捨てて整数化する"""
+    return np.trunc(values).astype(np.int64)
+
+
+def _round(values, digits):
+    """Python の round() と同じ結果になるように丸める
+
+    np.round は10倍してから丸めるため .x5 付近で round() と結果が変わることがある。
+    端数がほぼ0.5の要素だけ round() で丸め直す。
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.array(np.round(values, digits))
+    scaled = values * 10 ** digits
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, digits) for value in values[near_half].tolist()]
+    return rounded
+
+
+def frame_columns(result, decimals=None):
+    """計算結果を結果表示用の列（月ラベル以外）に変換する
+
+    金額は decimals が None なら整数に切り捨て、指定すればその桁数に丸める（週次・日次）。
+    """
+    amount = _to_int if decimals is None else (lambda values: _round(values, decimals))
+    return {
+        "売上": amount(result["revenue"]),
+        "広告費": amount(result["ad_cost"]),
+        "広告費率": _round(result["ad_ratio"], 1),
+        "コンサル費": amount(result["consultant"]),
+        "制作費": amount(result["production"]),
+        "その他": np.array(result["other"]) if decimals is None else amount(result["other"]),
+        "総費用": amount(result["total_cost"]),
+        "利益": amount(result["profit"]),
+        "利益率": _round(result["profit_margin"], 1),
+        "ROAS": _round(result["roas"], 0),
+    }
+
+
+def to_frame(result, month_names, decimals=None):
+    """1シナリオ分の計算結果を結果表示用のDataFrameに変換する（"月" 列は週次・日次では期間のラベル）"""
+    return pd.DataFrame({"月": list(month_names), **frame_columns(result, decimals)})
+
+
+def kpi_totals(result):
+    """全期間のKPIを計算する（結果表示と同じく月別に整数化してから集計）"""
+    total_revenue = _to_int(result["revenue"]).sum(axis=-1)
+    total_ad_cost = _to_int(result["ad_cost"]).sum(axis=-1)
+    return {
+        "総売上": total_revenue,
+        "総費用": _to_int(result["total_cost"]).sum(axis=-1),
+        "総利益": _to_int(result["profit"]).sum(axis=-1),
+        "総広告費": total_ad_cost,
+        "全体ROAS": _divide(total_revenue, total_ad_cost) * 100,
+    }
+
+
+def simulate(month_names, **params):
+    """シミュレーションを実行し、結果をDataFrameで返す"""
+    return to_frame(simulate_arrays(len(month_names), **params), month_names)
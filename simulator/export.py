@@ -0,0 +1,66 @@
+"""シミュレーション結果のファイル出力"""
+
+import io
+from pathlib import Path
+
+import pandas as pd
+
+from .columnar import IPC_SUFFIXES, compact_dtypes
+
+
+def to_excel(simulation_df, sheet_name="シミュレーション結果"):
+    """Excel（xlsx）のバイト列を作成する"""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        simulation_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+        worksheet = writer.sheets[sheet_name]
+
+        # 列幅調整
+        worksheet.set_column('A:A', 12)
+        worksheet.set_column('B:J', 10)
+
+    return output.getvalue()
+
+
+def to_csv(simulation_df):
+    """CSVのバイト列を作成する（Excelで文字化けしないようUTF-8 BOM付き）"""
+    return simulation_df.to_csv(index=False).encode('utf-8-sig')
+
+
+def write_result(df, path):
+    """拡張子（.csv / .xlsx / .json / .parquet / .arrow）に応じて結果を書き出す"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        path.write_bytes(to_csv(df))
+    elif suffix == ".xlsx":
+        path.write_bytes(to_excel(df))
+    elif suffix == ".parquet":
+        compact_dtypes(df).to_parquet(path, index=False)
+    elif suffix in IPC_SUFFIXES:
+        compact_dtypes(df).to_feather(path)
+    elif suffix == ".json":
+        path.write_text(df.to_json(orient="records", force_ascii=False, indent=2), encoding="utf-8")
+    else:
+        raise ValueError(f"対応していない出力形式です: {suffix}")
+
+
+def summarize(df, totals=None):
+    """全期間のKPI（結果表示タブと同じ集計）
+
+    totals（simulation_totals の戻り値）を渡すと金額の合計はそちらを使う（週次・日次の結果を
+    月次と同じ合計で集計する）。
+    """
+    if totals is None:
+        totals = {"総売上": df["売上"].sum(), "総費用": df["総費用"].sum(), "総利益": df["利益"].sum(),
+                  "総広告費": df["広告費"].sum()}
+    total_revenue = int(totals["総売上"])
+    total_ad_cost = int(totals["総広告費"])
+    return {
+        "総売上": total_revenue,
+        "総費用": int(totals["総費用"]),
+        "総利益": int(totals["総利益"]),
+        "全体ROAS": round(total_revenue / total_ad_cost * 100, 1) if total_ad_cost > 0 else 0,
+        "赤字月数": int((df["利益"] < 0).sum()),
+    }
@@ -0,0 +1,128 @@
+"""目標値からの逆算（ゴールシーク）
+
+目標（例: 全体ROAS 400%以上、総利益 X万円）を満たす入力値を、計算エンジンを使った
+区間の縮小（直線補間と二分法の併用）で求める。探索区間はシナリオ軸（スイープのバッチ）・月の軸ごとに
+配列で持ってまとめて狭めるため、複数シナリオ・全月分の解を同じ回数の反復で同時に求められる。
+"""
+
+import numpy as np
+
+from .engine import _divide, simulate_arrays
+
+# 全期間の指標（丸め前の値で評価する）
+GOAL_METRICS = {
+    "総利益": lambda r: r["profit"].sum(axis=-1),
+    "総売上": lambda r: r["revenue"].sum(axis=-1),
+    "全体ROAS": lambda r: _divide(r["revenue"].sum(axis=-1), r["ad_cost"].sum(axis=-1)) * 100,
+    "全体利益率": lambda r: _divide(r["profit"].sum(axis=-1), r["revenue"].sum(axis=-1)) * 100,
+}
+
+# 月ごとの指標（per_month=True で使用）
+MONTHLY_GOAL_METRICS = {"利益": "profit", "売上": "revenue", "ROAS": "roas", "利益率": "profit_margin"}
+
+# 逆算できる入力: 表示名・既定の探索区間・対応する月別費用の引数
+# 月別費用のある項目は、全期間ではプリセット倍率・個別設定を含む月別費用を比例で拡大縮小し、
+# 月ごとではその月の金額そのものを求める（入力欄に設定した場合はプリセット適用後の月別費用が
+# 整数に切り捨てられるため、端数の差が出る）。
+GOAL_VARIABLES = {
+    "ad_cost_ratio": {"label": "売上に対する広告費率（%）", "bounds": (0.0, 100.0)},
+    "revenue_growth": {"label": "月次成長率（%）", "bounds": (-50.0, 100.0)},
+    "base_revenue": {"label": "初月売上（万円）", "bounds": (0.0, 100000.0)},
+    "base_ad_cost": {"label": "基本広告費（万円）", "bounds": (0.0, 100000.0), "monthly": "ad_costs"},
+    "consultant_fee": {"label": "コンサル費（万円）", "bounds": (0.0, 100000.0), "monthly": "consultant_costs"},
+    "production_cost": {"label": "制作費（万円）", "bounds": (0.0, 100000.0), "monthly": "production_costs"},
+    "other_fixed_cost": {"label": "その他固定費（万円）", "bounds": (0.0, 100000.0)},
+}
+
+
+def _with_value(params, variable, x, per_month):
+    """入力値 x を反映した simulate_arrays の引数"""
+    monthly = GOAL_VARIABLES[variable].get("monthly")
+    if monthly is None or params.get(monthly) is None:
+        return {**params, variable: x}
+    if per_month:
+        return {**params, monthly: x}
+    base = np.asarray(params[variable], dtype=float)
+    costs = np.asarray(params[monthly], dtype=float)
+    scale = _divide(costs, base[..., None] if base.ndim else base, fallback=1.0)
+    return {**params, monthly: scale * x}
+
+
+def goal_seek(months, metric, target, variable, params, per_month=False, at_most=False, bounds=None,
+              xtol=1e-6, ftol=1e-9, max_iter=100):
+    """指標が目標値に達する入力値を求める
+
+    metric は GOAL_METRICS（per_month=True なら MONTHLY_GOAL_METRICS）の名前、variable は
+    GOAL_VARIABLES の名前、params は simulate_arrays の引数（形状 (S, 1) のスイープ値も可）。
+    指標が target 以上（at_most=True なら以下）になる値のうち境界に最も近いものを返す。
+    探索区間 bounds（省略時は GOAL_VARIABLES の既定）の中で目標に届かない場合は NaN。
+    区間の幅が xtol 以下か、指標と目標の差が ftol（目標値に対する比率）以下になれば終了する。
+
+    戻り値は "value"（全期間ならシナリオ軸の形状、月ごとなら (..., months)）、"achieved"
+    （その値での指標）、"reachable"、"iterations" を持つ辞書。
+    """
+    if variable not in GOAL_VARIABLES:
+        raise ValueError(f"逆算できない入力です: {variable}")
+    metrics = MONTHLY_GOAL_METRICS if per_month else GOAL_METRICS
+    if metric not in metrics:
+        raise ValueError(f"不明な指標です: {metric}（{', '.join(metrics)} のいずれか）")
+    low_bound, high_bound = GOAL_VARIABLES[variable]["bounds"] if bounds is None else bounds
+    sign = -1.0 if at_most else 1.0
+    ftol = ftol * max(1.0, abs(target))
+
+    # 解の形状（シナリオ軸 (+ 月)）を区間の下端での評価から決める
+    shape = np.shape(simulate_arrays(months, **_with_value(params, variable, low_bound, False))["profit"])
+    shape = shape if per_month else shape[:-1] + (1,)
+    batched = len(shape) == 2
+
+    def gap(x, rows=slice(None)):
+        """目標を満たすとき0以上になる差（rows を指定するとそのシナリオだけ計算する）"""
+        subset = {name: value[rows] if batched and np.ndim(value) == 2 and len(value) == shape[0] else value
+                  for name, value in params.items()}
+        result = simulate_arrays(months, **_with_value(subset, variable, x, per_month))
+        if per_month:
+            values = np.broadcast_to(result[metrics[metric]], x.shape)
+        else:
+            values = GOAL_METRICS[metric](result)[..., None]
+        return sign * (values - target)
+
+    low = np.full(shape, float(low_bound))
+    high = np.full(shape, float(high_bound))
+    gap_low, gap_high = gap(low), gap(high)
+    reachable = (gap_low >= 0) | (gap_high >= 0)
+    # 上端の方が目標に近いなら、目標を満たす側は上端側（最小の値を求める）
+    increasing = gap_high >= gap_low
+    both = (gap_low >= 0) & (gap_high >= 0)
+
+    # 目標を満たす側と満たさない側の端点で区間を持ち、両端を結ぶ直線の零点で狭める（Illinois法）。
+    # 収束していないシナリオの行だけを計算する
+    sat_x, sat_gap = np.where(increasing, high, low), np.where(increasing, gap_high, gap_low)
+    unsat_x, unsat_gap = np.where(increasing, low, high), np.where(increasing, gap_low, gap_high)
+    done = ~reachable | both | (sat_gap <= ftol)
+    side = np.zeros(shape)
+    iterations = 0
+    while iterations < max_iter and not done.all():
+        rows = np.flatnonzero(~done.all(axis=-1)) if batched else slice(None)
+        slope = sat_gap[rows] - unsat_gap[rows]
+        secant = sat_x[rows] - sat_gap[rows] * (sat_x[rows] - unsat_x[rows]) / np.where(slope > 0, slope, 1.0)
+        x = np.where(slope > 0, secant, (sat_x[rows] + unsat_x[rows]) / 2)
+        x_gap = gap(x, rows)
+        active = ~done[rows]
+        # 目標を満たす側の端点には、差が0以上の点だけを採用する（解として返すのはこの端点）
+        hit = (x_gap >= 0) & active
+        miss = ~hit & active
+        # 同じ側が続けて更新されたら、反対側の差を半分にして次の点を区間の内側へ寄せる
+        unsat_gap[rows] = np.where(hit & (side[rows] > 0), unsat_gap[rows] / 2, unsat_gap[rows])
+        sat_gap[rows] = np.where(miss & (side[rows] < 0), sat_gap[rows] / 2, sat_gap[rows])
+        sat_x[rows], sat_gap[rows] = np.where(hit, x, sat_x[rows]), np.where(hit, x_gap, sat_gap[rows])
+        unsat_x[rows], unsat_gap[rows] = np.where(miss, x, unsat_x[rows]), np.where(miss, x_gap, unsat_gap[rows])
+        side[rows] = np.where(hit, 1.0, np.where(miss, -1.0, side[rows]))
+        done[rows] |= (hit & (x_gap <= ftol)) | (np.abs(sat_x[rows] - unsat_x[rows]) <= xtol)
+        iterations += 1
+
+    value = np.where(both, np.where(increasing, low, high), sat_x)
+    value = np.where(reachable, value, np.nan)
+    achieved = np.where(reachable, sign * gap(np.where(reachable, value, low)) + target, np.nan)
+    if not per_month:
+        value, achieved, reachable = value[..., 0], achieved[..., 0], reachable[..., 0]
+    return {"value": value, "achieved": achieved, "reachable": reachable, "iterations": iterations}
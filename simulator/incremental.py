@@ -0,0 +1,150 @@
+"""月別費用の編集に対する差分再計算
+
+各月の結果はその月の売上と費用設定だけで決まる（売上は費用設定に依存しない）。
+そのため月別費用だけが変わった場合は、スケジュールの書き換え履歴から変わった月を求めて
+その行だけを再計算し、表・KPIの合計・改善提案の平均と標準偏差を差分で更新する。
+それ以外の入力が変わった場合と、週次・日次（1つの月が複数の行にまたがる）の場合は全体を再計算する。
+全期間のKPIは粒度によらず月次の結果から求める（simulation_totals と同じ値）。
+"""
+
+import math
+from dataclasses import fields
+
+import numpy as np
+import pandas as pd
+
+from .engine import _divide, evaluate_costs, frame_columns, simulate_arrays
+from .suggestions import SUGGESTION_RULES, evaluate_rules, render_suggestions
+
+# 差分で合計を持つ列（KPI用。週次・日次では月次の結果の合計）
+SUM_COLUMNS = ("売上", "総費用", "利益", "広告費")
+# 差分で和と二乗和を持つ列と、その丸め桁数（10**桁数 倍した整数で持ち、誤差なく更新する）
+MOMENT_COLUMNS = {"ROAS": 0, "利益率": 1}
+
+
+def _structure(inputs):
+    """月別費用以外の入力（これが変わると全体の再計算が必要）"""
+    return {f.name: getattr(inputs, f.name) for f in fields(inputs) if f.name != "monthly_costs"}
+
+
+def _scaled(values, digits):
+    """丸め済みの値を 10**digits 倍した整数（Python の int）のリストにする"""
+    scale = 10 ** digits
+    return [round(value * scale) for value in np.asarray(values, dtype=float).tolist()]
+
+
+class IncrementalSimulation:
+    """1シナリオ分の結果を保持し、月別費用の変更を差分で反映する"""
+
+    def __init__(self, inputs):
+        self.recompute(inputs)
+
+    def recompute(self, inputs):
+        """全月を計算し直す"""
+        params = inputs.engine_params()
+        timeline = inputs.timeline()
+        result = simulate_arrays(inputs.months, **params, timeline=timeline)
+        self.inputs = inputs
+        self.params = params
+        self.month_names = np.array(timeline.labels, dtype=object)
+        self.revenue = np.array(result["revenue"])
+        self.base_costs = inputs.base_costs()
+        self.costs = np.column_stack([params["consultant_costs"], params["production_costs"], params["ad_costs"]])
+        self.columns = {name: np.array(values) for name, values in frame_columns(result, timeline.decimals).items()}
+        self._frame = pd.DataFrame({"月": list(self.month_names), **self.columns})
+        self._structure = _structure(inputs)
+        self._revision = inputs.monthly_costs.revision
+
+        monthly = self.columns if timeline.granularity == "monthly" else frame_columns(
+            simulate_arrays(inputs.months, **params))
+        self.sums = {name: monthly[name].sum() for name in SUM_COLUMNS}
+        self.moments = {}
+        for name, digits in MOMENT_COLUMNS.items():
+            scaled = _scaled(self.columns[name], digits)
+            self.moments[name] = [sum(scaled), sum(v * v for v in scaled)]
+        # 月の値だけで決まる改善提案の判定は月ごとに保持する
+        self.flags = {name: rule["when"](self.columns, self)
+                      for name, rule in SUGGESTION_RULES.items() if rule.get("local")}
+
+    def update(self, inputs):
+        """入力の変更を反映し、再計算した月のインデックスを返す（全体を再計算した場合は None）"""
+        if inputs.granularity != "monthly" or _structure(inputs) != self._structure:
+            self.recompute(inputs)
+            return None
+
+        schedule = inputs.monthly_costs
+        rows = schedule.changed_since(self._revision)
+        if rows is None:
+            # 別のスケジュールに置き換わった場合は全月の費用を比べる
+            rows = np.arange(inputs.months)
+        rows = rows[rows < inputs.months]
+        costs = schedule.resolve_rows(rows, self.base_costs[rows])
+        changed = (costs != self.costs[rows]).any(axis=1)
+        rows, costs = rows[changed], costs[changed]
+
+        self.inputs = inputs
+        self._revision = schedule.revision
+        if rows.size:
+            self.costs[rows] = costs
+            self._patch(rows)
+        return rows
+
+    def _patch(self, rows):
+        """指定した月の行を再計算し、表と集計値を差分で更新する"""
+        p = self.params
+        costs = self.costs[rows]
+        result = evaluate_costs(self.revenue[rows], p["base_revenue"], p["ad_cost_ratio"], p["other_fixed_cost"],
+                                costs[:, 0], costs[:, 1], costs[:, 2], p["auto_mode"])
+        for name, values in frame_columns(result).items():
+            column = self.columns[name]
+            if name in self.sums:
+                self.sums[name] += values.sum() - column[rows].sum()
+            if name in self.moments:
+                digits = MOMENT_COLUMNS[name]
+                new, old = _scaled(values, digits), _scaled(column[rows], digits)
+                self.moments[name][0] += sum(new) - sum(old)
+                self.moments[name][1] += sum(v * v for v in new) - sum(v * v for v in old)
+            column[rows] = values
+            self._frame.iloc[rows, self._frame.columns.get_loc(name)] = values
+
+        patched = {name: column[rows] for name, column in self.columns.items()}
+        for name, mask in self.flags.items():
+            mask[rows] = SUGGESTION_RULES[name]["when"](patched, self)
+
+    def frame(self):
+        """結果表示用のDataFrame（差分で更新している表のコピー）"""
+        return self._frame.copy()
+
+    def totals(self):
+        """kpi_totals と同じ形式の全期間KPI（週次・日次でも月次の結果の合計）"""
+        return {
+            "総売上": int(self.sums["売上"]),
+            "総費用": int(self.sums["総費用"]),
+            "総利益": int(self.sums["利益"]),
+            "総広告費": int(self.sums["広告費"]),
+            "全体ROAS": float(_divide(self.sums["売上"], self.sums["広告費"])) * 100,
+        }
+
+    # 改善提案のルールに渡す平均・標準偏差（差分で更新した和と二乗和から求める）
+
+    def mean(self, name):
+        n = len(self.month_names)
+        return self.moments[name][0] / 10 ** MOMENT_COLUMNS[name] / n if n else np.nan
+
+    def std(self, name):
+        """pandas と同じ不偏標準偏差（整数の和と二乗和から求めるので桁落ちしない）"""
+        n = len(self.month_names)
+        if n < 2:
+            return np.nan
+        total, squares = self.moments[name]
+        return math.sqrt((n * squares - total * total) / (n * (n - 1) * 100 ** MOMENT_COLUMNS[name]))
+
+    def suggestions(self):
+        """calculate_optimization_suggestions と同じ改善提案
+
+        local なルール（赤字・広告費率など）の判定は月ごとに差分で保持する。平均や標準偏差に
+        依存するルール（ROASが低い月）は編集のたびに閾値が変わるため、差分で更新した平均・
+        標準偏差から閾値を求めて全月を1回のベクトル比較で判定し直す。
+        """
+        evaluation = evaluate_rules(self.columns, stats=self, masks=self.flags)
+        return render_suggestions(evaluation, self.month_names)
@@ -0,0 +1,117 @@
+"""シミュレーション入力のデータクラス"""
+
+from dataclasses import asdict, dataclass, field, fields
+from datetime import date
+
+from .engine import kpi_totals, month_labels, simulate_arrays, to_frame
+from .presets import preset_costs
+from .schedule import CostSchedule
+from .timeline import build_timeline
+
+
+@dataclass
+class SimulationInputs:
+    """1シナリオ分のシミュレーション入力（金額は万円、率は%）
+
+    monthly_costs は月別の個別設定（CostSchedule）で、preset の倍率を適用した費用より
+    優先される。シナリオファイルでは consultant_{i} / production_{i} / ad_cost_{i} をキーとする辞書で書く。
+    preset はプリセット名のほか、PRESETS と同じ形式の倍率定義（辞書）も指定できる。
+    granularity は結果の粒度（"monthly" / "weekly" / "daily"）。金額の設定はいずれも月額で、
+    週次・日次では日割りで按分する。
+    """
+
+    months: int = 12
+    start_date: date = field(default_factory=date.today)
+    base_revenue: float = 500
+    revenue_growth: float = 5.0
+    base_ad_cost: float = 150
+    ad_cost_ratio: float = 30.0
+    consultant_fee: float = 60
+    production_cost: float = 30
+    other_fixed_cost: float = 20
+    peak_months: tuple = ()
+    peak_multiplier: float = 1.5
+    auto_mode: bool = False
+    preset: str = "デフォルト"
+    monthly_costs: CostSchedule = field(default_factory=CostSchedule)
+    granularity: str = "monthly"
+
+    @classmethod
+    def from_dict(cls, data):
+        """シナリオファイル等の辞書から作成する（未知のキーはエラー）"""
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"不明な設定項目です: {', '.join(sorted(unknown))}")
+
+        values = dict(data)
+        if isinstance(values.get("start_date"), str):
+            values["start_date"] = date.fromisoformat(values["start_date"])
+        if isinstance(values.get("monthly_costs"), dict):
+            values["monthly_costs"] = CostSchedule.from_dict(values["monthly_costs"])
+        if "peak_months" in values:
+            values["peak_months"] = tuple(int(str(m).rstrip("月")) for m in values["peak_months"])
+        return cls(**values)
+
+    def to_dict(self):
+        """シナリオファイルに書き出せる辞書に変換する"""
+        data = asdict(self)
+        data["start_date"] = self.start_date.isoformat()
+        data["monthly_costs"] = self.monthly_costs.to_dict()
+        data["peak_months"] = list(self.peak_months)
+        return data
+
+    def month_names(self):
+        return month_labels(self.start_date, self.months)
+
+    def timeline(self):
+        """結果の粒度に応じた期間インデックス"""
+        return build_timeline(self.start_date, self.months, self.granularity)
+
+    def base_costs(self):
+        """個別設定を除いた（プリセットの倍率だけを適用した）月別費用（形状 (months, 3)）"""
+        schedule = preset_costs(self.preset, self.months, self.start_date.month,
+                                self.consultant_fee, self.production_cost, self.base_ad_cost)
+        defaults = [self.consultant_fee, self.production_cost, self.base_ad_cost]
+        return schedule.resolve(self.months, defaults)
+
+    def resolved_costs(self):
+        """プリセットと個別設定を合成した月別費用（形状 (months, 3)）"""
+        return self.monthly_costs.resolve(self.months, self.base_costs())
+
+    def engine_params(self):
+        """simulate_arrays に渡すキーワード引数"""
+        costs = self.resolved_costs()
+        return {
+            "base_revenue": self.base_revenue,
+            "revenue_growth": self.revenue_growth,
+            "base_ad_cost": self.base_ad_cost,
+            "ad_cost_ratio": self.ad_cost_ratio,
+            "consultant_fee": self.consultant_fee,
+            "production_cost": self.production_cost,
+            "other_fixed_cost": self.other_fixed_cost,
+            "consultant_costs": costs[:, 0],
+            "production_costs": costs[:, 1],
+            "ad_costs": costs[:, 2],
+            "start_month": self.start_date.month,
+            "peak_months": self.peak_months,
+            "peak_multiplier": self.peak_multiplier if self.peak_months else 1.0,
+            "auto_mode": self.auto_mode,
+        }
+
+
+def run_simulation(inputs):
+    """入力からシミュレーション結果のDataFrameを作成する（1行が granularity の1期間）"""
+    timeline = inputs.timeline()
+    result = simulate_arrays(inputs.months, **inputs.engine_params(), timeline=timeline)
+    return to_frame(result, timeline.labels, timeline.decimals)
+
+
+def simulation_totals(inputs):
+    """全期間のKPI（kpi_totals の形式）
+
+    週次・日次でも月次の結果（月別に整数化した金額）から求めるため、粒度によらず同じ値になる。
+    期間ごとに丸めた週次・日次の金額を合計すると、丸めの分だけ月次の合計とずれる。
+    """
+    totals = kpi_totals(simulate_arrays(inputs.months, **inputs.engine_params()))
+    return {name: float(value) if name == "全体ROAS" else int(value) for name, value in totals.items()}
@@ -0,0 +1,141 @@
+"""処理時間の計測（スパン・カウンタ）と構造化ログ
+
+Profiler は1回の実行（Streamlitの再実行1回分）について、入れ子のスパンの所要時間とカウンタを記録する。
+MetricsRegistry は複数回の実行にまたがる値（再実行時間・AI応答時間など）を直近 window 件だけ保持し、
+p50 / p95 を求める。log_metrics は1回分の記録を1行のJSONとして logging に出力する。
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger("simulator.metrics")
+
+
+class Profiler:
+    """1回の実行のスパン（入れ子、同じパスは合算）とカウンタ"""
+
+    def __init__(self, name="rerun", started=None):
+        self.name = name
+        self.started = time.perf_counter() if started is None else started
+        self.spans = {}  # パス → {"depth", "seconds", "calls"}（開始順）
+        self.counters = defaultdict(int)
+        self._stack = []
+
+    def _entry(self, name):
+        path = "/".join([*self._stack, name])
+        return self.spans.setdefault(path, {"depth": len(self._stack), "seconds": 0.0, "calls": 0})
+
+    @contextmanager
+    def span(self, name):
+        """with ブロックの所要時間を、外側のスパンの子として記録する"""
+        entry = self._entry(name)
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+            self._stack.pop()
+
+    def record(self, name, seconds):
+        """別途計測した所要時間をスパンとして記録する（モジュール読み込みなど）"""
+        entry = self._entry(name)
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """フレーム表示用の行（開始順）。割合は全体の所要時間に対する比率で、計測外の時間も1行にまとめる"""
+        total = self.elapsed()
+        rows = [{"path": path, "name": path.rsplit("/", 1)[-1], "depth": entry["depth"],
+                 "ms": entry["seconds"] * 1000, "calls": entry["calls"],
+                 "share": entry["seconds"] / total if total > 0 else 0.0}
+                for path, entry in self.spans.items()]
+        untracked = total - sum(entry["seconds"] for entry in self.spans.values() if entry["depth"] == 0)
+        rows.append({"path": "(計測外)", "name": "(計測外)", "depth": 0, "ms": max(untracked, 0.0) * 1000,
+                     "calls": 0, "share": max(untracked, 0.0) / total if total > 0 else 0.0})
+        return rows
+
+    def to_record(self):
+        """構造化ログ用の辞書"""
+        return {
+            "event": self.name,
+            "duration_ms": round(self.elapsed() * 1000, 3),
+            "spans": {path: round(entry["seconds"] * 1000, 3) for path, entry in self.spans.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class MetricsRegistry:
+    """実行をまたいで値とカウンタを集計する（スレッドセーフ、値は直近 window 件）"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.counters = defaultdict(int)
+        self._values = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, name, value):
+        with self._lock:
+            self._values[name].append(value)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def percentiles(self, name):
+        """直近の値の件数・p50・p95・最大値"""
+        with self._lock:
+            values = np.array(self._values.get(name, ()), dtype=float)
+        if not len(values):
+            return {"count": 0, "p50": None, "p95": None, "max": None}
+        p50, p95 = np.percentile(values, [50, 95])
+        return {"count": len(values), "p50": float(p50), "p95": float(p95), "max": float(values.max())}
+
+    def snapshot(self):
+        """全カウンタと全指標のパーセンタイル"""
+        with self._lock:
+            counters = dict(self.counters)
+            names = list(self._values)
+        return {"counters": counters, **{name: self.percentiles(name) for name in names}}
+
+
+def log_metrics(profiler, metrics=None, log=None):
+    """1回分の記録をJSON1行で出力する
+
+    metrics を渡すと所要時間を "<event>_ms" として蓄積し、直近の p50 / p95 も記録に含める。
+    """
+    record = profiler.to_record()
+    if metrics is not None:
+        name = f"{profiler.name}_ms"
+        metrics.observe(name, record["duration_ms"])
+        stats = metrics.percentiles(name)
+        record["p50_ms"], record["p95_ms"] = round(stats["p50"], 3), round(stats["p95"], 3)
+    (log or logger).info(json.dumps(record, ensure_ascii=False))
+    return record
+
+
+def configure_logging(stream=None, level=logging.INFO):
+    """計測ログを stream（省略時は標準エラー）にメッセージだけで出力する（再設定すると出力先を置き換える）"""
+    for handler in [h for h in logger.handlers if getattr(h, "_metrics_handler", False)]:
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._metrics_handler = True
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,68 @@
+"""モンテカルロによるリスク分析
+
+成長率・ピーク倍率・広告効率を確率分布からサンプリングし、多数のパスを計算エンジンで
+一括評価する。パスはチャンクごとに計算し、保持するのは集計に必要な指標のみとする。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .engine import simulate_arrays
+
+BAND_METRICS = {"売上": "revenue", "利益": "profit", "ROAS": "roas"}
+
+
+def monte_carlo(months, paths=10000, growth_sd=2.0, peak_sd=0.2, ad_efficiency_sd=0.1,
+                seed=None, chunk_size=10000, percentiles=(5, 50, 95), on_chunk=None, **params):
+    """確率的シミュレーションを実行し、月別のパーセンタイル帯と赤字確率を返す
+
+    - 月次成長率: 平均 revenue_growth、標準偏差 growth_sd（%ポイント）の正規分布（パスごと）
+    - ピーク倍率: 平均 peak_multiplier、標準偏差 peak_sd の正規分布（1.0未満は1.0に丸める）
+    - 広告効率: 平均1、対数標準偏差 ad_efficiency_sd の対数正規分布（パス・月ごとに売上へ乗算）
+
+    使用メモリは保持する3指標（float32）とチャンク1つ分の計算領域に比例する。
+    同じ seed・paths・chunk_size であれば結果は再現される。
+    on_chunk(計算結果, 先頭パス番号) を指定すると、チャンクごとの全指標を受け取れる
+    （ResultWriter.write に渡してパス単位の結果をファイルへ書き出すなど）。
+    """
+    rng = np.random.default_rng(seed)
+    kept = {name: np.empty((paths, months), dtype=np.float32) for name in BAND_METRICS.values()}
+
+    for start in range(0, paths, chunk_size):
+        size = min(chunk_size, paths - start)
+        growth = rng.normal(params["revenue_growth"], growth_sd, (size, 1))
+        peak = np.maximum(rng.normal(params.get("peak_multiplier", 1.0), peak_sd, (size, 1)), 1.0)
+        efficiency = rng.lognormal(-ad_efficiency_sd ** 2 / 2, ad_efficiency_sd, (size, months))
+
+        result = simulate_arrays(months, **{
+            **params,
+            "revenue_growth": growth,
+            "peak_multiplier": peak,
+            "revenue_factor": efficiency,
+        })
+        for name, values in kept.items():
+            values[start:start + size] = result[name]
+        if on_chunk:
+            on_chunk(result, start)
+
+    q = np.asarray(percentiles, dtype=float)
+    profit = kept["profit"]
+    total_profit = profit.sum(axis=1, dtype=np.float64)
+    return {
+        "paths": paths,
+        "percentiles": q,
+        "bands": {label: np.percentile(kept[name], q, axis=0) for label, name in BAND_METRICS.items()},
+        "loss_probability": (profit < 0).mean(axis=0),
+        "total_profit": total_profit,
+        "total_loss_probability": float((total_profit < 0).mean()),
+    }
+
+
+def band_frame(mc_result, month_names, metric):
+    """指定指標のパーセンタイル帯を月別のDataFrameにする（列名は P5 / P50 / P95 など）"""
+    bands = mc_result["bands"][metric]
+    frame = pd.DataFrame({"月": list(month_names)})
+    for q, values in zip(mc_result["percentiles"], bands):
+        frame[f"P{q:g}"] = values
+    frame["赤字確率"] = mc_result["loss_probability"] * 100
+    return frame
@@ -0,0 +1,190 @@
+"""自動スケジューリングの予算配分最適化
+
+費目ごとの支出に対する売上の反応を逓減型（平方根）で近似し、KKT条件から得られる
+解（支出は係数の2乗に比例）で、期間全体の予算を費目 × 月に配分する。
+
+    売上増分[c, m] = 基準売上[m] × 弾力性[c] × (sqrt(支出[c, m] / 基準支出[c]) - 1)
+
+基準支出（現在の月額設定）では増分が0となり、基準売上が大きい月ほど限界効果が高い。
+この反応モデルは配分を決めるための目安（ヒューリスティック）で、計算エンジンの売上は支出に反応しない。
+
+計算エンジンでは広告費が「月別広告費」と「売上 × 広告費率」の大きい方になるため、
+売上連動の広告費を広告費の下限として配分し、配分総額が実際に計上される支出と一致するようにする。
+
+計算エンジンの入力（params）を渡すと、予算を変えた配分と現在の月別費用を候補として
+計算エンジン（売上には反応モデルの増分を掛ける）で評価し、優先モードの指標が最も良いものを返す。
+予算内であれば現在の月別費用も候補になるため、現在より悪い配分は返さない。
+"""
+
+import numpy as np
+
+from .engine import _divide, kpi_totals, simulate_arrays
+
+SPEND_CATEGORIES = ("consultant", "production", "ad_cost")
+
+# 基準支出での売上弾力性（支出を1%増やしたときの売上増加率の2倍に相当）。経験的な仮定値で、計算エンジンにはない
+# （画面では利用者が変更できる仮定として表示する）
+DEFAULT_ELASTICITIES = {"consultant": 0.05, "production": 0.03, "ad_cost": 0.12}
+
+# 各費目の月額の下限（基準月額に対する比率。契約上の最低額などを想定）
+DEFAULT_MINIMUM_RATIO = 0.5
+
+# 計算エンジンで比較する配分の予算（下限の合計から指定予算までの間の位置）
+CANDIDATE_BUDGETS = (0.0, 0.25, 0.5, 0.75, 1.0)
+# 費目と simulate_arrays の月別費用の引数名
+COST_ARGUMENTS = {"consultant": "consultant_costs", "production": "production_costs", "ad_cost": "ad_costs"}
+
+
+def _response_weights(baseline_revenue, reference_costs, elasticities):
+    """売上増分 = a * sqrt(支出) - 定数 としたときの係数 a（形状 (費目, 月)）"""
+    revenue = np.maximum(np.asarray(baseline_revenue, dtype=float), 0)[None, :]
+    elasticity = np.array([elasticities[c] for c in SPEND_CATEGORIES], dtype=float)[:, None]
+    reference = np.array([reference_costs[c] for c in SPEND_CATEGORIES], dtype=float)[:, None]
+    reference = np.broadcast_to(reference, (len(SPEND_CATEGORIES), revenue.shape[1]))
+    scale = np.divide(1.0, np.sqrt(reference), out=np.zeros(reference.shape), where=reference > 0)
+    return revenue * elasticity * scale
+
+
+def expected_uplift(allocation, baseline_revenue, reference_costs, elasticities=None):
+    """配分に対する月別の売上増分（反応モデルによる推定値）"""
+    elasticities = elasticities or DEFAULT_ELASTICITIES
+    a = _response_weights(baseline_revenue, reference_costs, elasticities)
+    reference = np.array([reference_costs[c] for c in SPEND_CATEGORIES], dtype=float)[:, None]
+    spend = np.stack([np.asarray(allocation[c], dtype=float) for c in SPEND_CATEGORIES])
+    uplift = a * (np.sqrt(spend) - np.sqrt(reference))
+    return uplift.sum(axis=0)
+
+
+def _fill(weights, floor, budget, cap=np.inf, required=None):
+    """支出 = max(下限, weights * t) の合計が予算と一致する t を二分法で求めて配分する
+
+    合計は t について単調増加なので、区間 [0, budget / weights.sum()] を全要素まとめて
+    二分探索する。cap を指定すると t はそれ以下に制限される（予算を使い切らない）。
+    下限の合計が予算を超える場合は、必須の支出 required（既定は0）を残して下限を縮小する
+    （required だけで予算を超える場合は required をそのまま返す）。
+    """
+    if floor.sum() >= budget:
+        required = np.zeros_like(floor) if required is None else required
+        optional = floor - required
+        if required.sum() >= budget or optional.sum() <= 0:
+            return required.copy()
+        return required + optional * ((budget - required.sum()) / optional.sum())
+
+    low, high = 0.0, min(budget / weights.sum(), cap)
+    if np.maximum(floor, weights * high).sum() <= budget:
+        return np.maximum(floor, weights * high)
+    for _ in range(60):
+        mid = (low + high) / 2
+        if np.maximum(floor, weights * mid).sum() > budget:
+            high = mid
+        else:
+            low = mid
+    return np.maximum(floor, weights * low)
+
+
+def evaluate_schedules(params, allocations, baseline_revenue, reference_costs, elasticities=None):
+    """配分の候補（形状 (候補, 費目, 月)）を計算エンジンで評価する
+
+    計算エンジンの売上は支出に反応しないため、反応モデルによる売上増分を revenue_factor として掛ける。
+    戻り値は simulate_arrays の結果（形状 (候補, 月)）。
+    """
+    allocations = np.asarray(allocations, dtype=float)
+    revenue = np.asarray(baseline_revenue, dtype=float)
+    uplift = np.stack([expected_uplift(dict(zip(SPEND_CATEGORIES, candidate)), revenue, reference_costs, elasticities)
+                       for candidate in allocations])
+    costs = {COST_ARGUMENTS[c]: allocations[:, k] for k, c in enumerate(SPEND_CATEGORIES)}
+    return simulate_arrays(revenue.shape[-1], **{**params, **costs, "revenue_factor": 1 + _divide(uplift, revenue)})
+
+
+def _score(result, priority_mode):
+    """優先モードの指標（大きいほど良い）"""
+    if priority_mode == "利益最大化":
+        return kpi_totals(result)["総利益"].astype(float)
+    if priority_mode == "売上成長重視":
+        return kpi_totals(result)["総売上"].astype(float)
+    # リスク最小化: 利益率の標準偏差が小さいほど良い
+    return -np.std(result["profit_margin"], axis=-1, ddof=1)
+
+
+def _floors(baseline_revenue, reference_costs, minimum_ratio, ad_cost_ratio):
+    """各費目 × 月の支出の下限と、そのうち必須の支出（売上連動の広告費）。形状 (費目, 月)"""
+    revenue = np.maximum(np.asarray(baseline_revenue, dtype=float), 0)
+    reference = np.array([reference_costs[c] for c in SPEND_CATEGORIES], dtype=float)[:, None]
+    required = np.zeros((len(SPEND_CATEGORIES), revenue.shape[-1]))
+    required[SPEND_CATEGORIES.index("ad_cost")] = revenue * float(ad_cost_ratio) / 100
+    return np.maximum(np.maximum(reference, 0) * minimum_ratio, required), required
+
+
+def optimize_schedule(baseline_revenue, reference_costs, budget, priority_mode, elasticities=None,
+                      minimum_ratio=DEFAULT_MINIMUM_RATIO, ad_cost_ratio=0.0, params=None):
+    """優先モードに応じて予算を費目 × 月に配分する
+
+    baseline_revenue は現行設定でのシミュレーション売上（月別）、reference_costs は
+    費目ごとの基準月額、budget は期間全体の予算（万円）。各費目の月額は基準月額の
+    minimum_ratio 倍を下限とし、広告費は売上連動の広告費（baseline_revenue × ad_cost_ratio / 100）
+    も下限とする（計算エンジンはこれを下回る広告費を計上しないため）。
+
+    - 利益最大化: 売上増分 - 支出 を最大化（限界効果が1を下回る分は使わない）
+    - 売上成長重視: 予算を使い切って売上増分を最大化
+    - リスク最小化: 支出 / 売上 の比率をできるだけ全月で揃え、利益率の変動を抑える
+
+    戻り値は費目ごとの月別支出と、反応モデルによる月別売上増分（目安）の辞書。
+    売上連動の広告費だけで予算を超える場合、配分総額は予算を超える。
+
+    params（simulate_arrays のキーワード引数。月別費用は現在の設定）を渡すと、下限の合計から予算までの
+    間で予算を変えた配分（CANDIDATE_BUDGETS）と現在の月別費用を evaluate_schedules で評価し、
+    優先モードの指標が最も良いものを返す（予算を超える現在の月別費用は比較しない）。戻り値には
+    計算エンジンでのKPI（"totals"）と現在の月別費用でのKPI（"current_totals"）が加わる。
+    """
+    elasticities = elasticities or DEFAULT_ELASTICITIES
+    if params is not None:
+        return _best_schedule(baseline_revenue, reference_costs, budget, priority_mode, elasticities,
+                              minimum_ratio, ad_cost_ratio, params)
+    a = _response_weights(baseline_revenue, reference_costs, elasticities)
+    floor, required = _floors(baseline_revenue, reference_costs, minimum_ratio, ad_cost_ratio)
+    weights = a ** 2
+
+    if weights.sum() == 0 or budget <= 0:
+        allocation = required if budget <= 0 else _fill(np.ones_like(a), floor, budget, cap=0.0, required=required)
+    elif priority_mode == "利益最大化":
+        # 限界効果 a / (2 * sqrt(支出)) が1となる (a/2)^2 を上限に、予算内で配分
+        allocation = _fill(weights, floor, budget, cap=0.25, required=required)
+    elif priority_mode == "売上成長重視":
+        # 限界効果が全要素で等しくなるよう a^2 に比例して配分
+        allocation = _fill(weights, floor, budget, required=required)
+    else:  # リスク最小化
+        category_share = weights.sum(axis=1, keepdims=True) / weights.sum()
+        revenue = np.maximum(np.asarray(baseline_revenue, dtype=float), 0)[None, :]
+        allocation = _fill(category_share * revenue, floor, budget, required=required)
+
+    schedule = {c: allocation[k] for k, c in enumerate(SPEND_CATEGORIES)}
+    schedule["expected_uplift"] = expected_uplift(schedule, baseline_revenue, reference_costs, elasticities)
+    return schedule
+
+
+def _best_schedule(baseline_revenue, reference_costs, budget, priority_mode, elasticities, minimum_ratio,
+                   ad_cost_ratio, params):
+    """予算を変えた配分と現在の月別費用を計算エンジンで比べ、最も良いものを返す"""
+    minimum = _floors(baseline_revenue, reference_costs, minimum_ratio, ad_cost_ratio)[0].sum()
+    budgets = [minimum + (budget - minimum) * ratio for ratio in CANDIDATE_BUDGETS] if budget > minimum else [budget]
+    candidates = [optimize_schedule(baseline_revenue, reference_costs, candidate_budget, priority_mode, elasticities,
+                                    minimum_ratio, ad_cost_ratio) for candidate_budget in budgets]
+    allocations = [np.stack([candidate[c] for c in SPEND_CATEGORIES]) for candidate in candidates]
+    months = np.shape(baseline_revenue)[-1]
+    current = np.stack([np.broadcast_to(np.asarray(params[COST_ARGUMENTS[c]], dtype=float), (months,))
+                        for c in SPEND_CATEGORIES])
+    allocations.append(current)
+
+    result = evaluate_schedules(params, allocations, baseline_revenue, reference_costs, elasticities)
+    score = _score(result, priority_mode)
+    # 予算を超える現在の月別費用は候補にしない（予算を減らした場合など）
+    if current.sum() > budget:
+        score[-1] = -np.inf
+    best = int(np.argmax(score))
+
+    totals = kpi_totals(result)
+    schedule = {c: allocations[best][k] for k, c in enumerate(SPEND_CATEGORIES)}
+    schedule["expected_uplift"] = expected_uplift(schedule, baseline_revenue, reference_costs, elasticities)
+    schedule["totals"] = {name: values[best] for name, values in totals.items()}
+    schedule["current_totals"] = {name: values[-1] for name, values in totals.items()}
+    return schedule
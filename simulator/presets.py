@@ -0,0 +1,104 @@
+"""業界・イベント別プリセット
+
+各プリセットは暦月（1月〜12月）ごとの費用倍率を持つ。
+"""
+
+import numpy as np
+
+from .engine import calendar_months
+from .schedule import CostSchedule
+
+PRESETS = {
+    "デフォルト": {
+        "description": "標準的な設定",
+        "consultant_multipliers": [1.0] * 12,
+        "production_multipliers": [1.0] * 12,
+        "ad_multipliers": [1.0] * 12
+    },
+    "EC・小売業": {
+        "description": "EC・小売業向け（年末商戦、夏物・冬物シーズン対応）",
+        "consultant_multipliers": [1.2, 1.0, 1.0, 1.1, 1.0, 1.0, 1.1, 1.0, 1.0, 1.1, 1.3, 1.5],
+        "production_multipliers": [1.3, 0.8, 0.9, 1.2, 0.9, 1.0, 1.2, 0.9, 1.0, 1.2, 1.4, 1.6],
+        "ad_multipliers": [1.4, 0.7, 0.8, 1.3, 0.8, 0.9, 1.3, 0.8, 0.9, 1.3, 1.5, 1.8]
+    },
+    "旅行・レジャー": {
+        "description": "旅行・レジャー業界（GW、夏休み、年末年始ピーク）",
+        "consultant_multipliers": [1.3, 1.0, 1.2, 1.4, 1.5, 1.0, 1.6, 1.6, 1.0, 1.0, 1.0, 1.4],
+        "production_multipliers": [1.4, 0.9, 1.3, 1.5, 1.6, 0.9, 1.7, 1.7, 0.9, 0.9, 0.9, 1.5],
+        "ad_multipliers": [1.5, 0.8, 1.4, 1.6, 1.7, 0.8, 1.8, 1.8, 0.8, 0.8, 0.8, 1.6]
+    },
+    "BtoB": {
+        "description": "BtoB企業（年度末、四半期末強化）",
+        "consultant_multipliers": [1.0, 1.0, 1.4, 1.0, 1.0, 1.2, 1.0, 1.0, 1.2, 1.0, 1.0, 1.3],
+        "production_multipliers": [1.0, 1.0, 1.5, 1.0, 1.0, 1.3, 1.0, 1.0, 1.3, 1.0, 1.0, 1.4],
+        "ad_multipliers": [1.0, 1.0, 1.6, 1.0, 1.0, 1.4, 1.0, 1.0, 1.4, 1.0, 1.0, 1.5]
+    },
+    "スタートアップ": {
+        "description": "スタートアップ企業（資金調達時期考慮）",
+        "consultant_multipliers": [1.5, 1.0, 1.0, 1.2, 1.0, 1.0, 1.0, 1.0, 1.3, 1.0, 1.0, 1.0],
+        "production_multipliers": [1.6, 1.0, 1.0, 1.3, 1.0, 1.0, 1.0, 1.0, 1.4, 1.0, 1.0, 1.0],
+        "ad_multipliers": [1.7, 1.0, 1.0, 1.4, 1.0, 1.0, 1.0, 1.0, 1.5, 1.0, 1.0, 1.0]
+    }
+}
+
+
+MULTIPLIER_KEYS = ("consultant_multipliers", "production_multipliers", "ad_multipliers")
+
+
+def compile_preset(preset):
+    """プリセット定義を形状 (12, 3) の倍率行列（行は1月〜12月、列は費目）に変換する"""
+    matrix = np.column_stack([np.asarray(preset[key], dtype=float) for key in MULTIPLIER_KEYS])
+    if matrix.shape != (12, len(MULTIPLIER_KEYS)):
+        raise ValueError("プリセットの倍率は費目ごとに12か月分が必要です")
+    return matrix
+
+
+# 組み込みプリセットの倍率行列（読み込み時に一度だけ作成）
+_MATRICES = {name: compile_preset(preset) for name, preset in PRESETS.items()}
+
+
+def register_preset(name, consultant_multipliers, production_multipliers, ad_multipliers,
+                    description="", yoy_drift=0.0):
+    """ユーザー定義のプリセットを登録する"""
+    preset = {
+        "description": description,
+        "consultant_multipliers": list(consultant_multipliers),
+        "production_multipliers": list(production_multipliers),
+        "ad_multipliers": list(ad_multipliers),
+        "yoy_drift": yoy_drift,
+    }
+    _MATRICES[name] = compile_preset(preset)
+    PRESETS[name] = preset
+    return preset
+
+
+def preset_multipliers(preset, months, start_month, yoy_drift=None):
+    """開始月に合わせた月別の費用倍率（形状 (months, 3)）を返す
+
+    preset はプリセット名または PRESETS と同じ形式の定義。12か月の倍率行列を暦月で
+    並べ替えて期間全体に繰り返し、yoy_drift（%、費目ごとのリストも可）が指定されていれば
+    開始から1年経過するごとに倍率を (1 + yoy_drift / 100) 倍する。yoy_drift を省略すると
+    定義の "yoy_drift" を使う。
+    """
+    if isinstance(preset, str):
+        matrix, definition = _MATRICES[preset], PRESETS[preset]
+    else:
+        matrix, definition = compile_preset(preset), preset
+    if yoy_drift is None:
+        yoy_drift = definition.get("yoy_drift", 0.0)
+
+    multipliers = matrix[calendar_months(start_month, months) - 1]
+    drift = np.asarray(yoy_drift, dtype=float)
+    if np.any(drift != 0):
+        years = (np.arange(months) // 12)[:, None]
+        multipliers = multipliers * (1 + drift / 100) ** years
+    return multipliers
+
+
+def preset_costs(preset, months, start_month, consultant_base, production_base, ad_base, yoy_drift=None):
+    """プリセットの倍率を基準費用に掛けた月別費用スケジュール（期間全体）を返す"""
+    if isinstance(preset, str) and preset not in PRESETS:
+        return CostSchedule()
+
+    base = np.array([consultant_base, production_base, ad_base], dtype=float)
+    return CostSchedule(np.trunc(base * preset_multipliers(preset, months, start_month, yoy_drift)))
@@ -0,0 +1,119 @@
+"""AI最適化のプロンプト作成（トークン数の上限に合わせた要約）
+
+月別の全データではなく、集計値・注目すべき月・区間ごとに集約した推移を送る。
+推定トークン数が上限を超える場合は、推移の点数と注目月の件数を減らして収める。
+"""
+
+import numpy as np
+
+from .export import summarize
+
+DEFAULT_PROMPT_BUDGET = 1200
+# 推移は最大この点数まで（月数がこれより多い場合は区間ごとに集約）
+MAX_SERIES_POINTS = 24
+MAX_ANOMALIES = 10
+# 結果の粒度ごとの期間の数え方
+PERIOD_UNITS = {"monthly": "か月", "weekly": "週", "daily": "日"}
+
+RESPONSE_FORMAT = """以下のJSON形式で回答してください:
+[
+    {
+        "月": "対象月または全期間",
+        "施策": "具体的な施策名",
+        "現在値": "現在の状況",
+        "推奨値": "推奨する変更内容",
+        "期待効果": "期待される効果",
+        "理由": "提案理由"
+    }
+]"""
+
+
+def estimate_tokens(text):
+    """トークン数の概算（英数字は4文字で1トークン、日本語などは1文字1トークンとみなす）"""
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return int(np.ceil(ascii_chars / 4)) + (len(text) - ascii_chars)
+
+
+def _summary_lines(df, granularity="monthly"):
+    kpis = summarize(df)
+    margin = df["利益率"]
+    return [
+        f"- 期間: {df['月'].iloc[0]}〜{df['月'].iloc[-1]}（{len(df)}{PERIOD_UNITS[granularity]}）",
+        f"- 総売上: {kpis['総売上']}万円 / 総費用: {kpis['総費用']}万円 / 総利益: {kpis['総利益']}万円",
+        f"- 全体ROAS: {kpis['全体ROAS']:.0f}% / 平均ROAS: {df['ROAS'].mean():.1f}%",
+        f"- 利益率: 平均{margin.mean():.1f}% / 最小{margin.min():.1f}% / 最大{margin.max():.1f}% / "
+        f"標準偏差{margin.std():.1f}%",
+        f"- 赤字月数: {kpis['赤字月数']}",
+    ]
+
+
+def _anomaly_lines(df, limit):
+    """赤字の月（赤字額の大きい順）と、ROASや利益率が平均から大きく外れた月"""
+    findings = []
+    for i in np.flatnonzero(df["利益"] < 0):
+        row = df.iloc[i]
+        findings.append(((1, -row["利益"]), i, f"{row['月']}: 赤字（利益 {row['利益']}万円）"))
+    for column in ("ROAS", "利益率"):
+        values = df[column]
+        std = values.std()
+        if not std > 0:
+            continue
+        z = (values - values.mean()) / std
+        for i in np.flatnonzero(np.abs(z) >= 2):
+            direction = "高い" if z.iloc[i] > 0 else "低い"
+            findings.append(((0, abs(z.iloc[i])), i, f"{df['月'].iloc[i]}: {column}が{direction}（{values.iloc[i]:.1f}%）"))
+    findings.sort(key=lambda f: (-f[0][0], -f[0][1], f[1]))
+    return [f"- {text}" for _, _, text in findings[:limit]]
+
+
+def _series_lines(df, points):
+    """売上・利益は区間合計、ROASは区間の売上÷広告費で points 点に集約した推移"""
+    buckets = np.array_split(np.arange(len(df)), min(points, len(df)))
+    lines = ["月, 売上, 利益, ROAS"]
+    for rows in buckets:
+        part = df.iloc[rows]
+        label = part["月"].iloc[0] if len(part) == 1 else f"{part['月'].iloc[0]}〜{part['月'].iloc[-1]}"
+        ad_cost = part["広告費"].sum()
+        roas = part["売上"].sum() / ad_cost * 100 if ad_cost > 0 else 0
+        lines.append(f"{label}, {part['売上'].sum()}, {part['利益'].sum()}, {roas:.0f}")
+    return lines
+
+
+def _render(scenarios, business_goals, points, anomalies, granularity):
+    sections = [f"以下のビジネスシミュレーションデータを分析し、{business_goals}のための具体的な最適化提案を3つ提示してください。"]
+    for name, df in scenarios.items():
+        heading = "データサマリー" if name is None else f"シナリオ「{name}」"
+        sections.append("\n".join([f"{heading}:", *_summary_lines(df, granularity)]))
+        anomaly_lines = _anomaly_lines(df, anomalies) if anomalies else []
+        if anomaly_lines:
+            sections.append("\n".join(["注目すべき月:", *anomaly_lines]))
+        if points:
+            sections.append("\n".join([f"推移（{min(points, len(df))}区間に集約、金額は万円）:", *_series_lines(df, points)]))
+    sections.append(f"目標: {business_goals}")
+    sections.append(RESPONSE_FORMAT)
+    return "\n\n".join(sections)
+
+
+def build_prompt(data, business_goals, token_budget=DEFAULT_PROMPT_BUDGET, granularity="monthly"):
+    """推定トークン数が token_budget 以下になるよう要約したプロンプトを返す
+
+    data は結果DataFrame、または {シナリオ名: DataFrame} の辞書（複数シナリオの比較）。
+    granularity は結果の粒度（"monthly" / "weekly" / "daily"。期間の数え方に使う）。
+    上限に収まらない場合は推移の点数を半分ずつ減らし、次に注目月を減らす。
+    集計値だけでも上限を超える場合は、その最小のプロンプトを返す。
+    """
+    scenarios = dict(data) if isinstance(data, dict) else {None: data}
+    months = max(len(df) for df in scenarios.values())
+
+    points = min(months, MAX_SERIES_POINTS)
+    anomalies = MAX_ANOMALIES
+    while True:
+        prompt = _render(scenarios, business_goals, points, anomalies, granularity)
+        if estimate_tokens(prompt) <= token_budget or (points == 0 and anomalies == 0):
+            return prompt
+        if points > 3:
+            points //= 2
+        elif points:
+            points = 0
+        else:
+            anomalies //= 2
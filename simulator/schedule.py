@@ -0,0 +1,172 @@
+"""月別費用スケジュール
+
+月 × 費目の配列に個別設定値を保持し、個別設定の有無をマスクで管理する。個別設定の
+ない月は resolve() 時にデフォルト値（基本設定の月額）で補う。
+"""
+
+import numpy as np
+
+COST_CATEGORIES = ("consultant", "production", "ad_cost")
+
+
+def _index(category):
+    return COST_CATEGORIES.index(category)
+
+
+class CostSchedule:
+    """月 × 費目（コンサル費・制作費・広告費）の費用スケジュール
+
+    values は形状 (月数, 3) の設定値、overridden は個別設定済みかどうかのマスク。
+    月数は必要に応じて自動で伸び、期間を変えても既存の設定は保持される。
+    書き換えた月は履歴に記録し、copy() したスケジュールとの差分を changed_since() で求められる。
+    """
+
+    def __init__(self, values=None, overridden=None):
+        if values is None:
+            values = np.zeros((0, len(COST_CATEGORIES)))
+        self.values = np.array(values, dtype=float).reshape(-1, len(COST_CATEGORIES))
+        if overridden is None:
+            overridden = np.ones(self.values.shape, dtype=bool)
+        self.overridden = np.array(overridden, dtype=bool).reshape(self.values.shape)
+        # 書き換えた月の履歴（copy() したスケジュールと共有し、分岐したら複製する）
+        self._history = []
+        self._version = 0
+
+    @property
+    def months(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        if not isinstance(other, CostSchedule):
+            return NotImplemented
+        months = max(self.months, other.months)
+        return np.array_equal(self.resolve(months, np.nan), other.resolve(months, np.nan), equal_nan=True)
+
+    def __repr__(self):
+        return f"CostSchedule(months={self.months}, overridden={int(self.overridden.sum())})"
+
+    def copy(self):
+        schedule = CostSchedule(self.values, self.overridden)
+        schedule._history, schedule._version = self._history, self._version
+        return schedule
+
+    @property
+    def revision(self):
+        """現在の状態を表すトークン（changed_since に渡す）"""
+        return self._history, self._version
+
+    def changed_since(self, revision):
+        """revision 以降に書き換えた月のインデックス（同じ履歴にない場合は None）"""
+        history, version = revision
+        if history is not self._history or version > self._version:
+            return None
+        changes = self._history[version:self._version]
+        if not changes:
+            return np.array([], dtype=np.intp)
+        return np.unique(np.concatenate(changes))
+
+    def _touch(self, rows):
+        if len(self._history) != self._version:
+            self._history = self._history[:self._version]
+        self._history.append(np.asarray(rows, dtype=np.intp).ravel())
+        self._version += 1
+
+    def _ensure(self, months):
+        if months > self.months:
+            extra = months - self.months
+            self.values = np.vstack([self.values, np.zeros((extra, len(COST_CATEGORIES)))])
+            self.overridden = np.vstack([self.overridden, np.zeros((extra, len(COST_CATEGORIES)), dtype=bool)])
+
+    def resolve(self, months, defaults):
+        """形状 (months, 3) の費用配列を返す（個別設定のない月は defaults）"""
+        resolved = np.empty((months, len(COST_CATEGORIES)))
+        resolved[:] = np.asarray(defaults, dtype=float)
+        n = min(months, self.months)
+        np.copyto(resolved[:n], self.values[:n], where=self.overridden[:n])
+        return resolved
+
+    def resolve_rows(self, rows, defaults):
+        """resolve() の rows 月分だけを返す（defaults は形状 (len(rows), 3)）"""
+        resolved = np.array(defaults, dtype=float).reshape(len(rows), len(COST_CATEGORIES))
+        rows = np.asarray(rows, dtype=np.intp)
+        inside = rows < self.months
+        resolved[inside] = np.where(self.overridden[rows[inside]], self.values[rows[inside]], resolved[inside])
+        return resolved
+
+    def column(self, category, months, default):
+        """1費目分の月別費用を返す"""
+        return self.resolve(months, np.full(len(COST_CATEGORIES), default))[:, _index(category)]
+
+    # --- 個別・一括の書き換え ---
+
+    def set(self, category, month, value):
+        self._ensure(month + 1)
+        self.values[month, _index(category)] = value
+        self.overridden[month, _index(category)] = True
+        self._touch(month)
+
+    def clear(self, category=None, month=None):
+        """個別設定を解除する（引数省略時は全体）"""
+        if month is not None and month >= self.months:
+            return
+        rows = slice(None) if month is None else month
+        columns = slice(None) if category is None else _index(category)
+        self.overridden[rows, columns] = False
+        self._touch(np.arange(self.months) if month is None else month)
+
+    def set_column(self, category, values, start=0):
+        """start 月目以降に月別の値を一括設定する"""
+        values = np.asarray(values, dtype=float)
+        self._ensure(start + len(values))
+        self.values[start:start + len(values), _index(category)] = values
+        self.overridden[start:start + len(values), _index(category)] = True
+        self._touch(np.arange(start, start + len(values)))
+
+    def set_all(self, category, value, months):
+        """全月に同じ値を設定する"""
+        self.set_column(category, np.full(months, value, dtype=float))
+
+    def scale(self, category, factor, months, default):
+        """全月の費用（デフォルト値の月も含む）に倍率を掛ける"""
+        self.set_column(category, np.trunc(self.column(category, months, default) * factor))
+
+    def fill_down(self, category, start, months, default):
+        """start 月目の値を以降の月にコピーする"""
+        value = self.column(category, months, default)[start]
+        self.set_column(category, np.full(months - start - 1, value), start=start + 1)
+
+    def apply(self, costs):
+        """形状 (月数, 3) の費用配列を先頭の月から個別設定として書き込む（プリセット適用など）"""
+        costs = np.asarray(costs, dtype=float).reshape(-1, len(COST_CATEGORIES))
+        self._ensure(len(costs))
+        self.values[:len(costs)] = costs
+        self.overridden[:len(costs)] = True
+        self._touch(np.arange(len(costs)))
+
+    def merged(self, other):
+        """other の個別設定を優先して重ねたスケジュールを返す"""
+        result = CostSchedule(self.values, self.overridden)
+        result._ensure(other.months)
+        n = other.months
+        np.copyto(result.values[:n], other.values, where=other.overridden)
+        result.overridden[:n] |= other.overridden
+        return result
+
+    # --- 旧形式（consultant_{i} などの文字列キー）との変換 ---
+
+    @classmethod
+    def from_dict(cls, mapping):
+        schedule = cls()
+        for key, value in mapping.items():
+            category, _, month = key.rpartition("_")
+            if category not in COST_CATEGORIES or not month.isdigit():
+                raise ValueError(f"月別費用のキーが不正です: {key}")
+            schedule.set(category, int(month), value)
+        return schedule
+
+    def to_dict(self):
+        mapping = {}
+        for month, column in zip(*np.nonzero(self.overridden)):
+            value = float(self.values[month, column])
+            mapping[f"{COST_CATEGORIES[column]}_{month}"] = int(value) if value.is_integer() else value
+        return mapping
@@ -0,0 +1,99 @@
+"""入力の感度分析（トルネードチャート用）
+
+各入力を基準値から ±step（比率）だけ動かしたシナリオと基準シナリオをシナリオ軸に並べ、
+計算エンジンで1回の配列演算として評価する。指標の変化幅と弾力性（入力を1%動かしたときの
+指標の変化率）を求める。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .engine import _divide, simulate_arrays
+from .goalseek import GOAL_METRICS
+
+# 感度を調べる入力: 表示名・対応する月別費用の引数
+# 月別費用のある項目は、プリセット倍率・個別設定を含む月別費用を比例で拡大縮小する。
+# "preset" はプリセット倍率の季節変動の強さ（各月の倍率と1の差）を拡大縮小する。
+SENSITIVITY_INPUTS = {
+    "base_revenue": {"label": "初月売上"},
+    "revenue_growth": {"label": "月次成長率"},
+    "peak_multiplier": {"label": "ピーク倍率"},
+    "ad_cost_ratio": {"label": "広告費率"},
+    "base_ad_cost": {"label": "基本広告費", "monthly": "ad_costs"},
+    "consultant_fee": {"label": "コンサル費", "monthly": "consultant_costs"},
+    "production_cost": {"label": "制作費", "monthly": "production_costs"},
+    "other_fixed_cost": {"label": "その他固定費"},
+    "preset": {"label": "プリセット倍率（季節変動の強さ）"},
+}
+
+_COST_INPUTS = {info["monthly"]: name for name, info in SENSITIVITY_INPUTS.items() if "monthly" in info}
+
+
+def _perturbed_params(months, params, names, factors):
+    """基準シナリオ（1行目）と、各入力を factors 倍したシナリオを積み重ねた引数"""
+    rows = 1 + len(names)
+    stacked = dict(params)
+    for name in ("base_revenue", "revenue_growth", "peak_multiplier", "ad_cost_ratio", "other_fixed_cost",
+                 *_COST_INPUTS.values()):
+        stacked[name] = np.full((rows, 1), float(params[name]))
+    for monthly, base in _COST_INPUTS.items():
+        costs = params.get(monthly)
+        costs = np.full(months, float(params[base])) if costs is None else np.asarray(costs, dtype=float)
+        stacked[monthly] = np.tile(costs, (rows, 1))
+
+    for row, (name, factor) in enumerate(zip(names, factors), start=1):
+        monthly = SENSITIVITY_INPUTS[name].get("monthly")
+        if name == "preset":
+            for monthly_name, base in _COST_INPUTS.items():
+                base_value = float(params[base])
+                costs = stacked[monthly_name][row]
+                stacked[monthly_name][row] = base_value + (costs - base_value) * factor
+        elif monthly is not None:
+            stacked[monthly][row] *= factor
+        else:
+            stacked[name][row] *= factor
+    return stacked
+
+
+def run_sensitivity(months, params, metric="総利益", step=0.1, inputs=None):
+    """各入力を ±step 動かしたときの指標の変化を1回の配列演算で求める
+
+    params は simulate_arrays の引数（1シナリオ分）、metric は GOAL_METRICS の名前、
+    inputs は調べる入力名のリスト（省略時は SENSITIVITY_INPUTS の全て）。
+    戻り値は "names"、"baseline"（基準の指標）、入力ごとの "low" / "high"（-step / +step の指標）、
+    "elasticity"（中心差分による弾力性。符号は入力を増やしたときの指標の向きで、基準の指標が0なら NaN）
+    を持つ辞書。
+    """
+    if metric not in GOAL_METRICS:
+        raise ValueError(f"不明な指標です: {metric}（{', '.join(GOAL_METRICS)} のいずれか）")
+    names = list(SENSITIVITY_INPUTS if inputs is None else inputs)
+    unknown = set(names) - set(SENSITIVITY_INPUTS)
+    if unknown:
+        raise ValueError(f"感度を調べられない入力です: {', '.join(sorted(unknown))}")
+
+    # 行の並び: 基準, 入力1の-step, 入力1の+step, 入力2の-step, ...
+    factors = np.tile([1 - step, 1 + step], len(names))
+    stacked = _perturbed_params(months, params, np.repeat(names, 2), factors)
+    values = GOAL_METRICS[metric](simulate_arrays(months, **stacked))
+    baseline, low, high = values[0], values[1::2], values[2::2]
+    return {
+        "names": names,
+        "metric": metric,
+        "step": step,
+        "baseline": float(baseline),
+        "low": low,
+        "high": high,
+        "elasticity": _divide(high - low, 2 * step * abs(baseline), fallback=np.nan),
+    }
+
+
+def tornado_frame(result):
+    """感度分析の結果を、変化幅の大きい順の表（トルネードチャートの並び）にする"""
+    frame = pd.DataFrame({
+        "入力": [SENSITIVITY_INPUTS[name]["label"] for name in result["names"]],
+        "減少時": result["low"],
+        "増加時": result["high"],
+        "変化幅": np.abs(result["high"] - result["low"]),
+        "弾力性": result["elasticity"],
+    })
+    return frame.sort_values("変化幅", ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,202 @@
+"""シナリオライブラリ（SQLite）
+
+入力一式（SimulationInputs.to_dict）と計算済みの結果列を1シナリオ1行で保存し、再計算せずに開き直せる。
+一覧はクライアント・プリセット・開始日・保存日時のインデックスで引き、結果列（BLOB）は開くときだけ読む。
+WALモードで開くため、複数のセッション・プロセスから同時に読み書きできる。
+"""
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .export import summarize
+from .inputs import SimulationInputs
+
+DEFAULT_STORE_PATH = "scenarios.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    client TEXT NOT NULL,
+    name TEXT NOT NULL,
+    preset TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    months INTEGER NOT NULL,
+    saved_at TEXT NOT NULL,
+    total_revenue INTEGER NOT NULL,
+    total_profit INTEGER NOT NULL,
+    roas REAL NOT NULL,
+    inputs TEXT NOT NULL,
+    totals TEXT NOT NULL,
+    month_names TEXT NOT NULL,
+    result BLOB NOT NULL,
+    UNIQUE (client, name)
+);
+CREATE INDEX IF NOT EXISTS scenarios_client ON scenarios (client, saved_at);
+CREATE INDEX IF NOT EXISTS scenarios_preset ON scenarios (preset, saved_at);
+CREATE INDEX IF NOT EXISTS scenarios_start_date ON scenarios (start_date);
+CREATE INDEX IF NOT EXISTS scenarios_saved_at ON scenarios (saved_at);
+"""
+
+# 一覧の列名: テーブルの列
+LIST_COLUMNS = {
+    "ID": "id",
+    "クライアント": "client",
+    "シナリオ名": "name",
+    "プリセット": "preset",
+    "開始日": "start_date",
+    "期間": "months",
+    "保存日時": "saved_at",
+    "総売上": "total_revenue",
+    "総利益": "total_profit",
+    "全体ROAS": "roas",
+}
+
+
+@dataclass
+class SavedScenario:
+    """保存済みシナリオ（入力・結果・KPI）"""
+
+    id: int
+    client: str
+    name: str
+    preset: str
+    saved_at: str
+    inputs: SimulationInputs
+    frame: pd.DataFrame
+    totals: dict
+
+
+def _pack_columns(df):
+    """月ラベル以外の結果列を1つのバイト列にする（先頭にJSONのヘッダ: 列名・dtype）"""
+    columns = [(name, np.ascontiguousarray(df[name].to_numpy())) for name in df.columns if name != "月"]
+    header = json.dumps([[name, values.dtype.str] for name, values in columns], ensure_ascii=False).encode("utf-8")
+    return len(header).to_bytes(4, "little") + header + b"".join(values.tobytes() for _, values in columns)
+
+
+def _unpack_columns(blob, month_names):
+    size = int.from_bytes(blob[:4], "little")
+    header = json.loads(blob[4:4 + size].decode("utf-8"))
+    offset = 4 + size
+    columns = {"月": month_names}
+    for name, dtype in header:
+        dtype = np.dtype(dtype)
+        columns[name] = np.frombuffer(blob, dtype=dtype, count=len(month_names), offset=offset).copy()
+        offset += dtype.itemsize * len(month_names)
+    return pd.DataFrame(columns)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSONに変換できない値です: {type(value).__name__}")
+
+
+class ScenarioStore:
+    """シナリオの保存・一覧・読み込み（接続はスレッド間で共有し、書き込みはロックで直列化）"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = str(path)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+
+    def save(self, name, inputs, frame, totals=None, client="", preset=None):
+        """シナリオを保存してIDを返す（同じクライアント・シナリオ名なら上書き）
+
+        frame は結果DataFrame、totals は結果表示のKPI（省略時は frame から集計）。
+        preset はインデックス用のプリセット名で、省略時は inputs.preset（倍率定義の辞書なら "カスタム"）。
+        """
+        totals = summarize(frame) if totals is None else totals
+        if preset is None:
+            preset = inputs.preset if isinstance(inputs.preset, str) else "カスタム"
+        row = {
+            "client": client,
+            "name": name,
+            "preset": preset,
+            "start_date": inputs.start_date.isoformat(),
+            "months": inputs.months,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "total_revenue": int(totals["総売上"]),
+            "total_profit": int(totals["総利益"]),
+            "roas": float(totals["全体ROAS"]),
+            "inputs": json.dumps(inputs.to_dict(), ensure_ascii=False, default=_json_default),
+            "totals": json.dumps(totals, ensure_ascii=False, default=_json_default),
+            "month_names": json.dumps(list(frame["月"]), ensure_ascii=False),
+            "result": _pack_columns(frame),
+        }
+        columns = ", ".join(row)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in row if column not in ("client", "name"))
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                f"INSERT INTO scenarios ({columns}) VALUES ({', '.join('?' * len(row))}) "
+                f"ON CONFLICT (client, name) DO UPDATE SET {updates} RETURNING id",
+                list(row.values()),
+            )
+            return cursor.fetchone()[0]
+
+    def list(self, client=None, preset=None, start_from=None, start_to=None, limit=None):
+        """保存済みシナリオの一覧（新しい順のDataFrame、結果列は読まない）
+
+        client / preset は完全一致、start_from / start_to は開始日の範囲（date または ISO形式の文字列）。
+        """
+        conditions, params = [], []
+        for column, operator, value in [("client", "=", client), ("preset", "=", preset),
+                                        ("start_date", ">=", start_from), ("start_date", "<=", start_to)]:
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value if isinstance(value, str) else value.isoformat())
+        query = f"SELECT {', '.join(LIST_COLUMNS.values())} FROM scenarios"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY saved_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return pd.DataFrame([tuple(row) for row in rows], columns=list(LIST_COLUMNS))
+
+    def clients(self):
+        """保存済みのクライアント名（インデックスから取得）"""
+        with self._lock:
+            rows = self._connection.execute("SELECT DISTINCT client FROM scenarios ORDER BY client").fetchall()
+        return [row[0] for row in rows]
+
+    def load(self, scenario_id):
+        """保存済みシナリオを再計算せずに読み込む（存在しなければ KeyError）"""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM scenarios WHERE id = ?", (int(scenario_id),)).fetchone()
+        if row is None:
+            raise KeyError(f"シナリオが見つかりません: {scenario_id}")
+        return SavedScenario(
+            id=row["id"],
+            client=row["client"],
+            name=row["name"],
+            preset=row["preset"],
+            saved_at=row["saved_at"],
+            inputs=SimulationInputs.from_dict(json.loads(row["inputs"])),
+            frame=_unpack_columns(row["result"], json.loads(row["month_names"])),
+            totals=json.loads(row["totals"]),
+        )
+
+    def delete(self, scenario_id):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM scenarios WHERE id = ?", (int(scenario_id),))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,211 @@
+"""シミュレーション結果に対するルールベースの改善提案
+
+提案の条件は宣言的なルール（SUGGESTION_RULES / OPTIMIZATION_RULES）として登録する。
+各ルールは結果の列（形状 (..., 月) の配列）に対するベクトル化された条件と文面のテンプレートで、
+1シナリオの結果にも、スイープのようなシナリオ軸を持つ結果にもそのまま適用できる。
+
+ルールの条件 when(c, s) は、c に列名をキーとする配列、s に列の平均・標準偏差
+（形状 (..., 1)）を受け取る。scope が "month" のルールは月ごとの判定（形状 (..., 月)）を、
+"period" のルールは期間全体の判定（形状 (..., 1)）を返す。月ごとの判定がその月の値だけで
+決まるルールには local を指定する（差分更新で変わった月だけを判定し直せる）。
+"""
+
+import numpy as np
+
+from .engine import _to_int
+
+
+class ColumnStats:
+    """列の平均と標準偏差（pandas と同じ不偏標準偏差）を最終軸について求める"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def mean(self, name):
+        return np.mean(self.columns[name], axis=-1, keepdims=True)
+
+    def std(self, name):
+        values = np.asarray(self.columns[name], dtype=float)
+        if values.shape[-1] < 2:
+            return np.full(values.shape[:-1] + (1,), np.nan)
+        return np.std(values, axis=-1, ddof=1, keepdims=True)
+
+
+SUGGESTION_RULES = {
+    # ROASが低い月の特定
+    "low_roas": {
+        "scope": "month",
+        "when": lambda c, s: c["ROAS"] < s.mean("ROAS") - s.std("ROAS"),
+        "type": "警告",
+        "title": "ROAS改善が必要な月があります",
+        "detail": "{months}のROASが平均を大きく下回っています。広告費の見直しを検討してください。",
+        "impact": "高",
+    },
+    # 利益率の変動が大きい場合
+    "profit_margin_volatility": {
+        "scope": "period",
+        "when": lambda c, s: s.std("利益率") > 10,
+        "value": lambda c, s: s.std("利益率"),
+        "type": "注意",
+        "title": "利益率の変動が大きいです",
+        "detail": "利益率の標準偏差が{value:.1f}%です。費用配分の最適化により安定化が可能です。",
+        "impact": "中",
+    },
+    # 総費用が売上を上回る月
+    "loss": {
+        "scope": "month",
+        "local": True,
+        "when": lambda c, s: c["利益"] < 0,
+        "type": "警告",
+        "title": "赤字月があります",
+        "detail": "{months}で赤字になっています。緊急の費用見直しが必要です。",
+        "impact": "高",
+    },
+    # 広告費効率の最適化提案
+    "high_ad_ratio": {
+        "scope": "month",
+        "local": True,
+        "when": lambda c, s: c["広告費"] > c["売上"] * 0.4,
+        "type": "提案",
+        "title": "広告費最適化の機会",
+        "detail": "{months}の広告費率が40%を超えています。効率化により利益改善が見込めます。",
+        "impact": "中",
+    },
+}
+
+# ビジネス目標ごとの施策ルール（values で計算した値もテンプレートで参照できる）
+OPTIMIZATION_RULES = {
+    "利益最大化": [
+        # ROASが低い月の広告費を削減
+        {
+            "scope": "month",
+            "when": lambda c, s: c["ROAS"] < 200,
+            "values": {"推奨": lambda c, s: _to_int(c["広告費"] * 0.8), "効果": lambda c, s: _to_int(c["広告費"] * 0.2)},
+            "施策": "広告費削減",
+            "現在値": "{広告費}万円",
+            "推奨値": "{推奨}万円",
+            "期待効果": "利益+{効果}万円",
+            "理由": "ROAS {ROAS}%が低すぎます",
+        },
+    ],
+    "売上成長重視": [
+        # 利益率が高い月の広告費を増加
+        {
+            "scope": "month",
+            "when": lambda c, s: c["利益率"] > s.mean("利益率") + 5,
+            "values": {"推奨": lambda c, s: _to_int(c["広告費"] * 1.3), "効果": lambda c, s: _to_int(c["売上"] * 0.15)},
+            "施策": "広告費増額",
+            "現在値": "{広告費}万円",
+            "推奨値": "{推奨}万円",
+            "期待効果": "売上+{効果}万円",
+            "理由": "利益率{利益率}%で余裕があります",
+        },
+    ],
+    "リスク最小化": [
+        # 変動が大きい費用項目を安定化
+        {
+            "scope": "period",
+            "when": lambda c, s: s.std("利益率") > 10,
+            "values": {"標準偏差": lambda c, s: s.std("利益率")},
+            "月": "全期間",
+            "施策": "費用平準化",
+            "現在値": "利益率標準偏差 {標準偏差:.1f}%",
+            "推奨値": "各月の費用を平均値に近づける",
+            "期待効果": "リスク軽減",
+            "理由": "利益率の変動が大きすぎます",
+        },
+    ],
+}
+OPTIMIZATION_FIELDS = ("施策", "現在値", "推奨値", "期待効果", "理由")
+
+
+def result_columns(df):
+    """結果DataFrameを列名 → 配列の辞書にする（月ラベルを除く）"""
+    return {name: df[name].to_numpy() for name in df.columns if name != "月"}
+
+
+def _batch_shape(columns):
+    return np.shape(next(iter(columns.values())))[:-1]
+
+
+def evaluate_rules(columns, rules=None, stats=None, masks=None):
+    """全ルールの判定をまとめて行う
+
+    columns は列名 → 形状 (..., 月) の配列。戻り値はルール名 → {"fired": 形状 (...) の該当有無,
+    "months": 該当月のマスク（月ごとのルール）, "value": テンプレート用の値} の辞書。
+    stats / masks を渡すと、平均・標準偏差や local なルールの判定結果として使う（差分更新用）。
+    """
+    rules = SUGGESTION_RULES if rules is None else rules
+    stats = stats or ColumnStats(columns)
+    masks = masks or {}
+    batch = _batch_shape(columns)
+
+    evaluation = {}
+    for name, rule in rules.items():
+        if rule["scope"] == "month":
+            months = masks[name] if name in masks else rule["when"](columns, stats)
+            evaluation[name] = {"fired": np.any(months, axis=-1), "months": months, "value": None}
+        else:
+            fired = np.broadcast_to(rule["when"](columns, stats), batch + (1,))[..., 0]
+            value = rule["value"](columns, stats) if "value" in rule else None
+            if value is not None:
+                value = np.broadcast_to(value, batch + (1,))[..., 0]
+            evaluation[name] = {"fired": fired, "months": None, "value": value}
+    return evaluation
+
+
+def suggestion_flags(columns, rules=None):
+    """ルールごとの該当有無（形状 (...) の真偽値配列）。スイープ結果の一括チェックに使う"""
+    return {name: result["fired"] for name, result in evaluate_rules(columns, rules).items()}
+
+
+def render_suggestions(evaluation, month_names, rules=None, index=()):
+    """判定結果から1シナリオ分（index で指定）の改善提案を作る"""
+    rules = SUGGESTION_RULES if rules is None else rules
+    month_names = np.asarray(month_names, dtype=object)
+    suggestions = []
+    for name, rule in rules.items():
+        result = evaluation[name]
+        if not result["fired"][index]:
+            continue
+        fields = {}
+        if result["months"] is not None:
+            fields["months"] = ", ".join(month_names[result["months"][index]])
+        if result["value"] is not None:
+            fields["value"] = result["value"][index]
+        suggestions.append({
+            "type": rule["type"],
+            "title": rule["title"],
+            "detail": rule["detail"].format(**fields),
+            "impact": rule["impact"],
+        })
+    return suggestions
+
+
+def calculate_optimization_suggestions(df):
+    """結果表示タブの改善提案を作成する"""
+    return render_suggestions(evaluate_rules(result_columns(df)), df["月"])
+
+
+def rule_based_optimization(df, business_goals):
+    """ルールベースの最適化"""
+    rules = OPTIMIZATION_RULES.get(business_goals, OPTIMIZATION_RULES["リスク最小化"])
+    columns = result_columns(df)
+    stats = ColumnStats(columns)
+    month_names = df["月"].to_numpy()
+
+    optimizations = []
+    for rule in rules:
+        fired = rule["when"](columns, stats)
+        values = {key: np.broadcast_to(compute(columns, stats), np.shape(fired))
+                  for key, compute in rule.get("values", {}).items()}
+        if rule["scope"] == "month":
+            for i in np.flatnonzero(fired):
+                fields = {**{name: column[i] for name, column in columns.items()},
+                          **{key: value[i] for key, value in values.items()}}
+                optimizations.append({"月": month_names[i],
+                                      **{key: rule[key].format(**fields) for key in OPTIMIZATION_FIELDS}})
+        elif np.all(fired):
+            fields = {key: value.item() for key, value in values.items()}
+            optimizations.append({"月": rule["月"], **{key: rule[key].format(**fields) for key in OPTIMIZATION_FIELDS}})
+    return optimizations
@@ -0,0 +1,46 @@
+"""パラメータグリッドのシナリオスイープ
+
+全組み合わせをシナリオ軸に並べ、計算エンジンで (シナリオ × 月) の配列として一括評価する。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .engine import kpi_totals, simulate_arrays
+
+
+def run_sweep(months, grid, **params):
+    """パラメータグリッドの全組み合わせを1回の配列演算で評価する
+
+    grid は {simulate_arrays の引数名: 値のリスト} の辞書で、それ以外の引数は params で渡す。
+    戻り値の "values" には各シナリオのパラメータ値（長さ S）、"result" には形状
+    (S, months) の計算結果、"totals" にはシナリオ別のKPIが入る。
+    """
+    names = list(grid)
+    axes = [np.asarray(grid[name], dtype=float) for name in names]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    values = {name: grid_values.ravel() for name, grid_values in zip(names, mesh)}
+
+    swept = {name: column[:, None] for name, column in values.items()}
+    result = simulate_arrays(months, **{**params, **swept})
+
+    shape = (mesh[0].size, months) if mesh else (1, months)
+    result = {key: np.broadcast_to(array, shape) for key, array in result.items()}
+
+    return {
+        "names": names,
+        "shape": tuple(len(axis) for axis in axes),
+        "values": values,
+        "result": result,
+        "totals": kpi_totals(result),
+    }
+
+
+def to_grid(sweep_result, metric):
+    """シナリオ別のKPIをグリッドの形状（パラメータ数の次元）に戻す"""
+    return sweep_result["totals"][metric].reshape(sweep_result["shape"])
+
+
+def sweep_frame(sweep_result):
+    """シナリオごとのパラメータ値とKPIを1行ずつ並べたDataFrameを返す"""
+    return pd.DataFrame({**sweep_result["values"], **sweep_result["totals"]})
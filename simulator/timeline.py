@@ -0,0 +1,68 @@
+"""期間インデックス（月次・週次・日次）
+
+シミュレーション期間は開始日から暦で数えた months か月（各月は開始日の同じ日付から翌月の同じ日付の前日まで）。
+週次・日次では各日がどの月に属するか、その月の中で占める割合をあらかじめ配列（暦テーブル）にしておき、
+計算エンジンは月次と同じ月額を日に按分して、日を最終軸とする配列で一括計算する。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .engine import calendar_months, month_labels
+
+GRANULARITIES = {"monthly": "月次", "weekly": "週次", "daily": "日次"}
+
+
+def month_starts(start_date, months):
+    """開始日から k か月後の日付（k = 0..months、月末を超える日付はその月の末日）"""
+    first = np.datetime64(start_date, "M") + np.arange(months + 1)
+    length = ((first + 1).astype("datetime64[D]") - first.astype("datetime64[D]")).astype(int)
+    return first.astype("datetime64[D]") + np.minimum(start_date.day, length) - 1
+
+
+def _day_labels(days, suffix=""):
+    return [f"{s[:4]}年{s[5:7]}月{s[8:10]}日{suffix}" for s in np.datetime_as_string(days)]
+
+
+@dataclass
+class Timeline:
+    """期間インデックスと暦テーブル
+
+    labels は各期間の表示ラベル、calendar は各月の暦月（季節変動・プリセットの判定用。月次の結果と同じ）。
+    month_index / fraction は計算単位（月次は月、週次・日次は日）ごとの属する月（0始まり）と、
+    その月の中で占める割合（月額をこの割合で按分する）。bounds は日を週に合計するときの
+    各週の先頭位置（月次・日次は None）。
+    """
+
+    granularity: str
+    months: int
+    labels: list
+    calendar: np.ndarray
+    month_index: np.ndarray
+    fraction: np.ndarray
+    bounds: np.ndarray = None
+
+    @property
+    def decimals(self):
+        """金額の表示桁数（月次は従来どおり整数、週次・日次は小数1桁）"""
+        return None if self.granularity == "monthly" else 1
+
+
+def build_timeline(start_date, months, granularity="monthly"):
+    """開始日・期間（月数）・粒度から期間インデックスを作る"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"不明な粒度です: {granularity}（{', '.join(GRANULARITIES)} のいずれか）")
+    calendar = calendar_months(start_date.month, months)
+    if granularity == "monthly":
+        return Timeline(granularity, months, month_labels(start_date, months), calendar, np.arange(months),
+                        np.ones(months))
+
+    starts = month_starts(start_date, months)
+    days = np.arange(starts[0], starts[-1])
+    month_index = np.searchsorted(starts, days, side="right") - 1
+    tables = dict(calendar=calendar, month_index=month_index, fraction=1.0 / np.diff(starts).astype(int)[month_index])
+    if granularity == "daily":
+        return Timeline(granularity, months, _day_labels(days), **tables)
+    bounds = np.arange(0, len(days), 7)
+    return Timeline(granularity, months, _day_labels(days[bounds], "週"), bounds=bounds, **tables)
@@ -0,0 +1,79 @@
+"""AIクライアントのテスト（ローカルのスタブサーバーを使用）"""
+
+import subprocess
+import sys
+import threading
+from concurrent.futures import wait
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from simulator import AIClient, SimulationInputs, run_simulation, sample_optimizations
+from simulator.ai_stub import make_server
+
+
+@pytest.fixture
+def stub():
+    server = make_server(port=0, latency=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub):
+    host, port = stub.server_address[:2]
+    client = AIClient(api_key="dummy", base_url=f"http://{host}:{port}/v1", max_concurrency=2)
+    yield client
+    client.close()
+
+
+def result_frame(**overrides):
+    return run_simulation(SimulationInputs(start_date=date(2025, 4, 1), **overrides))
+
+
+def test_request_parses_stub_response(client):
+    assert client.request(result_frame(), "売上成長重視") == sample_optimizations("売上成長重視")
+
+
+def test_submit_caches_and_shares_in_flight_requests(client, stub):
+    df = result_frame()
+
+    first = client.submit(df, "利益最大化")
+    second = client.submit(df.copy(), "利益最大化")
+    assert second is first
+    assert not first.done()
+
+    assert first.result(timeout=5) == sample_optimizations("利益最大化")
+    cached = client.submit(df, "利益最大化")
+    assert cached.done() and cached.result() == first.result()
+    assert stub.requests == 1
+
+    # 目標・モデル・データが変われば別のリクエストになる
+    futures = [
+        client.submit(df, "リスク最小化"),
+        client.submit(df, "利益最大化", model="gpt-4"),
+        client.submit(result_frame(base_revenue=800), "利益最大化"),
+    ]
+    wait(futures, timeout=5)
+    assert stub.requests == 4
+    assert futures[0].result() == sample_optimizations("リスク最小化")
+
+
+def test_http_errors_surface_through_future(stub):
+    host, port = stub.server_address[:2]
+    client = AIClient(api_key="dummy", base_url=f"http://{host}:{port}/missing")
+    try:
+        with pytest.raises(RuntimeError, match="404"):
+            client.submit(result_frame(), "利益最大化").result(timeout=5)
+    finally:
+        client.close()
+
+
+def test_requests_is_loaded_only_when_client_is_created():
+    code = ("import sys, simulator; assert 'requests' not in sys.modules; "
+            "simulator.AIClient(api_key='dummy').close(); assert 'requests' in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent)
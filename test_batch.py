@@ -0,0 +1,68 @@
+"""クライアント別一括実行のテスト"""
+
+import json
+
+import pandas as pd
+
+from simulator import SimulationInputs, load_scenarios, run_batch, run_simulation
+from simulator.cli import main
+
+CLIENTS = [
+    {"client": "A商事", "base_revenue": 500, "preset": "BtoB"},
+    {"client": "B旅行", "base_revenue": 900, "revenue_growth": -2.0, "preset": "旅行・レジャー", "months": 24},
+    {"client": "C/ストア", "base_revenue": 200, "monthly_costs": {"ad_cost_0": 400}},
+]
+
+
+def write_jsonl(path, rows):
+    path.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\n", encoding="utf-8")
+
+
+def test_batch_matches_single_runs(tmp_path):
+    write_jsonl(tmp_path / "clients.jsonl", CLIENTS)
+    scenarios = load_scenarios(tmp_path / "clients.jsonl")
+
+    summary = run_batch(scenarios, tmp_path / "out", workers=2)
+
+    assert summary["クライアント"].tolist() == ["A商事", "B旅行", "C/ストア"]
+    for (client, data), row in zip(scenarios, summary.to_dict("records")):
+        expected = run_simulation(SimulationInputs.from_dict(data))
+        written = pd.read_csv(row["出力"], encoding="utf-8-sig")
+        assert row["総利益"] == expected["利益"].sum()
+        assert row["赤字月数"] == (expected["利益"] < 0).sum()
+        assert written["売上"].tolist() == expected["売上"].tolist()
+    assert (tmp_path / "out" / "summary.csv").exists()
+
+
+def test_directory_scenarios_use_file_names(tmp_path):
+    for name in ["x", "y"]:
+        (tmp_path / f"{name}.json").write_text(json.dumps({"base_revenue": 300}), encoding="utf-8")
+
+    assert [client for client, _ in load_scenarios(tmp_path)] == ["x", "y"]
+
+
+def test_failed_scenario_is_reported(tmp_path, capsys):
+    write_jsonl(tmp_path / "clients.jsonl", [CLIENTS[0], {"client": "bad", "unknown_field": 1}])
+
+    assert main(["batch", str(tmp_path / "clients.jsonl"), "-o", str(tmp_path / "out"), "--workers", "2"]) == 1
+
+    summary = pd.read_csv(tmp_path / "out" / "summary.csv", encoding="utf-8-sig")
+    assert summary.set_index("クライアント").loc["bad", "エラー"].startswith("不明な設定項目")
+    assert "A商事" in capsys.readouterr().out
+
+
+def test_duplicate_clients_do_not_overwrite_each_other(tmp_path):
+    rows = [{"client": "A商事", "base_revenue": 500}, {"client": "A商事", "base_revenue": 800},
+            {"client": "C/ストア", "base_revenue": 300}, {"client": "C_ストア", "base_revenue": 200},
+            {"client": "summary", "base_revenue": 400}]
+    write_jsonl(tmp_path / "clients.jsonl", rows)
+
+    summary = run_batch(load_scenarios(tmp_path / "clients.jsonl"), tmp_path / "out", workers=2)
+
+    outputs = [tmp_path / "out" / name for name in ["A商事.csv", "A商事_2.csv", "C_ストア.csv", "C_ストア_4.csv",
+                                                  "summary_5.csv"]]
+    assert summary["出力"].tolist() == [str(path) for path in outputs]
+    for row, path in zip(rows, outputs):
+        expected = run_simulation(SimulationInputs.from_dict({"base_revenue": row["base_revenue"]}))
+        assert pd.read_csv(path, encoding="utf-8-sig")["売上"].tolist() == expected["売上"].tolist()
+    assert len(pd.read_csv(tmp_path / "out" / "summary.csv", encoding="utf-8-sig")) == 5
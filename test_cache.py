@@ -0,0 +1,76 @@
+"""結果キャッシュのテスト"""
+
+from datetime import date
+
+import numpy as np
+
+from simulator import LRUCache, fingerprint
+from simulator.cache import nbytes
+
+
+def test_fingerprint_ignores_dict_order():
+    first = {"consultant_0": 60, "ad_cost_0": 150, "peak_months": [12]}
+    second = {"peak_months": [12], "ad_cost_0": 150, "consultant_0": 60}
+
+    assert fingerprint(first) == fingerprint(second)
+
+
+def test_fingerprint_tracks_values():
+    base = {"start": date(2025, 4, 1), "costs": np.array([60.0, 70.0])}
+
+    assert fingerprint(base) == fingerprint({"start": date(2025, 4, 1), "costs": np.array([60.0, 70.0])})
+    assert fingerprint(base) != fingerprint({"start": date(2025, 5, 1), "costs": np.array([60.0, 70.0])})
+    assert fingerprint(base) != fingerprint({"start": date(2025, 4, 1), "costs": np.array([60.0, 71.0])})
+    assert fingerprint(60) != fingerprint(60.0)
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value * 10
+
+    assert cache.get_or_compute("a", lambda: compute(1)) == 10
+    assert cache.get_or_compute("b", lambda: compute(2)) == 20
+    assert cache.get_or_compute("a", lambda: compute(1)) == 10
+    cache.get_or_compute("c", lambda: compute(3))
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert calls == [1, 2, 3]
+    assert cache.stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25, "size": 2, "maxsize": 2,
+                             "bytes": 0, "max_bytes": None}
+
+
+def test_get_returns_default_for_missing_or_evicted_keys():
+    cache = LRUCache(maxsize=1)
+    missing = object()
+    cache.get_or_compute("a", lambda: None)
+
+    assert cache.get("a", missing) is None
+    cache.get_or_compute("b", lambda: 2)
+    assert cache.get("a", missing) is missing
+    assert cache.get("b") == 2
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_byte_limit_evicts_large_entries():
+    cache = LRUCache(maxsize=100, max_bytes=3 * 8000)
+    sweep = {"result": {"profit": np.zeros((100, 36)), "other": np.broadcast_to(20.0, (100, 36))},
+             "grid": [np.zeros(10)]}
+
+    for key in "abc":
+        cache.get_or_compute(key, lambda: np.zeros(1000))
+    cache.get_or_compute("d", lambda: np.zeros(1000))
+    assert "a" not in cache and len(cache) == 3 and cache.stats()["bytes"] == 24000
+
+    # 1件で上限を超える値は保持せずに返す
+    assert cache.get_or_compute("sweep", lambda: sweep) is sweep
+    assert "sweep" not in cache and len(cache) == 3
+
+    # ブロードキャストした配列は実体の大きさで数える
+    assert nbytes(sweep) == 100 * 36 * 8 + 8 + 10 * 8
+
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
@@ -0,0 +1,70 @@
+"""入力データクラスとコマンドラインのテスト"""
+
+import json
+import subprocess
+import sys
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from simulator import SimulationInputs, preset_costs, run_simulation
+from simulator.cli import main
+
+SCENARIO = {
+    "months": 24,
+    "start_date": "2025-04-01",
+    "base_revenue": 800,
+    "revenue_growth": 3.0,
+    "peak_months": ["12月", 8],
+    "peak_multiplier": 1.4,
+    "preset": "EC・小売業",
+    "monthly_costs": {"ad_cost_3": 500},
+}
+
+
+def test_from_dict_parses_scenario_file_values():
+    inputs = SimulationInputs.from_dict(SCENARIO)
+
+    assert inputs.start_date == date(2025, 4, 1)
+    assert inputs.peak_months == (12, 8)
+    assert SimulationInputs.from_dict(inputs.to_dict()) == inputs
+
+
+def test_from_dict_rejects_unknown_keys():
+    with pytest.raises(ValueError):
+        SimulationInputs.from_dict({"base_revenu": 500})
+
+
+def test_monthly_costs_override_preset():
+    inputs = SimulationInputs.from_dict(SCENARIO)
+    df = run_simulation(inputs)
+    expected_consultant = preset_costs("EC・小売業", 24, 4, 60, 30, 150).values[0, 0]
+
+    assert len(df) == 24
+    assert df.loc[0, "コンサル費"] == expected_consultant
+    assert df.loc[3, "広告費"] == 500
+
+
+def test_cli_writes_result(tmp_path, capsys):
+    scenario = tmp_path / "scenario.json"
+    scenario.write_text(json.dumps(SCENARIO, ensure_ascii=False), encoding="utf-8")
+    output = tmp_path / "result.csv"
+
+    assert main(["run", str(scenario), "-o", str(output)]) == 0
+
+    summary = json.loads(capsys.readouterr().out)
+    written = pd.read_csv(output, encoding="utf-8-sig")
+    assert summary["総売上"] == written["売上"].sum()
+
+
+def test_cli_reports_bad_output_format(tmp_path):
+    scenario = tmp_path / "scenario.json"
+    scenario.write_text(json.dumps(SCENARIO, ensure_ascii=False), encoding="utf-8")
+
+    assert main(["run", str(scenario), "-o", str(tmp_path / "result.txt")]) == 1
+
+
+def test_library_imports_without_streamlit():
+    code = "import sys, simulator.cli; assert 'streamlit' not in sys.modules and 'plotly' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
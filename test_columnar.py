@@ -0,0 +1,83 @@
+"""列指向形式の出力のテスト"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator import (ResultWriter, SimulationInputs, monte_carlo, read_results, run_simulation, run_sweep, simulate,
+                       stored_month_names)
+from simulator.cli import main
+
+PARAMS = {
+    "base_revenue": 500,
+    "revenue_growth": 5.0,
+    "base_ad_cost": 150,
+    "ad_cost_ratio": 30.0,
+    "consultant_fee": 60,
+    "production_cost": 30,
+    "other_fixed_cost": 20,
+}
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_chunks_are_appended_with_compact_dtypes(tmp_path, suffix):
+    path = tmp_path / f"sweep{suffix}"
+    names = [f"{i + 1}月" for i in range(12)]
+    first = run_sweep(12, {"revenue_growth": [2.0, 4.0]}, ad_cost_ratio=30.0,
+                      **{k: v for k, v in PARAMS.items() if k not in ("revenue_growth", "ad_cost_ratio")})
+    second = run_sweep(12, {"revenue_growth": [6.0]}, ad_cost_ratio=30.0,
+                       **{k: v for k, v in PARAMS.items() if k not in ("revenue_growth", "ad_cost_ratio")})
+
+    with ResultWriter(path, month_names=names) as writer:
+        writer.write(first["result"])
+        writer.write(second["result"])
+
+    table = read_results(path)
+    assert table.num_rows == 36
+    assert str(table.schema.field("売上").type) == "int32"
+    assert str(table.schema.field("ROAS").type) == "float"
+    assert stored_month_names(table) == names
+
+    frame = table.to_pandas()
+    expected = simulate(names, **{**PARAMS, "revenue_growth": 6.0})
+    last = frame[frame["シナリオ"] == 2]
+    assert last["売上"].tolist() == expected["売上"].tolist()
+    assert np.allclose(last["利益率"], expected["利益率"], atol=1e-4)
+
+
+def test_monte_carlo_streams_every_path(tmp_path):
+    path = tmp_path / "paths.arrow"
+    with ResultWriter(path) as writer:
+        result = monte_carlo(6, paths=2500, seed=3, chunk_size=1000, on_chunk=writer.write, **PARAMS)
+
+    table = read_results(path, columns=["シナリオ", "利益"])
+    assert table.num_rows == 2500 * 6
+    assert table.column("シナリオ").to_numpy().max() == 2499
+    per_path = table.column("利益").to_numpy().reshape(2500, 6).sum(axis=1)
+    assert np.allclose(per_path, result["total_profit"], atol=6.5)
+
+
+def test_cli_montecarlo_and_parquet_run(tmp_path, capsys):
+    scenario = tmp_path / "scenario.json"
+    scenario.write_text(json.dumps({"months": 12}), encoding="utf-8")
+
+    assert main(["montecarlo", str(scenario), "--paths", "300", "-o", str(tmp_path / "mc.parquet")]) == 0
+    assert json.loads(capsys.readouterr().out)["出力行数"] == 3600
+
+    assert main(["run", str(scenario), "-o", str(tmp_path / "run.parquet")]) == 0
+    assert pd.read_parquet(tmp_path / "run.parquet")["売上"].dtype == np.int32
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_daily_run_keeps_fractional_amounts(tmp_path, suffix):
+    scenario = tmp_path / "scenario.json"
+    scenario.write_text(json.dumps({"months": 3, "granularity": "daily"}), encoding="utf-8")
+    output = tmp_path / f"run{suffix}"
+
+    assert main(["run", str(scenario), "-o", str(output)]) == 0
+    written = pd.read_parquet(output) if suffix == ".parquet" else pd.read_feather(output)
+    expected = run_simulation(SimulationInputs.from_dict({"months": 3, "granularity": "daily"}))
+    assert written["売上"].tolist() == expected["売上"].tolist()
+    assert written["利益"].sum() == pytest.approx(expected["利益"].sum())
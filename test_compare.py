@@ -0,0 +1,75 @@
+"""複数シナリオ比較のテスト"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pytest
+
+import simulator.compare as compare_module
+from simulator import (CostSchedule, PRESETS, SimulationInputs, compare_scenarios, comparison_frame,
+                       comparison_totals, run_simulation)
+from simulator.export import summarize
+
+BASE = SimulationInputs(start_date=date(2025, 4, 1), months=24, base_revenue=300, peak_months=(12,),
+                        peak_multiplier=1.8)
+
+
+def scenarios():
+    schedule = CostSchedule()
+    schedule.set("ad_cost", 2, 900)
+    return {
+        "現状": BASE,
+        "EC": replace(BASE, preset="EC・小売業"),
+        "BtoB": replace(BASE, preset={**PRESETS["BtoB"], "yoy_drift": 5.0}),
+        "広告費率40%": replace(BASE, ad_cost_ratio=40.0),
+        "自動調整": replace(BASE, auto_mode=True, monthly_costs=schedule),
+        "夏ピーク": replace(BASE, peak_months=(7, 8), peak_multiplier=2.0),
+        "ピークなし": replace(BASE, peak_months=()),
+    }
+
+
+def test_stacked_evaluation_matches_single_runs():
+    comparison = compare_scenarios(scenarios())
+
+    for i, (name, inputs) in enumerate(scenarios().items()):
+        df = run_simulation(inputs)
+        for column, values in comparison["columns"].items():
+            np.testing.assert_array_equal(values[i], df[column].to_numpy(), err_msg=f"{name}: {column}")
+        assert comparison["totals"]["総利益"][i] == summarize(df)["総利益"]
+
+
+def test_deltas_are_relative_to_baseline():
+    comparison = compare_scenarios(scenarios(), baseline="広告費率40%")
+    base = run_simulation(scenarios()["広告費率40%"])
+    ec = run_simulation(scenarios()["EC"])
+
+    deltas = comparison_frame(comparison, "利益", deltas=True)
+    np.testing.assert_array_equal(deltas["EC"], ec["利益"] - base["利益"])
+    assert (deltas["広告費率40%"] == 0).all()
+
+    totals = comparison_totals(comparison).set_index("シナリオ")
+    assert totals.loc["EC", "総利益差分"] == ec["利益"].sum() - base["利益"].sum()
+    assert totals.loc["広告費率40%", "全体ROAS差分"] == 0
+    assert list(comparison_frame(comparison, "ROAS").columns) == ["月", *scenarios()]
+
+
+def test_engine_runs_once_per_auto_mode(monkeypatch):
+    calls = []
+    original = compare_module.simulate_arrays
+
+    def counting(months, **params):
+        calls.append(np.shape(params["base_revenue"])[0])
+        return original(months, **params)
+
+    monkeypatch.setattr(compare_module, "simulate_arrays", counting)
+    compare_scenarios(scenarios())
+
+    assert sorted(calls) == [1, 6]
+
+
+def test_scenarios_must_share_timeline():
+    with pytest.raises(ValueError, match="期間と開始日"):
+        compare_scenarios({"現状": BASE, "36か月": replace(BASE, months=36)})
+    with pytest.raises(ValueError, match="シナリオがありません"):
+        compare_scenarios({})
@@ -0,0 +1,34 @@
+"""グラフ用の間引きのテスト"""
+
+import numpy as np
+
+from simulator import downsample, lttb_indices
+
+
+def test_short_series_are_returned_unchanged():
+    assert lttb_indices(np.arange(10), 20).tolist() == list(range(10))
+    assert lttb_indices(np.arange(10), 2).tolist() == list(range(10))
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    rng = np.random.default_rng(0)
+    y = np.sin(np.linspace(0, 6 * np.pi, 1200)) * 100 + rng.normal(0, 1, 1200)
+    y[700] = 500
+
+    indices = lttb_indices(y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 1199
+    assert np.all(np.diff(indices) > 0)
+    assert 700 in indices
+    assert y[indices].min() < -95 and y[indices].max() == 500
+
+
+def test_downsample_pairs_x_with_y():
+    x = np.array([f"{i}月" for i in range(500)], dtype=object)
+    y = np.arange(500) ** 2
+
+    small_x, small_y = downsample(x, y, 50)
+
+    assert len(small_x) == len(small_y) == 50
+    assert all(int(label.rstrip("月")) ** 2 == value for label, value in zip(small_x, small_y))
@@ -0,0 +1,142 @@
+"""計算エンジンのテスト（従来のループ実装との一致を確認）"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator import calendar_months, simulate, simulate_arrays
+
+
+def reference_simulation(month_names, base_revenue, revenue_growth, base_ad_cost, ad_cost_ratio,
+                         consultant_fee, production_cost, other_fixed_cost, monthly_costs,
+                         start_month=1, peak_months=(), peak_multiplier=1.0, auto_mode=False):
+    """app.py の従来の月別ループ実装"""
+    results = []
+    for i, month_name in enumerate(month_names):
+        monthly_revenue = base_revenue * (1 + revenue_growth / 100) ** i
+        if peak_months and (start_month + i - 1) % 12 + 1 in peak_months:
+            monthly_revenue *= peak_multiplier
+
+        if auto_mode:
+            revenue_ratio = monthly_revenue / base_revenue if base_revenue > 0 else 1
+            dynamic_multiplier = 0.8 + (revenue_ratio * 0.4)
+            monthly_consultant = monthly_costs.get(f"consultant_{i}", consultant_fee) * dynamic_multiplier
+            monthly_production = monthly_costs.get(f"production_{i}", production_cost) * dynamic_multiplier
+        else:
+            monthly_consultant = monthly_costs.get(f"consultant_{i}", consultant_fee)
+            monthly_production = monthly_costs.get(f"production_{i}", production_cost)
+
+        monthly_ad_cost = monthly_costs.get(f"ad_cost_{i}", base_ad_cost)
+        ad_cost = max(monthly_ad_cost, monthly_revenue * ad_cost_ratio / 100)
+        monthly_total_cost = ad_cost + monthly_consultant + monthly_production + other_fixed_cost
+
+        profit = monthly_revenue - monthly_total_cost
+        profit_margin = (profit / monthly_revenue * 100) if monthly_revenue > 0 else 0
+        roas = (monthly_revenue / ad_cost * 100) if ad_cost > 0 else 0
+
+        results.append({
+            "月": month_name,
+            "売上": int(monthly_revenue),
+            "広告費": int(ad_cost),
+            "広告費率": round(ad_cost / monthly_revenue * 100, 1) if monthly_revenue > 0 else 0,
+            "コンサル費": int(monthly_consultant),
+            "制作費": int(monthly_production),
+            "その他": other_fixed_cost,
+            "総費用": int(monthly_total_cost),
+            "利益": int(profit),
+            "利益率": round(profit_margin, 1),
+            "ROAS": round(roas, 0)
+        })
+    return pd.DataFrame(results)
+
+
+BASE_PARAMS = {
+    "base_revenue": 500,
+    "revenue_growth": 5.0,
+    "base_ad_cost": 150,
+    "ad_cost_ratio": 30.0,
+    "consultant_fee": 60,
+    "production_cost": 30,
+    "other_fixed_cost": 20,
+}
+
+
+def run_engine(month_names, monthly_costs, **params):
+    months = len(month_names)
+    return simulate(
+        month_names,
+        consultant_costs=[monthly_costs.get(f"consultant_{i}", params["consultant_fee"]) for i in range(months)],
+        production_costs=[monthly_costs.get(f"production_{i}", params["production_cost"]) for i in range(months)],
+        ad_costs=[monthly_costs.get(f"ad_cost_{i}", params["base_ad_cost"]) for i in range(months)],
+        **params,
+    )
+
+
+@pytest.mark.parametrize("months", [12, 36])
+@pytest.mark.parametrize("options", [
+    {},
+    {"start_month": 4, "peak_months": (12, 7), "peak_multiplier": 1.5},
+    {"auto_mode": True},
+    {"start_month": 11, "peak_months": (1,), "peak_multiplier": 2.3, "auto_mode": True},
+])
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"revenue_growth": -7.5, "ad_cost_ratio": 45.0},
+    {"base_revenue": 120, "consultant_fee": 90, "other_fixed_cost": 35},
+])
+def test_matches_reference_loop(months, options, overrides):
+    month_names = [f"{i + 1}ヶ月目" for i in range(months)]
+    monthly_costs = {"consultant_2": 80, "production_5": 45, "ad_cost_0": 400, "ad_cost_7": 10}
+    params = {**BASE_PARAMS, **overrides, **options}
+
+    expected = reference_simulation(month_names, monthly_costs=monthly_costs, **params)
+    actual = run_engine(month_names, monthly_costs, **params)
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_growth_matches_reference_at_rounding_boundary():
+    # 広告費率32%では ROAS がちょうど312.5になり、成長係数の最終桁の違いで丸めが変わる
+    month_names = [f"{i + 1}ヶ月目" for i in range(36)]
+    params = {**BASE_PARAMS, "base_revenue": 532, "revenue_growth": 9.9, "base_ad_cost": 142,
+              "ad_cost_ratio": 32.0}
+
+    expected = reference_simulation(month_names, monthly_costs={}, **params)
+    pd.testing.assert_frame_equal(simulate(month_names, **params), expected)
+
+    batch = simulate_arrays(36, **{**params, "revenue_growth": np.array([[5.0], [9.9]])})
+    np.testing.assert_array_equal(np.round(batch["roas"][1], 0), expected["ROAS"])
+
+
+def test_ratio_rounding_matches_python_round():
+    # 広告費率は22.85になり、np.round では22.8、round() では22.9になる
+    params = {**BASE_PARAMS, "base_revenue": 2000, "revenue_growth": 0, "base_ad_cost": 457,
+              "ad_cost_ratio": 0}
+
+    expected = reference_simulation(["1ヶ月目"], monthly_costs={}, **params)
+    actual = simulate(["1ヶ月目"], **params)
+
+    assert actual["広告費率"].iloc[0] == 22.9
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_zero_revenue_does_not_divide_by_zero():
+    df = simulate(["1月", "2月"], **{**BASE_PARAMS, "base_revenue": 0, "base_ad_cost": 0}, auto_mode=True)
+
+    assert (df["利益率"] == 0).all()
+    assert (df["ROAS"] == 0).all()
+    assert (df["広告費率"] == 0).all()
+
+
+def test_scenario_axis_broadcasts():
+    growth = np.array([[2.0], [5.0], [10.0]])
+    result = simulate_arrays(24, **{**BASE_PARAMS, "revenue_growth": growth})
+
+    assert result["profit"].shape == (3, 24)
+    for row, g in enumerate(growth[:, 0]):
+        single = simulate_arrays(24, **{**BASE_PARAMS, "revenue_growth": g})
+        np.testing.assert_array_equal(result["profit"][row], single["profit"])
+
+
+def test_calendar_months_wraps_year():
+    assert calendar_months(11, 4).tolist() == [11, 12, 1, 2]
@@ -0,0 +1,23 @@
+"""ファイル出力のテスト"""
+
+import io
+
+import pandas as pd
+
+from simulator import simulate, to_csv, to_excel
+
+DF = simulate(["2025年01月", "2025年02月", "2025年03月"], base_revenue=500, revenue_growth=5.0, base_ad_cost=150,
+              ad_cost_ratio=30.0, consultant_fee=60, production_cost=30, other_fixed_cost=20)
+
+
+def test_excel_round_trip():
+    loaded = pd.read_excel(io.BytesIO(to_excel(DF)), sheet_name="シミュレーション結果")
+
+    pd.testing.assert_frame_equal(loaded, DF, check_dtype=False)
+
+
+def test_csv_has_bom_and_all_rows():
+    data = to_csv(DF)
+
+    assert data.startswith("﻿".encode("utf-8"))
+    assert len(pd.read_csv(io.BytesIO(data), encoding="utf-8-sig")) == len(DF)
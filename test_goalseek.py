@@ -0,0 +1,96 @@
+"""目標からの逆算（ゴールシーク）のテスト"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pytest
+
+from simulator import GOAL_METRICS, SimulationInputs, goal_seek, simulate_arrays
+
+BASE = SimulationInputs(start_date=date(2025, 4, 1), months=12, preset="EC・小売業", peak_months=(12,))
+
+
+def total(inputs, metric):
+    return GOAL_METRICS[metric](simulate_arrays(inputs.months, **inputs.engine_params()))
+
+
+@pytest.mark.parametrize("variable, metric, target", [
+    ("revenue_growth", "総利益", 8000),
+    ("ad_cost_ratio", "全体利益率", 50),
+    ("base_revenue", "全体ROAS", 330),
+    ("other_fixed_cost", "総利益", 4000),
+])
+def test_solution_hits_the_target(variable, metric, target):
+    goal = goal_seek(BASE.months, metric, target, variable, BASE.engine_params())
+
+    assert goal["reachable"]
+    assert goal["achieved"] == pytest.approx(target, rel=1e-6)
+    assert total(replace(BASE, **{variable: float(goal["value"])}), metric) == pytest.approx(target, rel=1e-6)
+
+
+def test_cost_variables_scale_the_monthly_schedule():
+    params = BASE.engine_params()
+    goal = goal_seek(12, "総利益", 4000, "base_ad_cost", params)
+    scaled = {**params, "ad_costs": params["ad_costs"] * goal["value"] / params["base_ad_cost"]}
+
+    assert GOAL_METRICS["総利益"](simulate_arrays(12, **scaled)) == pytest.approx(4000, rel=1e-6)
+    # 入力欄に設定するとプリセット適用後の月別費用が整数に切り捨てられるため、端数の差だけ残る
+    assert total(replace(BASE, base_ad_cost=float(goal["value"])), "総利益") == pytest.approx(4000, rel=1e-2)
+
+
+def test_returns_the_boundary_on_the_satisfying_side():
+    params = BASE.engine_params()
+    at_least = goal_seek(12, "総利益", 5000, "revenue_growth", params)
+    at_most = goal_seek(12, "総利益", 5000, "revenue_growth", params, at_most=True)
+
+    assert total(replace(BASE, revenue_growth=float(at_least["value"])), "総利益") >= 5000 - 1e-6
+    assert total(replace(BASE, revenue_growth=float(at_least["value"]) - 0.01), "総利益") < 5000
+    assert at_most["value"] == pytest.approx(at_least["value"], abs=1e-6)
+
+
+@pytest.mark.parametrize("target", [300, 350, 400])
+def test_achieved_is_never_on_the_wrong_side_of_the_target(target):
+    # 差が ftol 以内でも目標を満たさない点は返さない（全体ROAS ≥ 400 が 399.9999999 になっていた）
+    inputs = SimulationInputs(start_date=date(2025, 4, 1))
+    at_least = goal_seek(12, "全体ROAS", target, "ad_cost_ratio", inputs.engine_params())
+    at_most = goal_seek(12, "全体ROAS", target, "ad_cost_ratio", inputs.engine_params(), at_most=True)
+
+    assert at_least["achieved"] >= target
+    assert total(replace(inputs, ad_cost_ratio=float(at_least["value"])), "全体ROAS") >= target
+    assert at_most["achieved"] <= target
+
+
+def test_per_month_solves_every_month_at_once():
+    goal = goal_seek(12, "ROAS", 250, "ad_cost_ratio", BASE.engine_params(), per_month=True)
+    result = simulate_arrays(12, **{**BASE.engine_params(), "ad_cost_ratio": goal["value"]})
+
+    assert goal["value"].shape == (12,)
+    reachable = goal["reachable"]
+    np.testing.assert_allclose(result["roas"][reachable], 250, rtol=1e-6)
+    # 月別広告費の下限で売上連動の広告費が効かない月は届かない
+    ad_floor = BASE.engine_params()["ad_costs"]
+    revenue = result["revenue"]
+    np.testing.assert_array_equal(~reachable, revenue / ad_floor * 100 < 250)
+    assert np.isnan(goal["value"][~reachable]).all()
+
+
+def test_swept_batch_matches_single_solves():
+    base_revenue = np.array([[400.0], [500.0], [650.0], [800.0]])
+    params = {**BASE.engine_params(), "base_revenue": base_revenue}
+    batch = goal_seek(12, "総利益", 6000, "revenue_growth", params)
+
+    assert batch["value"].shape == (4,)
+    for i, revenue in enumerate(base_revenue[:, 0]):
+        single = goal_seek(12, "総利益", 6000, "revenue_growth", {**params, "base_revenue": revenue})
+        assert batch["value"][i] == pytest.approx(single["value"], abs=1e-5)
+
+
+def test_unreachable_and_invalid_requests():
+    goal = goal_seek(12, "全体ROAS", 10000, "ad_cost_ratio", BASE.engine_params())
+    assert not goal["reachable"] and np.isnan(goal["value"])
+
+    with pytest.raises(ValueError, match="逆算できない入力"):
+        goal_seek(12, "総利益", 0, "months", BASE.engine_params())
+    with pytest.raises(ValueError, match="不明な指標"):
+        goal_seek(12, "ROAS", 0, "ad_cost_ratio", BASE.engine_params())
@@ -0,0 +1,128 @@
+"""差分再計算のテスト"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator import (CostSchedule, IncrementalSimulation, SimulationInputs, calculate_optimization_suggestions,
+                       kpi_totals, run_simulation, simulate_arrays)
+
+
+def make_inputs(**overrides):
+    return SimulationInputs(start_date=date(2025, 4, 1), **overrides)
+
+
+def assert_matches_full_run(incremental, inputs):
+    expected = run_simulation(inputs)
+    pd.testing.assert_frame_equal(incremental.frame(), expected)
+
+    totals = kpi_totals(simulate_arrays(inputs.months, **inputs.engine_params()))
+    for name, value in incremental.totals().items():
+        assert value == pytest.approx(float(totals[name]))
+    assert incremental.suggestions() == calculate_optimization_suggestions(expected)
+
+
+@pytest.mark.parametrize("auto_mode", [False, True])
+def test_cell_edits_patch_only_changed_months(auto_mode):
+    inputs = make_inputs(months=36, auto_mode=auto_mode, preset="EC・小売業")
+    incremental = IncrementalSimulation(inputs)
+
+    edits = [("ad_cost", 3, 900), ("consultant", 20, 5), ("ad_cost", 3, 40), ("production", 35, 400)]
+    for category, month, value in edits:
+        schedule = inputs.monthly_costs.copy()
+        schedule.set(category, month, value)
+        inputs = replace(inputs, monthly_costs=schedule)
+
+        changed = incremental.update(inputs)
+
+        assert changed.tolist() == [month]
+        assert_matches_full_run(incremental, inputs)
+
+
+def test_unchanged_inputs_and_structural_changes():
+    inputs = make_inputs(months=24)
+    incremental = IncrementalSimulation(inputs)
+
+    assert incremental.update(inputs).size == 0
+
+    inputs = replace(inputs, revenue_growth=-8.0, peak_months=(12,))
+    assert incremental.update(inputs) is None
+    assert_matches_full_run(incremental, inputs)
+
+    inputs = replace(inputs, months=6)
+    assert incremental.update(inputs) is None
+    assert_matches_full_run(incremental, inputs)
+
+
+def test_suggestion_flags_follow_edits():
+    inputs = make_inputs(months=12)
+    incremental = IncrementalSimulation(inputs)
+    assert not any(s["title"] == "赤字月があります" for s in incremental.suggestions())
+
+    schedule = inputs.monthly_costs.copy()
+    schedule.set("ad_cost", 5, 5000)
+    inputs = replace(inputs, monthly_costs=schedule)
+    incremental.update(inputs)
+
+    titles = [s["title"] for s in incremental.suggestions()]
+    assert "赤字月があります" in titles
+    assert_matches_full_run(incremental, inputs)
+
+    schedule = schedule.copy()
+    schedule.clear("ad_cost", 5)
+    inputs = replace(inputs, monthly_costs=schedule)
+    incremental.update(inputs)
+    assert_matches_full_run(incremental, inputs)
+    assert np.all(incremental.columns["利益"] >= 0)
+
+
+def test_std_does_not_cancel_on_flat_columns():
+    # 利益率が全月ほぼ一定（16.1%）だと、二乗和からの計算では桁落ちで 1e-7 程度の誤差が出る
+    inputs = make_inputs(months=120, revenue_growth=0.0, base_revenue=310, peak_months=())
+    incremental = IncrementalSimulation(inputs)
+
+    def assert_std_matches_pandas():
+        for name in ("ROAS", "利益率"):
+            expected = pd.Series(incremental.columns[name]).std()
+            assert incremental.std(name) == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+    assert_std_matches_pandas()
+    schedule = inputs.monthly_costs.copy()
+    schedule.set("ad_cost", 7, 160)
+    assert incremental.update(replace(inputs, monthly_costs=schedule)).tolist() == [7]
+    assert_std_matches_pandas()
+
+
+def test_cell_edits_use_the_schedule_history(monkeypatch):
+    inputs = make_inputs(months=48, preset="EC・小売業")
+    incremental = IncrementalSimulation(inputs)
+    schedule = inputs.monthly_costs.copy()
+    schedule.set("ad_cost", 10, 700)
+    schedule.set("ad_cost", 10, 710)
+    schedule.set("production", 30, inputs.base_costs()[30, 1])
+    inputs = replace(inputs, monthly_costs=schedule)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("全月の費用を解決し直している")
+    monkeypatch.setattr(SimulationInputs, "engine_params", fail)
+    monkeypatch.setattr(SimulationInputs, "base_costs", fail)
+
+    # 同じ値を設定し直しただけの月（30）は再計算しない
+    assert incremental.update(inputs).tolist() == [10]
+    monkeypatch.undo()
+    assert_matches_full_run(incremental, inputs)
+
+
+def test_replaced_schedule_is_compared_month_by_month():
+    inputs = make_inputs(months=12)
+    incremental = IncrementalSimulation(inputs)
+
+    schedule = CostSchedule()
+    schedule.set("consultant", 4, 0)
+    inputs = replace(inputs, monthly_costs=schedule)
+
+    assert incremental.update(inputs).tolist() == [4]
+    assert_matches_full_run(incremental, inputs)
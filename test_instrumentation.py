@@ -0,0 +1,96 @@
+"""処理時間の計測と構造化ログのテスト"""
+
+import io
+import json
+import threading
+import time
+from datetime import date
+
+from simulator import (AIClient, MetricsRegistry, Profiler, SimulationInputs, configure_logging, log_metrics,
+                       run_simulation)
+from simulator.ai_stub import make_server
+from simulator.instrumentation import logger
+
+
+def test_nested_spans_are_recorded_by_path():
+    profiler = Profiler()
+    with profiler.span("tab3"):
+        for _ in range(3):
+            with profiler.span("figures"):
+                time.sleep(0.002)
+    profiler.record("import", 0.5)
+    profiler.count("cache_hits", 2)
+
+    assert list(profiler.spans) == ["tab3", "tab3/figures", "import"]
+    assert profiler.spans["tab3/figures"]["calls"] == 3
+    assert profiler.spans["tab3/figures"]["depth"] == 1
+    assert profiler.spans["tab3"]["seconds"] >= profiler.spans["tab3/figures"]["seconds"] >= 0.006
+
+    record = profiler.to_record()
+    assert record["event"] == "rerun"
+    assert record["spans"]["import"] == 500.0
+    assert record["counters"] == {"cache_hits": 2}
+
+
+def test_summary_includes_untracked_time():
+    profiler = Profiler(started=time.perf_counter() - 1.0)
+    profiler.record("import", 0.25)
+
+    rows = profiler.summary()
+
+    assert [row["name"] for row in rows] == ["import", "(計測外)"]
+    assert abs(rows[0]["share"] - 0.25) < 0.01
+    assert abs(sum(row["share"] for row in rows) - 1.0) < 1e-9
+
+
+def test_registry_percentiles_use_recent_window():
+    metrics = MetricsRegistry(window=100)
+    for value in range(1, 201):
+        metrics.observe("rerun_ms", value)
+
+    stats = metrics.percentiles("rerun_ms")
+
+    assert stats["count"] == 100
+    assert stats["max"] == 200
+    assert abs(stats["p95"] - 195.05) < 1e-9
+    assert metrics.percentiles("missing")["count"] == 0
+
+
+def test_log_metrics_writes_one_json_line_with_p95():
+    stream = io.StringIO()
+    configure_logging(stream)
+    metrics = MetricsRegistry()
+    try:
+        for _ in range(3):
+            profiler = Profiler()
+            with profiler.span("simulation"):
+                pass
+            log_metrics(profiler, metrics)
+    finally:
+        logger.handlers.clear()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 3
+    record = json.loads(lines[-1])
+    assert set(record) == {"event", "duration_ms", "spans", "counters", "p50_ms", "p95_ms"}
+    assert "simulation" in record["spans"]
+    assert metrics.percentiles("rerun_ms")["count"] == 3
+
+
+def test_ai_client_records_latency_and_cache_hits():
+    server = make_server(port=0, latency=0.05)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    metrics = MetricsRegistry()
+    client = AIClient(api_key="dummy", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", metrics=metrics)
+    df = run_simulation(SimulationInputs(start_date=date(2025, 4, 1)))
+    try:
+        client.submit(df, "利益最大化").result(timeout=5)
+        client.submit(df, "利益最大化").result(timeout=5)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    assert metrics.counters["ai_requests"] == 1
+    assert metrics.counters["ai_cache_hits"] == 1
+    assert metrics.percentiles("ai_latency_ms")["p50"] >= 50
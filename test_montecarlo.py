@@ -0,0 +1,49 @@
+"""モンテカルロ・リスク分析のテスト"""
+
+import numpy as np
+
+from simulator import band_frame, monte_carlo, simulate_arrays
+
+PARAMS = {
+    "base_revenue": 500,
+    "revenue_growth": 5.0,
+    "base_ad_cost": 150,
+    "ad_cost_ratio": 30.0,
+    "consultant_fee": 60,
+    "production_cost": 30,
+    "other_fixed_cost": 20,
+    "peak_months": (12,),
+    "peak_multiplier": 1.5,
+}
+
+
+def test_same_seed_reproduces_results():
+    first = monte_carlo(12, paths=3000, seed=7, chunk_size=1000, **PARAMS)
+    second = monte_carlo(12, paths=3000, seed=7, chunk_size=1000, **PARAMS)
+
+    np.testing.assert_array_equal(first["bands"]["利益"], second["bands"]["利益"])
+    np.testing.assert_array_equal(first["loss_probability"], second["loss_probability"])
+
+
+def test_bands_are_ordered():
+    result = monte_carlo(24, paths=5000, seed=1, chunk_size=1500, **PARAMS)
+
+    for bands in result["bands"].values():
+        assert bands.shape == (3, 24)
+        assert (bands[0] <= bands[1]).all() and (bands[1] <= bands[2]).all()
+    assert ((result["loss_probability"] >= 0) & (result["loss_probability"] <= 1)).all()
+
+
+def test_zero_variance_matches_deterministic_run():
+    result = monte_carlo(12, paths=10, growth_sd=0.0, peak_sd=0.0, ad_efficiency_sd=0.0, seed=0, **PARAMS)
+    expected = simulate_arrays(12, **PARAMS)
+
+    np.testing.assert_allclose(result["bands"]["売上"][1], expected["revenue"], rtol=1e-6)
+    np.testing.assert_allclose(result["bands"]["利益"][2], expected["profit"], rtol=1e-6)
+
+
+def test_band_frame_columns():
+    result = monte_carlo(3, paths=100, seed=0, **PARAMS)
+    frame = band_frame(result, ["1月", "2月", "3月"], "ROAS")
+
+    assert list(frame.columns) == ["月", "P5", "P50", "P95", "赤字確率"]
@@ -0,0 +1,118 @@
+"""自動スケジューリング最適化のテスト"""
+
+import numpy as np
+import pytest
+
+from simulator import SPEND_CATEGORIES, evaluate_schedules, expected_uplift, kpi_totals, optimize_schedule, simulate_arrays
+
+REFERENCE_COSTS = {"consultant": 60, "production": 30, "ad_cost": 150}
+
+
+PARAMS = {"base_revenue": 500, "revenue_growth": 3.0, "base_ad_cost": 150, "ad_cost_ratio": 30.0,
+          "consultant_fee": 60, "production_cost": 30, "other_fixed_cost": 20,
+          "start_month": 4, "peak_months": (12, 8), "peak_multiplier": 1.8}
+
+
+def baseline(months=36):
+    return simulate_arrays(months, **PARAMS)["revenue"]
+
+
+def total_spend(schedule):
+    return sum(schedule[c].sum() for c in SPEND_CATEGORIES)
+
+
+@pytest.mark.parametrize("mode", ["利益最大化", "売上成長重視", "リスク最小化"])
+def test_budget_is_respected(mode):
+    schedule = optimize_schedule(baseline(), REFERENCE_COSTS, budget=200 * 36, priority_mode=mode)
+
+    assert total_spend(schedule) <= 200 * 36 + 1e-6
+    assert all((schedule[c] >= 0).all() for c in SPEND_CATEGORIES)
+
+
+def test_growth_mode_beats_uniform_allocation():
+    revenue = baseline()
+    budget = 240 * 36
+    schedule = optimize_schedule(revenue, REFERENCE_COSTS, budget=budget, priority_mode="売上成長重視")
+    uniform = {c: np.full(36, budget / 36 * REFERENCE_COSTS[c] / 240) for c in SPEND_CATEGORIES}
+
+    assert total_spend(schedule) == pytest.approx(budget)
+    assert schedule["expected_uplift"].sum() > expected_uplift(uniform, revenue, REFERENCE_COSTS).sum()
+
+
+def test_profit_mode_leaves_unprofitable_budget_unused():
+    schedule = optimize_schedule(baseline(), REFERENCE_COSTS, budget=1e9, priority_mode="利益最大化", minimum_ratio=0)
+    gain = schedule["expected_uplift"].sum() - total_spend(schedule)
+
+    assert total_spend(schedule) < 1e9
+    for factor in (0.9, 1.1):
+        scaled = {c: schedule[c] * factor for c in SPEND_CATEGORIES}
+        assert expected_uplift(scaled, baseline(), REFERENCE_COSTS).sum() - total_spend(scaled) <= gain
+
+
+def test_risk_mode_keeps_cost_ratio_constant():
+    revenue = baseline()
+    schedule = optimize_schedule(revenue, REFERENCE_COSTS, budget=200 * 36, priority_mode="リスク最小化", minimum_ratio=0)
+    ratio = sum(schedule[c] for c in SPEND_CATEGORIES) / revenue
+
+    np.testing.assert_allclose(ratio, ratio[0])
+
+
+def test_minimum_ratio_is_kept():
+    schedule = optimize_schedule(baseline(), REFERENCE_COSTS, budget=200 * 36, priority_mode="利益最大化")
+
+    for c in SPEND_CATEGORIES:
+        assert (schedule[c] >= REFERENCE_COSTS[c] * 0.5 - 1e-9).all()
+
+
+@pytest.mark.parametrize("mode", ["利益最大化", "売上成長重視", "リスク最小化"])
+def test_planned_spend_is_what_the_engine_charges(mode):
+    revenue = baseline()
+    schedule = optimize_schedule(revenue, REFERENCE_COSTS, budget=500 * 36, priority_mode=mode,
+                                 ad_cost_ratio=PARAMS["ad_cost_ratio"])
+    result = simulate_arrays(36, **PARAMS, consultant_costs=schedule["consultant"],
+                             production_costs=schedule["production"], ad_costs=schedule["ad_cost"])
+
+    assert (schedule["ad_cost"] >= revenue * PARAMS["ad_cost_ratio"] / 100 - 1e-9).all()
+    for c in SPEND_CATEGORIES:
+        np.testing.assert_allclose(result[c], schedule[c], err_msg=c)
+    assert total_spend(schedule) <= 500 * 36 + 1e-6
+
+
+def test_revenue_linked_ad_cost_over_budget_is_kept():
+    revenue = baseline()
+    schedule = optimize_schedule(revenue, REFERENCE_COSTS, budget=200 * 36, priority_mode="売上成長重視",
+                                 ad_cost_ratio=PARAMS["ad_cost_ratio"])
+
+    # 売上連動の広告費だけで予算を超えるため、広告費は下限のまま・他の費目は0になる
+    np.testing.assert_allclose(schedule["ad_cost"], revenue * PARAMS["ad_cost_ratio"] / 100)
+    assert not schedule["consultant"].any() and not schedule["production"].any()
+
+
+@pytest.mark.parametrize("mode", ["利益最大化", "売上成長重視", "リスク最小化"])
+def test_engine_scored_plan_is_never_worse_than_current(mode):
+    revenue = baseline()
+    current = {"consultant_costs": np.full(36, 60.0), "production_costs": np.full(36, 30.0),
+               "ad_costs": np.where(np.arange(36) % 12 == 8, 600.0, 150.0)}
+    params = {**PARAMS, **current}
+    schedule = optimize_schedule(revenue, REFERENCE_COSTS, budget=400 * 36, priority_mode=mode,
+                                 ad_cost_ratio=PARAMS["ad_cost_ratio"], params=params)
+
+    result = evaluate_schedules(params, [np.stack([schedule[c] for c in SPEND_CATEGORIES])], revenue, REFERENCE_COSTS)
+    assert kpi_totals(result)["総利益"][0] == schedule["totals"]["総利益"]
+    if mode == "利益最大化":
+        assert schedule["totals"]["総利益"] >= schedule["current_totals"]["総利益"]
+    elif mode == "売上成長重視":
+        assert schedule["totals"]["総売上"] >= schedule["current_totals"]["総売上"]
+    assert total_spend(schedule) <= 400 * 36 + 1e-6
+
+
+def test_current_schedule_is_kept_when_it_scores_best():
+    revenue = baseline()
+    # 弾力性が0だと支出は売上を増やさないので、下限まで減らした配分が最も利益が大きい
+    params = {**PARAMS, "consultant_costs": np.full(36, 30.0), "production_costs": np.full(36, 15.0),
+              "ad_costs": revenue * PARAMS["ad_cost_ratio"] / 100}
+    zero = dict.fromkeys(SPEND_CATEGORIES, 1e-12)
+    schedule = optimize_schedule(revenue, REFERENCE_COSTS, budget=1000 * 36, priority_mode="利益最大化",
+                                 elasticities=zero, ad_cost_ratio=PARAMS["ad_cost_ratio"], params=params)
+
+    assert schedule["totals"]["総利益"] == schedule["current_totals"]["総利益"]
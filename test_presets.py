@@ -0,0 +1,74 @@
+"""業界別プリセットのテスト"""
+
+import numpy as np
+import pytest
+
+from simulator import PRESETS, SimulationInputs, preset_costs, preset_multipliers, register_preset
+
+
+def reference_preset_costs(preset_name, months, start_month, consultant_base, production_base, ad_base):
+    """旧実装（月ごとのループ、12か月まで）の再現"""
+    preset = PRESETS[preset_name]
+    costs = {}
+    for i in range(min(months, 12)):
+        month_index = (start_month + i - 1) % 12
+        costs[f"consultant_{i}"] = int(consultant_base * preset["consultant_multipliers"][month_index])
+        costs[f"production_{i}"] = int(production_base * preset["production_multipliers"][month_index])
+        costs[f"ad_cost_{i}"] = int(ad_base * preset["ad_multipliers"][month_index])
+    return costs
+
+
+@pytest.mark.parametrize("name", ["EC・小売業", "旅行・レジャー", "BtoB"])
+@pytest.mark.parametrize("start_month", [1, 4, 12])
+def test_first_year_matches_reference(name, start_month):
+    schedule = preset_costs(name, 12, start_month, 60, 30, 150)
+
+    assert schedule.to_dict() == reference_preset_costs(name, 12, start_month, 60, 30, 150)
+
+
+def test_tiles_to_any_horizon():
+    multipliers = preset_multipliers("EC・小売業", 36, 4)
+
+    assert multipliers.shape == (36, 3)
+    np.testing.assert_array_equal(multipliers[12:24], multipliers[:12])
+    np.testing.assert_array_equal(multipliers[24:], multipliers[:12])
+    assert preset_costs("EC・小売業", 36, 4, 60, 30, 150).months == 36
+
+
+def test_yoy_drift_compounds_per_year():
+    flat = preset_multipliers("BtoB", 30, 1)
+    drifted = preset_multipliers("BtoB", 30, 1, yoy_drift=10.0)
+
+    np.testing.assert_allclose(drifted[:12], flat[:12])
+    np.testing.assert_allclose(drifted[12:24], flat[12:24] * 1.1)
+    np.testing.assert_allclose(drifted[24:], flat[24:] * 1.21)
+
+    per_category = preset_multipliers("BtoB", 24, 1, yoy_drift=[0.0, 0.0, 20.0])
+    np.testing.assert_allclose(per_category[12:, :2], flat[12:24, :2])
+    np.testing.assert_allclose(per_category[12:, 2], flat[12:24, 2] * 1.2)
+
+
+def test_user_defined_presets():
+    definition = {
+        "description": "テスト用",
+        "consultant_multipliers": [1.0] * 11 + [2.0],
+        "production_multipliers": [1.0] * 12,
+        "ad_multipliers": [0.5] * 12,
+        "yoy_drift": 50.0,
+    }
+
+    costs = preset_costs(definition, 24, 1, 60, 30, 150).resolve(24, [0, 0, 0])
+    assert costs[11].tolist() == [120, 30, 75]
+    assert costs[23].tolist() == [180, 45, 112]
+
+    inputs = SimulationInputs.from_dict({"months": 24, "start_date": "2025-01-01", "preset": definition})
+    assert inputs.resolved_costs()[23].tolist() == [180, 45, 112]
+
+    try:
+        register_preset("テスト用", **{k: definition[k] for k in definition if k != "description"})
+        np.testing.assert_array_equal(preset_costs("テスト用", 24, 1, 60, 30, 150).values, costs)
+    finally:
+        PRESETS.pop("テスト用", None)
+
+    with pytest.raises(ValueError):
+        preset_multipliers({**definition, "ad_multipliers": [1.0] * 11}, 12, 1)
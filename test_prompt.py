@@ -0,0 +1,87 @@
+"""AI最適化プロンプトの要約のテスト"""
+
+import threading
+from datetime import date
+
+import pytest
+
+from simulator import AIClient, SimulationInputs, build_prompt, estimate_tokens, run_simulation
+from simulator.ai_stub import make_server
+
+
+def result_frame(months, **overrides):
+    return run_simulation(SimulationInputs(months=months, start_date=date(2025, 4, 1), **overrides))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("総売上") == 3
+    assert estimate_tokens("ROAS 334%") == 3
+
+
+@pytest.mark.parametrize("budget", [300, 600, 1200, 4000])
+def test_prompt_fits_budget_and_keeps_summary(budget):
+    df = result_frame(120, base_revenue=100, revenue_growth=3.0, peak_months=(12,), peak_multiplier=2.0)
+
+    prompt = build_prompt(df, "利益最大化", token_budget=budget)
+
+    assert estimate_tokens(prompt) <= budget
+    assert f"総利益: {df['利益'].sum()}万円" in prompt
+    assert "目標: 利益最大化" in prompt
+    assert prompt.count("\n") < 80
+
+
+def test_series_is_downsampled_with_exact_totals():
+    df = result_frame(36)
+
+    prompt = build_prompt(df, "売上成長重視", token_budget=10000)
+
+    rows = prompt.split("月, 売上, 利益, ROAS\n")[1].split("\n\n")[0].splitlines()
+    assert len(rows) == 24
+    assert sum(int(row.split(", ")[1]) for row in rows) == df["売上"].sum()
+    assert sum(int(row.split(", ")[2]) for row in rows) == df["利益"].sum()
+
+
+def test_anomalies_list_largest_losses_first():
+    df = result_frame(24, base_revenue=100, revenue_growth=8.0)
+    losses = df[df["利益"] < 0].sort_values("利益")
+
+    prompt = build_prompt(df, "利益最大化", token_budget=10000)
+
+    section = prompt.split("注目すべき月:\n")[1].split("\n\n")[0].splitlines()
+    assert section[0] == f"- {losses['月'].iloc[0]}: 赤字（利益 {losses['利益'].iloc[0]}万円）"
+
+
+@pytest.mark.parametrize("granularity, unit", [("monthly", "か月"), ("weekly", "週"), ("daily", "日")])
+def test_period_count_uses_the_granularity(granularity, unit):
+    df = result_frame(3, granularity=granularity)
+
+    prompt = build_prompt(df, "利益最大化", token_budget=10000, granularity=granularity)
+
+    assert f"{df['月'].iloc[-1]}（{len(df)}{unit}）" in prompt
+
+
+def test_multi_scenario_prompt_shares_budget():
+    frames = {"現状": result_frame(36), "広告強化": result_frame(36, ad_cost_ratio=45.0)}
+
+    prompt = build_prompt(frames, "利益最大化", token_budget=900)
+
+    assert "シナリオ「現状」" in prompt and "シナリオ「広告強化」" in prompt
+    assert estimate_tokens(prompt) <= 900
+
+
+def test_client_sends_selected_model_and_limits():
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = AIClient(api_key="dummy", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        client.request(result_frame(12), "利益最大化", model="GPT-4", max_tokens=400, prompt_budget=500)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    payload = server.last_request
+    assert payload["model"] == "gpt-4"
+    assert payload["max_tokens"] == 400
+    assert estimate_tokens(payload["messages"][1]["content"]) <= 500
@@ -0,0 +1,90 @@
+"""月別費用スケジュールのテスト"""
+
+import numpy as np
+import pytest
+
+from simulator import CostSchedule, SimulationInputs, fingerprint
+
+
+def test_resolve_uses_defaults_for_unset_months():
+    schedule = CostSchedule()
+    schedule.set("ad_cost", 2, 400)
+    schedule.set("consultant", 0, 80)
+
+    resolved = schedule.resolve(4, [60, 30, 150])
+
+    assert resolved.shape == (4, 3)
+    assert resolved[:, 0].tolist() == [80, 60, 60, 60]
+    assert resolved[:, 2].tolist() == [150, 150, 400, 150]
+
+    schedule.clear("ad_cost", 2)
+    assert schedule.column("ad_cost", 4, 150).tolist() == [150] * 4
+
+
+def test_bulk_operations():
+    schedule = CostSchedule()
+    schedule.set_all("production", 40, 6)
+    schedule.set("ad_cost", 1, 200)
+    schedule.fill_down("ad_cost", 1, 6, 150)
+    schedule.scale("consultant", 1.5, 6, 60)
+
+    resolved = schedule.resolve(6, [60, 30, 150])
+    assert resolved[:, 1].tolist() == [40] * 6
+    assert resolved[:, 2].tolist() == [150, 200, 200, 200, 200, 200]
+    assert resolved[:, 0].tolist() == [90] * 6
+
+    schedule.clear()
+    assert schedule.resolve(6, [60, 30, 150]).tolist() == [[60, 30, 150]] * 6
+
+
+def test_merged_prefers_other_overrides():
+    base = CostSchedule()
+    base.set("consultant", 0, 70)
+    base.set("ad_cost", 5, 300)
+    preset = CostSchedule(np.full((3, 3), 10.0))
+
+    merged = base.merged(preset)
+
+    assert merged.resolve(6, [1, 1, 1])[:, 0].tolist() == [10, 10, 10, 1, 1, 1]
+    assert merged.resolve(6, [1, 1, 1])[5, 2] == 300
+    assert base.resolve(6, [1, 1, 1])[0, 0] == 70
+
+
+def test_dict_round_trip_and_validation():
+    legacy = {"consultant_2": 80, "production_5": 45.5, "ad_cost_0": 400}
+
+    schedule = CostSchedule.from_dict(legacy)
+
+    assert schedule.to_dict() == legacy
+    assert CostSchedule.from_dict(schedule.to_dict()) == schedule
+    with pytest.raises(ValueError):
+        CostSchedule.from_dict({"marketing_0": 10})
+
+
+def test_inputs_accept_legacy_dict_and_fingerprint_follows_values():
+    inputs = SimulationInputs.from_dict({"months": 3, "monthly_costs": {"ad_cost_1": 500}})
+
+    assert isinstance(inputs.monthly_costs, CostSchedule)
+    assert inputs.engine_params()["ad_costs"].tolist() == [150, 500, 150]
+    assert inputs.to_dict()["monthly_costs"] == {"ad_cost_1": 500}
+
+    other = SimulationInputs.from_dict({"months": 3, "monthly_costs": {"ad_cost_1": 500}})
+    assert fingerprint(inputs.monthly_costs) == fingerprint(other.monthly_costs)
+    other.monthly_costs.set("ad_cost", 1, 501)
+    assert fingerprint(inputs.monthly_costs) != fingerprint(other.monthly_costs)
+
+
+def test_changed_since_tracks_edits_across_copies():
+    schedule = CostSchedule()
+    schedule.set("ad_cost", 1, 100)
+    snapshot = schedule.copy()
+
+    schedule.set("consultant", 4, 10)
+    schedule.set_column("production", [1, 2], start=2)
+    assert schedule.changed_since(snapshot.revision).tolist() == [2, 3, 4]
+    assert snapshot.changed_since(snapshot.revision).tolist() == []
+
+    # コピー元とコピーの両方を書き換えると履歴が分岐し、差分は求められない
+    snapshot.set("ad_cost", 0, 5)
+    assert schedule.changed_since(snapshot.revision) is None
+    assert CostSchedule().changed_since(schedule.revision) is None
@@ -0,0 +1,78 @@
+"""感度分析のテスト"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pytest
+
+import simulator.sensitivity as sensitivity_module
+from simulator import (GOAL_METRICS, SENSITIVITY_INPUTS, SimulationInputs, run_sensitivity, simulate_arrays,
+                       tornado_frame)
+
+BASE = SimulationInputs(start_date=date(2025, 4, 1), months=24, peak_months=(12,), peak_multiplier=1.8)
+
+
+def total(inputs, metric="総利益", **overrides):
+    params = {**inputs.engine_params(), **overrides}
+    return float(GOAL_METRICS[metric](simulate_arrays(inputs.months, **params)))
+
+
+@pytest.mark.parametrize("name", ["base_revenue", "revenue_growth", "peak_multiplier", "ad_cost_ratio",
+                                  "consultant_fee", "production_cost", "other_fixed_cost"])
+def test_rows_match_individual_runs(name):
+    result = run_sensitivity(BASE.months, BASE.engine_params(), step=0.2)
+    i = result["names"].index(name)
+    value = getattr(BASE, name)
+
+    assert result["baseline"] == pytest.approx(total(BASE))
+    assert result["low"][i] == pytest.approx(total(replace(BASE, **{name: value * 0.8})))
+    assert result["high"][i] == pytest.approx(total(replace(BASE, **{name: value * 1.2})))
+
+
+def test_all_inputs_in_one_engine_call(monkeypatch):
+    calls = []
+    original = sensitivity_module.simulate_arrays
+
+    def counting(months, **params):
+        calls.append(np.shape(params["base_revenue"])[0])
+        return original(months, **params)
+
+    monkeypatch.setattr(sensitivity_module, "simulate_arrays", counting)
+    run_sensitivity(BASE.months, BASE.engine_params())
+
+    assert calls == [1 + 2 * len(SENSITIVITY_INPUTS)]
+
+
+def test_preset_strength_scales_the_seasonal_deviation():
+    flat = run_sensitivity(BASE.months, BASE.engine_params(), inputs=["preset"])
+    assert flat["low"][0] == flat["high"][0] == pytest.approx(flat["baseline"])
+
+    seasonal = replace(BASE, preset="EC・小売業")
+    params = seasonal.engine_params()
+    result = run_sensitivity(seasonal.months, params, inputs=["preset"], step=0.5)
+    stronger = {cost: base + (np.asarray(params[cost]) - base) * 1.5
+                for cost, base in [("consultant_costs", seasonal.consultant_fee),
+                                   ("production_costs", seasonal.production_cost),
+                                   ("ad_costs", seasonal.base_ad_cost)]}
+    assert result["high"][0] == pytest.approx(total(seasonal, **stronger))
+
+
+def test_elasticities_and_tornado_order():
+    result = run_sensitivity(BASE.months, BASE.engine_params(), metric="全体ROAS")
+    np.testing.assert_allclose(result["elasticity"],
+                               (result["high"] - result["low"]) / (2 * 0.1 * result["baseline"]))
+
+    frame = tornado_frame(result)
+    assert list(frame.columns) == ["入力", "減少時", "増加時", "変化幅", "弾力性"]
+    assert frame["変化幅"].is_monotonic_decreasing
+    assert set(frame["入力"]) == {info["label"] for info in SENSITIVITY_INPUTS.values()}
+    # 固定費は全体ROASに影響しない
+    assert frame.set_index("入力").loc["その他固定費", "変化幅"] == 0
+
+
+def test_invalid_requests_raise():
+    with pytest.raises(ValueError, match="不明な指標"):
+        run_sensitivity(12, BASE.engine_params(), metric="ROAS")
+    with pytest.raises(ValueError, match="感度を調べられない入力"):
+        run_sensitivity(12, BASE.engine_params(), inputs=["months"])
@@ -0,0 +1,118 @@
+"""シナリオライブラリ（SQLite）のテスト"""
+
+import sqlite3
+import threading
+from datetime import date
+
+import pytest
+
+from simulator import CostSchedule, PRESETS, ScenarioStore, SimulationInputs, run_simulation
+from simulator.export import summarize
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScenarioStore(tmp_path / "scenarios.db")
+    yield store
+    store.close()
+
+
+def make_inputs(**overrides):
+    values = {"start_date": date(2025, 4, 1), "months": 24, "peak_months": (12,), "preset": "EC・小売業"}
+    return SimulationInputs(**{**values, **overrides})
+
+
+def test_saved_scenario_reopens_without_recomputing(store):
+    schedule = CostSchedule()
+    schedule.set("ad_cost", 3, 500)
+    inputs = make_inputs(monthly_costs=schedule, preset={**PRESETS["EC・小売業"], "yoy_drift": 5.0})
+    df = run_simulation(inputs)
+
+    scenario_id = store.save("広告強化案", inputs, df, client="A社", preset="EC・小売業")
+    saved = store.load(scenario_id)
+
+    assert saved.inputs == inputs
+    assert saved.frame.equals(df)
+    assert saved.totals == summarize(df)
+    assert (saved.client, saved.name, saved.preset) == ("A社", "広告強化案", "EC・小売業")
+
+
+def test_same_client_and_name_overwrites(store):
+    first = store.save("案1", make_inputs(), run_simulation(make_inputs()), client="A社")
+    updated = make_inputs(base_revenue=800)
+    second = store.save("案1", updated, run_simulation(updated), client="A社")
+    store.save("案1", make_inputs(), run_simulation(make_inputs()), client="B社")
+
+    assert second == first
+    assert len(store) == 2
+    assert store.load(first).inputs.base_revenue == 800
+
+
+def test_list_filters_by_indexed_columns(store):
+    for i, (client, preset, start) in enumerate([("A社", "EC・小売業", date(2025, 1, 1)),
+                                                  ("A社", "デフォルト", date(2025, 6, 1)),
+                                                  ("B社", "EC・小売業", date(2026, 1, 1))]):
+        inputs = make_inputs(start_date=start, preset=preset)
+        store.save(f"案{i}", inputs, run_simulation(inputs), client=client)
+
+    assert store.clients() == ["A社", "B社"]
+    assert list(store.list(client="A社")["シナリオ名"]) == ["案1", "案0"]
+    assert list(store.list(preset="EC・小売業")["クライアント"]) == ["B社", "A社"]
+    assert list(store.list(start_from=date(2025, 3, 1), start_to="2025-12-31")["シナリオ名"]) == ["案1"]
+    assert len(store.list(limit=2)) == 2
+
+    plans = {row[3] for row in store._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM scenarios WHERE client = ? ORDER BY saved_at DESC", ("A社",))}
+    assert any("scenarios_client" in plan for plan in plans)
+
+
+def test_wal_mode_and_concurrent_readers(store, tmp_path):
+    inputs = make_inputs()
+    store.save("案", inputs, run_simulation(inputs))
+
+    assert store._connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # 別の接続（別プロセス相当）から書き込み中でも読める
+    other = sqlite3.connect(tmp_path / "scenarios.db")
+    threads = [threading.Thread(target=lambda: store.list()) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert other.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0] == 1
+    for thread in threads:
+        thread.join()
+    other.close()
+
+
+def test_listing_reads_indexes_not_result_blobs(store):
+    inputs = make_inputs(months=36)
+    df = run_simulation(inputs)
+    for i in range(60):
+        store.save(f"案{i}", inputs, df, client=f"クライアント{i % 6}")
+
+    statements, reads = [], set()
+
+    def record_reads(action, table, column, *_):
+        if action == sqlite3.SQLITE_READ:
+            reads.add(column)
+        return sqlite3.SQLITE_OK
+
+    store._connection.set_trace_callback(statements.append)
+    store._connection.set_authorizer(record_reads)
+    listing = store.list(client="クライアント3")
+    store._connection.set_authorizer(None)
+    store._connection.set_trace_callback(None)
+
+    assert len(listing) == 10
+    # 一覧では結果列（BLOB）や入力のJSONを読まず、クライアントのインデックスで絞り込む
+    assert "result" not in reads and "inputs" not in reads
+    plans = [row[3] for row in store._connection.execute("EXPLAIN QUERY PLAN " + statements[-1])]
+    assert any("scenarios_client" in plan for plan in plans)
+    # 読み込みは主キーで1行だけ引く
+    plans = [row[3] for row in store._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM scenarios WHERE id = ?", (int(listing["ID"][0]),))]
+    assert any("INTEGER PRIMARY KEY" in plan for plan in plans)
+    assert store.load(listing["ID"][0]).frame.equals(df)
+
+
+def test_missing_scenario_raises(store):
+    with pytest.raises(KeyError, match="シナリオが見つかりません"):
+        store.load(1)
@@ -0,0 +1,94 @@
+"""改善提案ルールのテスト"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from simulator import (SimulationInputs, calculate_optimization_suggestions, frame_columns, month_labels,
+                       rule_based_optimization, run_simulation, run_sweep, suggestion_flags)
+from simulator.suggestions import evaluate_rules, render_suggestions
+
+
+def reference_suggestions(df):
+    """旧実装（列ごとのフィルタ）の再現"""
+    suggestions = []
+    low_roas_months = df[df["ROAS"] < df["ROAS"].mean() - df["ROAS"].std()]
+    if not low_roas_months.empty:
+        suggestions.append({"type": "警告", "title": "ROAS改善が必要な月があります",
+                            "detail": f"{', '.join(low_roas_months['月'].tolist())}のROASが平均を大きく下回っています。広告費の見直しを検討してください。",
+                            "impact": "高"})
+    profit_margin_std = df["利益率"].std()
+    if profit_margin_std > 10:
+        suggestions.append({"type": "注意", "title": "利益率の変動が大きいです",
+                            "detail": f"利益率の標準偏差が{profit_margin_std:.1f}%です。費用配分の最適化により安定化が可能です。",
+                            "impact": "中"})
+    loss_months = df[df["利益"] < 0]
+    if not loss_months.empty:
+        suggestions.append({"type": "警告", "title": "赤字月があります",
+                            "detail": f"{', '.join(loss_months['月'].tolist())}で赤字になっています。緊急の費用見直しが必要です。",
+                            "impact": "高"})
+    high_ad_months = df[df["広告費"] > df["売上"] * 0.4]
+    if not high_ad_months.empty:
+        suggestions.append({"type": "提案", "title": "広告費最適化の機会",
+                            "detail": f"{', '.join(high_ad_months['月'].tolist())}の広告費率が40%を超えています。効率化により利益改善が見込めます。",
+                            "impact": "中"})
+    return suggestions
+
+
+def reference_optimization(df, business_goals):
+    """旧実装（iterrows）の再現"""
+    optimizations = []
+    if business_goals == "利益最大化":
+        for _, row in df[df["ROAS"] < 200].iterrows():
+            optimizations.append({"月": row["月"], "施策": "広告費削減", "現在値": f"{row['広告費']}万円",
+                                  "推奨値": f"{int(row['広告費'] * 0.8)}万円",
+                                  "期待効果": f"利益+{int(row['広告費'] * 0.2)}万円",
+                                  "理由": f"ROAS {row['ROAS']}%が低すぎます"})
+    elif business_goals == "売上成長重視":
+        for _, row in df[df["利益率"] > df["利益率"].mean() + 5].iterrows():
+            optimizations.append({"月": row["月"], "施策": "広告費増額", "現在値": f"{row['広告費']}万円",
+                                  "推奨値": f"{int(row['広告費'] * 1.3)}万円",
+                                  "期待効果": f"売上+{int(row['売上'] * 0.15)}万円",
+                                  "理由": f"利益率{row['利益率']}%で余裕があります"})
+    elif df["利益率"].std() > 10:
+        optimizations.append({"月": "全期間", "施策": "費用平準化", "現在値": f"利益率標準偏差 {df['利益率'].std():.1f}%",
+                              "推奨値": "各月の費用を平均値に近づける", "期待効果": "リスク軽減",
+                              "理由": "利益率の変動が大きすぎます"})
+    return optimizations
+
+
+SCENARIOS = [
+    {},
+    {"months": 24, "base_revenue": 100, "revenue_growth": 8.0, "peak_months": (12,), "peak_multiplier": 2.0},
+    {"months": 36, "ad_cost_ratio": 45.0, "preset": "EC・小売業", "auto_mode": True},
+    {"months": 6, "base_revenue": 150, "revenue_growth": -5.0},
+]
+
+
+@pytest.mark.parametrize("overrides", SCENARIOS)
+def test_rules_match_reference(overrides):
+    df = run_simulation(SimulationInputs(start_date=date(2025, 4, 1), **overrides))
+
+    assert calculate_optimization_suggestions(df) == reference_suggestions(df)
+    for goal in ["利益最大化", "売上成長重視", "リスク最小化"]:
+        assert rule_based_optimization(df, goal) == reference_optimization(df, goal)
+
+
+def test_batched_evaluation_matches_single_runs():
+    params = {"base_revenue": 300, "base_ad_cost": 150, "consultant_fee": 60, "production_cost": 30,
+              "other_fixed_cost": 20, "start_month": 4, "peak_months": (12,), "peak_multiplier": 1.8}
+    growths, ratios = np.linspace(-5, 10, 7), np.linspace(10, 60, 9)
+    result = run_sweep(12, {"revenue_growth": growths, "ad_cost_ratio": ratios}, **params)
+    columns = frame_columns(result["result"])
+    month_names = month_labels(date(2025, 4, 1), 12)
+
+    flags = suggestion_flags(columns)
+    evaluation = evaluate_rules(columns)
+    assert flags["loss"].shape == (len(growths) * len(ratios),)
+    assert flags["loss"].any() and not flags["loss"].all()
+
+    for s, (growth, ratio) in enumerate(zip(result["values"]["revenue_growth"], result["values"]["ad_cost_ratio"])):
+        df = run_simulation(SimulationInputs(start_date=date(2025, 4, 1), base_revenue=300, revenue_growth=growth,
+                                             ad_cost_ratio=ratio, peak_months=(12,), peak_multiplier=1.8))
+        assert render_suggestions(evaluation, month_names, index=s) == reference_suggestions(df)
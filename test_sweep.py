@@ -0,0 +1,44 @@
+"""シナリオスイープのテスト"""
+
+import numpy as np
+
+from simulator import kpi_totals, run_sweep, simulate_arrays, sweep_frame, to_grid
+
+BASE_PARAMS = {
+    "base_revenue": 500,
+    "base_ad_cost": 150,
+    "consultant_fee": 60,
+    "production_cost": 30,
+    "other_fixed_cost": 20,
+}
+
+
+def test_each_scenario_matches_single_run():
+    growths = [2.0, 6.0, 10.0]
+    ratios = [15.0, 30.0, 45.0, 50.0]
+    result = run_sweep(12, {"revenue_growth": growths, "ad_cost_ratio": ratios}, **BASE_PARAMS)
+
+    assert result["result"]["profit"].shape == (12, 12)
+    assert to_grid(result, "総利益").shape == (3, 4)
+    for i, growth in enumerate(growths):
+        for j, ratio in enumerate(ratios):
+            single = simulate_arrays(12, revenue_growth=growth, ad_cost_ratio=ratio, **BASE_PARAMS)
+            assert to_grid(result, "総利益")[i, j] == kpi_totals(single)["総利益"]
+            np.testing.assert_array_equal(result["result"]["roas"][i * len(ratios) + j], single["roas"])
+
+
+def test_unaffected_parameter_still_has_scenario_axis():
+    result = run_sweep(6, {"peak_multiplier": [1.0, 2.0]}, revenue_growth=5.0, ad_cost_ratio=30.0, **BASE_PARAMS)
+
+    assert result["result"]["revenue"].shape == (2, 6)
+    assert len(sweep_frame(result)) == 2
+
+
+def test_ten_thousand_scenarios_in_one_engine_call():
+    grid = {"revenue_growth": np.linspace(2, 10, 100), "ad_cost_ratio": np.linspace(15, 45, 100)}
+    result = run_sweep(36, grid, **BASE_PARAMS)
+
+    assert result["result"]["profit"].shape == (10000, 36)
+    single = simulate_arrays(36, revenue_growth=grid["revenue_growth"][-1], ad_cost_ratio=grid["ad_cost_ratio"][-1],
+                             **BASE_PARAMS)
+    np.testing.assert_allclose(result["result"]["profit"][-1], single["profit"])
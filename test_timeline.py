@@ -0,0 +1,110 @@
+"""期間インデックス（月次・週次・日次）のテスト"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pytest
+
+from simulator import (IncrementalSimulation, SimulationInputs, build_timeline, calendar_months, month_labels,
+                       run_simulation, simulate_arrays, simulation_totals)
+from simulator.export import summarize
+from simulator.timeline import month_starts
+
+FLAT = SimulationInputs(start_date=date(2025, 1, 31), months=36, revenue_growth=0.0, base_revenue=310,
+                        other_fixed_cost=28)
+
+
+def test_month_labels_follow_the_calendar():
+    labels = month_labels(date(2025, 1, 31), 36)
+
+    assert len(set(labels)) == 36
+    assert labels[:3] == ["2025年01月", "2025年02月", "2025年03月"]
+    assert labels[-1] == "2027年12月"
+    assert [int(label[5:7]) for label in labels] == calendar_months(1, 36).tolist()
+
+
+def test_month_starts_clamp_to_month_end():
+    starts = month_starts(date(2025, 1, 31), 3)
+    assert np.datetime_as_string(starts).tolist() == ["2025-01-31", "2025-02-28", "2025-03-31", "2025-04-30"]
+
+
+@pytest.mark.parametrize("inputs", [
+    FLAT,
+    replace(FLAT, revenue_growth=4.0, peak_months=(3, 12), peak_multiplier=1.8, preset="EC・小売業", ad_cost_ratio=32.0),
+    replace(FLAT, start_date=date(2025, 11, 15), revenue_growth=2.5, peak_months=(12,), auto_mode=True),
+], ids=["flat", "seasonal", "mid_month_auto"])
+def test_daily_amounts_add_up_to_monthly_amounts(inputs):
+    timeline = build_timeline(inputs.start_date, inputs.months, "daily")
+    daily = simulate_arrays(inputs.months, **inputs.engine_params(), timeline=timeline)
+    monthly = simulate_arrays(inputs.months, **inputs.engine_params())
+
+    assert len(timeline.labels) == (timeline_end(inputs) - inputs.start_date).days
+    for key in ("revenue", "ad_cost", "consultant", "production", "other", "total_cost", "profit"):
+        totals = np.bincount(timeline.month_index, weights=np.broadcast_to(daily[key], daily["profit"].shape))
+        np.testing.assert_allclose(totals, monthly[key], err_msg=key)
+
+
+def timeline_end(inputs):
+    return date.fromisoformat(str(month_starts(inputs.start_date, inputs.months)[-1]))
+
+
+def test_weekly_and_daily_totals_match_monthly():
+    inputs = replace(FLAT, revenue_growth=4.0, peak_months=(7, 12), peak_multiplier=1.8, preset="EC・小売業")
+    expected = IncrementalSimulation(inputs).totals()
+    assert expected == simulation_totals(inputs)
+    monthly_summary = summarize(run_simulation(inputs))
+    for granularity in ("weekly", "daily"):
+        changed = replace(inputs, granularity=granularity)
+        assert IncrementalSimulation(changed).totals() == expected, granularity
+        assert simulation_totals(changed) == expected, granularity
+        summary = summarize(run_simulation(changed), simulation_totals(changed))
+        for name in ("総売上", "総費用", "総利益", "全体ROAS"):
+            assert summary[name] == monthly_summary[name], (granularity, name)
+
+
+def test_weekly_is_the_sum_of_daily():
+    daily = run_simulation(replace(FLAT, revenue_growth=4.0, granularity="daily"))
+    weekly = run_simulation(replace(FLAT, revenue_growth=4.0, granularity="weekly"))
+
+    assert weekly["月"].iloc[1] == "2025年02月07日週"
+    weeks = np.arange(len(daily)) // 7
+    np.testing.assert_allclose(weekly["売上"], np.bincount(weeks, weights=daily["売上"]), atol=0.5)
+    np.testing.assert_allclose(weekly["ROAS"], np.round(weekly["売上"] / weekly["広告費"] * 100), atol=1)
+
+
+def test_daily_seasonality_uses_the_period_month():
+    inputs = replace(FLAT, start_date=date(2025, 11, 15), months=2, peak_months=(12,), peak_multiplier=2.0,
+                     granularity="daily")
+    df = run_simulation(inputs).set_index("月")
+
+    # 11/15〜12/14 は月次の「2025年11月」（30日）なので12月の日もピークではなく、
+    # 12/15〜1/14 は「2025年12月」（31日）なのでピーク
+    assert df.loc["2025年11月30日", "売上"] == df.loc["2025年12月01日", "売上"] == round(310 / 30, 1)
+    assert df.loc["2025年12月15日", "売上"] == df.loc["2026年01月14日", "売上"] == round(310 * 2 / 31, 1)
+    assert run_simulation(replace(inputs, granularity="monthly"))["売上"].tolist() == [310, 620]
+
+
+def test_daily_run_broadcasts_over_scenarios():
+    timeline = build_timeline(FLAT.start_date, FLAT.months, "daily")
+    params = {**FLAT.engine_params(), "base_revenue": np.array([[300.0], [600.0]])}
+    result = simulate_arrays(FLAT.months, **params, timeline=timeline)
+
+    assert result["profit"].shape == (2, len(timeline.labels))
+    assert result["revenue"][1].sum() == pytest.approx(2 * result["revenue"][0].sum())
+
+
+def test_incremental_and_stored_granularity():
+    inputs = replace(FLAT, granularity="weekly", peak_months=(12,))
+    incremental = IncrementalSimulation(inputs)
+    assert incremental.frame().equals(run_simulation(inputs))
+
+    changed = replace(inputs, granularity="daily")
+    assert incremental.update(changed) is None
+    assert incremental.frame().equals(run_simulation(changed))
+    assert SimulationInputs.from_dict(changed.to_dict()) == changed
+
+
+def test_unknown_granularity_raises():
+    with pytest.raises(ValueError, match="不明な粒度"):
+        build_timeline(date(2025, 4, 1), 12, "hourly")